@@ -2,65 +2,57 @@
 Main GUI application (tkinter) for crawling B站并生成崩坏3 UP 主排行榜。
 """
 import threading
-import concurrent.futures
-import requests
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, simpledialog
 from datetime import datetime
-import csv
 import traceback
 import os
 import json
-import statistics
 import copy
 
-from bilibili import collect_by_keyword, collect_all_videos_by_up, get_last_response, set_crawl_workers, set_search_order
 from llm_client import LLMClient
-from utils import ts_to_dt
+from log_sink import LogSink
+from engine import (
+    DEFAULT_KEYWORDS,
+    WEIGHT_METRICS,
+    DEFAULT_WEIGHT_PRESETS,
+    RankEngine,
+    rating_label,
+    parse_date_range,
+    write_leaderboard_csv,
+    fetch_from_proxypool,
+)
 import bilibili
 
 
-DEFAULT_KEYWORDS = [
-    "崩坏3 深渊",
-    "崩坏3 记忆战场",
-    "崩坏3 凹分",
-    "崩坏3 榜一",
-    "崩坏3 作业",
-    "崩坏3 无限",
-    "崩坏3 寂灭",
-    "崩坏3 红莲",
-    "崩坏3 乐土",
-]
-
 SEARCH_ORDER_LABELS = {
     "time": "按时间倒序",
     "default": "默认排序",
 }
 
-WEIGHT_METRICS = [
-    ("counts", "视频数量"),
-    ("views", "播放量"),
-    ("desc", "简介字数"),
-    ("favorites", "收藏数"),
-    ("likes", "点赞数"),
-]
-
 WEIGHT_PRESET_LABELS = {
     "normal": "常规（默认）",
     "jm": "含寂灭视频",
     "top1": "含榜一视频",
 }
 
-DEFAULT_WEIGHT_PRESETS = {
-    "normal": {"counts": 0.3, "views": 0.3, "desc": 0.1, "favorites": 0.15, "likes": 0.15},
-    "jm": {"counts": 0.4, "views": 0.3, "desc": 0.1, "favorites": 0.1, "likes": 0.1},
-    "top1": {"counts": 0.5, "views": 0.2, "desc": 0.1, "favorites": 0.1, "likes": 0.1},
-}
+# 阈值系数停止输入多久后才重算异常过滤（毫秒）
+SIGMA_DEBOUNCE_MS = 250
+# 表格每页最多渲染的行数；榜单更长时分页显示，只有当前页进入 Treeview
+TABLE_PAGE_SIZE = 200
+# 日志缓冲区刷入文本框的间隔（毫秒）
+LOG_FLUSH_MS = 100
+# 后台 LLM 评价结果合并进榜单的最短间隔（毫秒），期间到达的结果一次性合并
+LLM_APPLY_MS = 300
 
 
 class App:
     def __init__(self, root):
         self.root = root
+        # workers only append to this buffer; _flush_log moves it into the Text widget in batches
+        self._log_sink = LogSink()
+        self.log_max_lines = 2000
+        self.log_file = ""
         root.title("B站崩批统计排行榜")
         root.geometry("1000x720")
 
@@ -106,6 +98,8 @@ class App:
         search_mode_frame.grid(row=2, column=1, columnspan=5, sticky=tk.W, pady=(4,0))
         ttk.Radiobutton(search_mode_frame, text="模式1: 按关键词搜索", variable=self.search_mode_var, value="keyword").pack(side=tk.LEFT, padx=(0,10))
         ttk.Radiobutton(search_mode_frame, text="模式2: 先找UP主再按关键词搜索", variable=self.search_mode_var, value="up_first").pack(side=tk.LEFT)
+        self.incremental = tk.BooleanVar(value=False)
+        ttk.Checkbutton(search_mode_frame, text="增量检索（遇到已收录视频即停止翻页）", variable=self.incremental).pack(side=tk.LEFT, padx=(10,0))
 
         # --- Settings frame (LLM, cookie, proxy) ---
         settings_frame = ttk.LabelFrame(self.main, text="设置", padding=8)
@@ -158,6 +152,25 @@ class App:
         self.search_order_cb = ttk.Combobox(settings_frame, values=order_values, textvariable=self.search_order_mode, state='readonly', width=12)
         self.search_order_cb.grid(row=5, column=1, sticky=tk.W, pady=(4,0))
         self.search_order_cb.bind("<<ComboboxSelected>>", lambda e: None)
+        ttk.Label(settings_frame, text="检索引擎:").grid(row=5, column=2, sticky=tk.W, pady=(4,0), padx=(10,0))
+        self.crawl_backend = tk.StringVar(value="thread")
+        ttk.Combobox(settings_frame, values=["thread", "async"], textvariable=self.crawl_backend, state='readonly', width=8).grid(row=5, column=3, sticky=tk.W, pady=(4,0))
+        self.async_max_inflight = 64
+        self.use_detail_cache = tk.BooleanVar(value=True)
+        tk.Checkbutton(settings_frame, text="启用详情缓存", variable=self.use_detail_cache).grid(row=5, column=4, sticky=tk.W, padx=6, pady=(4,0))
+        self.stat_ttl_hours = 12.0
+        self.search_rps = 3.0
+        self.view_rps = 12.0
+        self.keep_raw_detail = False
+        self.llm_adaptive = True
+        self.llm_max_threads = 16
+        self.llm_prompt_budget = 250
+        self.llm_stream = True
+        self.llm_deadline = 45.0
+        self.llm_batch_size = 5
+        self.llm_cache = True
+        self.llm_cache_hours = 72.0
+        self.llm_cache_tolerance = 0.0
 
         ttk.Button(settings_frame, text="保存设置", command=self.save_config).grid(row=4, column=2, sticky=tk.W, pady=6, padx=4)
         ttk.Button(settings_frame, text="测试 LLM", command=self.test_llm_connection).grid(row=4, column=3, sticky=tk.W, pady=6, padx=4)
@@ -178,9 +191,14 @@ class App:
         ttk.Checkbutton(actions, text="排除异常数据", variable=self.exclude_outliers, command=self.on_outlier_toggle).pack(side=tk.LEFT, padx=(10,6))
         ttk.Label(actions, text="阈值系数:").pack(side=tk.LEFT, padx=(4,2))
         self.outlier_sigma = tk.DoubleVar(value=2.5)
-        sigma_spin = ttk.Spinbox(actions, from_=1.0, to=5.0, increment=0.1, textvariable=self.outlier_sigma, width=4, command=self.on_outlier_sigma_change)
+        sigma_spin = ttk.Spinbox(actions, from_=1.0, to=5.0, increment=0.1, textvariable=self.outlier_sigma, width=4)
         sigma_spin.pack(side=tk.LEFT, padx=(0,6))
+        # Spinbox 箭头同样会写入变量，只挂 trace 即可，避免一次点击重算两次
         self.outlier_sigma.trace_add("write", lambda *args: self.on_outlier_sigma_change())
+        self._sigma_after_id = None
+        self._filter_gen = 0
+        self._filter_busy = False
+        self._filter_pending = False
         self.progress = ttk.Progressbar(actions, length=360)
         self.progress.pack(side=tk.RIGHT)
 
@@ -202,6 +220,18 @@ class App:
         self.tree.configure(yscrollcommand=vsb.set)
         self.tree.grid(row=0, column=0, sticky=tk.NSEW)
         vsb.grid(row=0, column=1, sticky=tk.NS)
+        pager = ttk.Frame(table_frame)
+        pager.grid(row=1, column=0, columnspan=2, sticky=tk.EW, pady=(4, 0))
+        self.page_prev_btn = ttk.Button(pager, text="上一页", width=8, command=lambda: self._change_page(-1), state=tk.DISABLED)
+        self.page_prev_btn.pack(side=tk.LEFT)
+        self.page_next_btn = ttk.Button(pager, text="下一页", width=8, command=lambda: self._change_page(1), state=tk.DISABLED)
+        self.page_next_btn.pack(side=tk.LEFT, padx=(6, 0))
+        self.page_label = ttk.Label(pager, text="")
+        self.page_label.pack(side=tk.LEFT, padx=(10, 0))
+        self._page = 0
+        # iid -> values currently shown, in display order; lets _update_table touch only changed rows
+        self._shown_rows = {}
+        self._shown_order = []
         table_frame.rowconfigure(0, weight=1)
         table_frame.columnconfigure(0, weight=1)
 
@@ -215,41 +245,69 @@ class App:
         lvsb.grid(row=0, column=1, sticky=tk.NS)
         log_frame.rowconfigure(0, weight=1)
         log_frame.columnconfigure(0, weight=1)
+        self.root.after(LOG_FLUSH_MS, self._flush_log)
 
         self.weight_configs = copy.deepcopy(DEFAULT_WEIGHT_PRESETS)
         self._weight_win = None
         self._suppress_sigma_callback = False
         self.banned_upnames = set()
-        self._results_unfiltered = {}
         self.results = []
-        self.results_by_category_raw = {}
-        self.results_by_category = {}
-        self._llm_used_last = False
+        # GUI-free pipeline (scan / aggregate / rank); the GUI only feeds it settings and renders results
+        self._llm_apply_scheduled = False
+        self.engine = RankEngine(log=self.log, progress=self._set_progress, partial=self._on_partial_results,
+                                 llm_update=self._on_llm_update)
         # load saved config if exists
         try:
             self.load_config()
         except Exception:
             pass
         # stop event for canceling scans
-        self._stop_event = threading.Event()
+        self._stop_event = self.engine.stop_event
 
     def log(self, msg: str):
-        # thread-safe append
-        def _append():
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            self.log_text.insert(tk.END, f"[{timestamp}] {msg}\n")
-            self.log_text.see(tk.END)
+        # thread-safe: just buffer the line, the Tk thread picks it up on the next flush
+        self._log_sink.write(msg)
+
+    def _flush_log(self):
+        lines, dropped = self._log_sink.drain()
+        if lines:
+            if dropped:
+                lines.insert(0, f"（日志过多，已省略 {dropped} 条）")
+            try:
+                self.log_text.insert(tk.END, "\n".join(lines) + "\n")
+                # keep at most log_max_lines lines in the widget
+                count = int(self.log_text.index("end-1c").split(".")[0]) - 1
+                if count > self.log_max_lines:
+                    self.log_text.delete("1.0", f"{count - self.log_max_lines + 1}.0")
+                self.log_text.see(tk.END)
+            except Exception:
+                pass
+        try:
+            self.root.after(LOG_FLUSH_MS, self._flush_log)
+        except Exception:
+            pass
+
+    def _apply_log_settings(self):
+        path = self.log_file
+        if path and not os.path.isabs(path):
+            path = os.path.join(os.path.dirname(self.config_path()), path)
+        try:
+            self._log_sink.set_file(path or None)
+        except Exception as e:
+            self.log(f"无法打开日志文件 {path}: {e}")
 
+    def _set_progress(self, value: float):
         try:
-            self.root.after(0, _append)
+            self.root.after(0, lambda v=value: self.progress.configure(value=v))
         except Exception:
             pass
 
     def config_path(self):
         return os.path.join(os.path.dirname(__file__), "config.json")
 
-    def save_config(self):
-        cfg = {
+    def _gui_config(self):
+        """Collect the current GUI settings as a config.json-shaped dict."""
+        return {
             "provider": self.provider.get(),
             "api_key": self.api_key.get(),
             "api_url": self.api_url.get(),
@@ -262,12 +320,43 @@ class App:
             "llm_weight": float(self.llm_weight.get()),
             "llm_threads": int(self.llm_threads.get()),
             "crawl_threads": int(self.crawl_threads.get()),
+            "crawl_backend": self.crawl_backend.get(),
+            "async_max_inflight": int(self.async_max_inflight),
+            "detail_cache": bool(self.use_detail_cache.get()),
+            "stat_ttl_hours": float(self.stat_ttl_hours),
+            "search_rps": float(self.search_rps),
+            "view_rps": float(self.view_rps),
+            "keep_raw_detail": bool(self.keep_raw_detail),
+            "llm_adaptive": bool(self.llm_adaptive),
+            "llm_max_threads": int(self.llm_max_threads),
+            "llm_prompt_budget": int(self.llm_prompt_budget),
+            "llm_stream": bool(self.llm_stream),
+            "llm_deadline": float(self.llm_deadline),
+            "llm_batch_size": int(self.llm_batch_size),
+            "llm_cache": bool(self.llm_cache),
+            "llm_cache_hours": float(self.llm_cache_hours),
+            "llm_cache_tolerance": float(self.llm_cache_tolerance),
+            "log_file": self.log_file,
+            "log_max_lines": int(self.log_max_lines),
             "weight_configs": self.weight_configs,
             "outlier_sigma": float(self.outlier_sigma.get()),
+            "exclude_outliers": bool(self.exclude_outliers.get()),
             "blacklist": sorted(self.banned_upnames),
             "search_order": self._get_search_order_key(),
             "search_mode": self.search_mode_var.get(),
+            "incremental": bool(self.incremental.get()),
         }
+
+    def _sync_engine(self):
+        """Push the current GUI settings into the engine before running or re-ranking."""
+        try:
+            self.engine.apply_config(self._gui_config())
+        except Exception as e:
+            self.log(f"同步设置失败: {e}")
+
+    def save_config(self):
+        self._sync_engine()
+        cfg = self.engine.to_config()
         try:
             with open(self.config_path(), "w", encoding="utf-8") as f:
                 json.dump(cfg, f, ensure_ascii=False, indent=2)
@@ -282,60 +371,40 @@ class App:
         if not os.path.exists(p):
             return
         try:
-            with open(p, "r", encoding="utf-8") as f:
-                cfg = json.load(f)
-            self.provider.set(cfg.get("provider", "openai"))
-            self.api_key.set(cfg.get("api_key", ""))
-            self.api_url.set(cfg.get("api_url", ""))
-            # load model name if present
-            try:
-                self.llm_model.set(cfg.get("llm_model", "gpt-3.5-turbo"))
-            except Exception:
-                self.llm_model.set("gpt-3.5-turbo")
-            # load use_llm flag
-            try:
-                self.use_llm.set(bool(cfg.get("use_llm", True)))
-            except Exception:
-                self.use_llm.set(True)
-            self.bil_cookie.set(cfg.get("bili_cookie", ""))
-            self.proxy_list.set(cfg.get("proxies", ""))
-            self.use_proxy.set(cfg.get("use_proxy", False))
-            self.use_proxypool.set(cfg.get("use_proxypool", False))
-            try:
-                self.llm_weight.set(float(cfg.get("llm_weight", 0.4)))
-            except Exception:
-                self.llm_weight.set(0.4)
-            try:
-                self.llm_threads.set(int(cfg.get("llm_threads", 4)))
-            except Exception:
-                self.llm_threads.set(4)
-            try:
-                self.crawl_threads.set(int(cfg.get("crawl_threads", 3)))
-            except Exception:
-                self.crawl_threads.set(3)
-            try:
-                self._apply_weight_config(cfg.get("weight_configs"))
-            except Exception:
-                self.weight_configs = copy.deepcopy(DEFAULT_WEIGHT_PRESETS)
-            try:
-                val = float(cfg.get("outlier_sigma", 2.5))
-                self.outlier_sigma.set(max(0.5, min(10.0, val)))
-            except Exception:
-                self.outlier_sigma.set(2.5)
-            try:
-                bl = cfg.get("blacklist") or []
-                if isinstance(bl, list):
-                    self.banned_upnames = {str(x).strip() for x in bl if str(x).strip()}
-            except Exception:
-                self.banned_upnames = set()
-            try:
-                self._set_search_order_from_key(cfg.get("search_order", "time"))
-            except Exception:
-                self._set_search_order_from_key("time")
-            try:
-                self.search_mode_var.set(cfg.get("search_mode", "keyword"))
-            except Exception:
-                self.search_mode_var.set("keyword")
+            # the engine sanitizes every value; the GUI mirrors the result
+            self.engine.load_config_file(p)
+            e = self.engine
+            self.provider.set(e.provider)
+            self.api_key.set(e.api_key)
+            self.api_url.set(e.api_url)
+            self.llm_model.set(e.llm_model)
+            self.use_llm.set(e.use_llm)
+            self.bil_cookie.set(e.bili_cookie)
+            self.proxy_list.set(e.proxies)
+            self.use_proxy.set(e.use_proxy)
+            self.use_proxypool.set(e.use_proxypool)
+            self.llm_weight.set(e.llm_weight)
+            self.llm_threads.set(e.llm_threads)
+            self.crawl_threads.set(e.crawl_threads)
+            self.crawl_backend.set(e.crawl_backend)
+            self.async_max_inflight = e.async_max_inflight
+            self.use_detail_cache.set(e.detail_cache)
+            self.stat_ttl_hours = e.stat_ttl_hours
+            self.search_rps, self.view_rps = e.search_rps, e.view_rps
+            self.keep_raw_detail = e.keep_raw_detail
+            self.llm_batch_size = e.llm_batch_size
+            self.llm_stream, self.llm_deadline = e.llm_stream, e.llm_deadline
+            self.llm_adaptive, self.llm_max_threads = e.llm_adaptive, e.llm_max_threads
+            self.llm_prompt_budget = e.llm_prompt_budget
+            self.llm_cache, self.llm_cache_hours, self.llm_cache_tolerance = e.llm_cache, e.llm_cache_hours, e.llm_cache_tolerance
+            self.log_file, self.log_max_lines = e.log_file, e.log_max_lines
+            self._apply_log_settings()
+            self.weight_configs = copy.deepcopy(e.weight_configs)
+            self.outlier_sigma.set(e.outlier_sigma)
+            self.banned_upnames = set(e.banned_upnames)
+            self._set_search_order_from_key(e.search_order)
+            self.search_mode_var.set(e.search_mode)
+            self.incremental.set(e.incremental)
             self.log("已加载配置")
         except Exception as e:
             self.log(f"加载配置失败: {e}")
@@ -349,7 +418,10 @@ class App:
             return
         client = LLMClient(provider=provider, endpoint=api_url, api_key=api_key, model=self.llm_model.get())
         self.log("正在测试 LLM 连接...")
-        res = client.test_connection()
+        try:
+            res = client.test_connection()
+        finally:
+            client.close()
         if res.get("ok"):
             self.log(f"LLM 连接成功: {res.get('msg')}")
             messagebox.showinfo("测试连接", "连接成功")
@@ -366,7 +438,7 @@ class App:
         # If proxypool framework enabled, treat entries as proxypool API endpoints
         if self.use_proxypool.get():
             self.log(f"使用 proxypool 模式，尝试从 {len(proxies)} 个 proxypool endpoint 拉取代理...")
-            fetched = self._fetch_from_proxypool(proxies)
+            fetched = fetch_from_proxypool(proxies)
             if not fetched:
                 messagebox.showwarning("测试代理", "从 proxypool API 未获取到任何代理")
                 return
@@ -394,51 +466,8 @@ class App:
         self.stop_btn.config(state=tk.NORMAL)
         # clear stop flag
         self._stop_event.clear()
-        # apply bilibili cookie if provided
-        cookie = self.bil_cookie.get().strip()
-        if cookie:
-            try:
-                bilibili.SESSION.headers.update({"Cookie": cookie})
-                self.log("已设置 B站 Cookie（仅用于当前会话）")
-            except Exception as e:
-                self.log(f"设置 Cookie 出错: {e}")
-
-        # apply proxy pool if enabled
-        try:
-            if self.use_proxy.get():
-                proxies = [p.strip() for p in (self.proxy_list.get() or "").split(",") if p.strip()]
-                if proxies:
-                    bilibili.set_proxy_pool(proxies)
-                    self.log(f"已设置代理池，共 {len(proxies)} 个代理 (启用)")
-                else:
-                    self.log("启用代理池但未提供任何代理字符串")
-            elif self.use_proxypool.get():
-                # treat proxy_list entries as proxypool endpoints
-                endpoints = [p.strip() for p in (self.proxy_list.get() or "").split(',') if p.strip()]
-                if endpoints:
-                    fetched = self._fetch_from_proxypool(endpoints)
-                    if fetched:
-                        bilibili.set_proxy_pool(fetched)
-                        self.log(f"已从 proxypool 拉取并设置代理池，共 {len(fetched)} 个代理")
-                    else:
-                        self.log("未能从 proxypool API 拉取到代理")
-        except Exception as e:
-            self.log(f"设置代理池失败: {e}")
-        
-        # apply crawl workers setting
-        try:
-            crawl_workers = max(1, min(8, int(self.crawl_threads.get())))
-            set_crawl_workers(crawl_workers)
-            self.log(f"已设置检索并发数为 {crawl_workers}")
-        except Exception as e:
-            self.log(f"设置检索并发数失败: {e}")
-
-        try:
-            order_key = self._get_search_order_key()
-            set_search_order("pubdate" if order_key == "time" else "default")
-            self.log(f"检索排序: {'按时间倒序' if order_key == 'time' else '默认'}")
-        except Exception as e:
-            self.log(f"设置检索排序失败: {e}")
+        self._sync_engine()
+        self.engine.configure_crawler()
 
         t = threading.Thread(target=self._scan_worker, daemon=True)
         t.start()
@@ -452,132 +481,6 @@ class App:
         except Exception as e:
             self.log(f"停止采集失败: {e}")
 
-    def _fetch_from_proxypool(self, endpoints):
-        """Try to fetch proxy strings from common proxypool endpoints.
-        endpoints: list of base URLs or full endpoints. Return list of proxy strings like 'http://ip:port'."""
-        out = []
-        tried = set()
-        common_paths = ["", "/get", "/api/get", "/proxies", "/api/proxies", "/get_proxy"]
-        headers = {"User-Agent": "proxy-fetcher/1.0"}
-        for base in endpoints:
-            if not base:
-                continue
-            for p in common_paths:
-                url = base.rstrip('/') + p
-                if url in tried:
-                    continue
-                tried.add(url)
-                try:
-                    r = requests.get(url, timeout=4, headers=headers)
-                    if r.status_code != 200:
-                        continue
-                    # try parse JSON
-                    try:
-                        j = r.json()
-                        # common shapes: list of proxies, or {'proxy': 'ip:port'} or {'data': [...]}
-                        if isinstance(j, list):
-                            for it in j:
-                                if isinstance(it, str) and ':' in it:
-                                    out.append(it.strip())
-                        elif isinstance(j, dict):
-                            # check common keys
-                            if 'proxy' in j and isinstance(j['proxy'], str):
-                                out.append(j['proxy'].strip())
-                            if 'data' in j and isinstance(j['data'], list):
-                                for it in j['data']:
-                                    if isinstance(it, str) and ':' in it:
-                                        out.append(it.strip())
-                            # some frameworks return {'proxies': [...]}
-                            if 'proxies' in j and isinstance(j['proxies'], list):
-                                for it in j['proxies']:
-                                    if isinstance(it, str) and ':' in it:
-                                        out.append(it.strip())
-                    except ValueError:
-                        # plain text containing proxy or multiple lines
-                        text = r.text.strip()
-                        for line in text.splitlines():
-                            line = line.strip()
-                            if ':' in line and len(line) > 6:
-                                out.append(line)
-                except Exception:
-                    continue
-        # deduplicate and prefix http if missing
-        cleaned = []
-        for p in out:
-            p = p.strip()
-            if p.startswith('http'):
-                cleaned.append(p)
-            else:
-                cleaned.append('http://' + p)
-        # unique preserve order
-        seen = set()
-        res = []
-        for p in cleaned:
-            if p not in seen:
-                seen.add(p)
-                res.append(p)
-        return res
-
-    def _map_label(self, score):
-        try:
-            v = float(score)
-        except Exception:
-            v = 0.0
-        if v >= 8.5:
-            return '夯', 10.0
-        if v >= 7.0:
-            return '顶级', 8.0
-        if v >= 5.5:
-            return '人上人', 6.0
-        if v >= 3.5:
-            return 'NPC', 4.0
-        return '拉完了', 2.0
-
-    def _get_weight_preset(self, preset_key: str):
-        base = DEFAULT_WEIGHT_PRESETS.get(preset_key, DEFAULT_WEIGHT_PRESETS['normal'])
-        custom = self.weight_configs.get(preset_key) if isinstance(self.weight_configs, dict) else None
-        out = base.copy()
-        if isinstance(custom, dict):
-            for metric, _ in WEIGHT_METRICS:
-                try:
-                    val = float(custom.get(metric, out.get(metric, 0.0)))
-                except Exception:
-                    val = out.get(metric, 0.0)
-                out[metric] = max(0.0, val)
-        total = sum(out.values()) or 1.0
-        for k in out:
-            out[k] = out[k] / total
-        return out
-
-    def _apply_weight_config(self, cfg):
-        sanitized = copy.deepcopy(DEFAULT_WEIGHT_PRESETS)
-        if isinstance(cfg, dict):
-            for preset, defaults in DEFAULT_WEIGHT_PRESETS.items():
-                incoming = cfg.get(preset)
-                if not isinstance(incoming, dict):
-                    continue
-                for metric, _ in WEIGHT_METRICS:
-                    try:
-                        val = float(incoming.get(metric, defaults[metric]))
-                    except Exception:
-                        val = defaults[metric]
-                    sanitized[preset][metric] = max(0.0, val)
-        # ensure normalization
-        for preset in sanitized:
-            total = sum(sanitized[preset].values()) or 1.0
-            for metric in sanitized[preset]:
-                sanitized[preset][metric] = sanitized[preset][metric] / total
-        self.weight_configs = sanitized
-
-    def _norm_value(self, val, mn, mx):
-        try:
-            v = float(val)
-        except Exception:
-            v = 0.0
-        if mx == mn:
-            return 5.0
-        return ((v - mn) / (mx - mn)) * 10.0
-
     def _get_search_order_key(self):
         label = (self.search_order_mode.get() or "").strip()
         for key, text in SEARCH_ORDER_LABELS.items():
@@ -589,145 +492,18 @@ class App:
         label = SEARCH_ORDER_LABELS.get(key, SEARCH_ORDER_LABELS["time"])
         self.search_order_mode.set(label)
 
-    def _prepare_weighted_metrics(self, lst):
-        if not lst:
-            return
-        counts_list = [(x.get('total_videos') or len(x.get('videos_list') or [])) for x in lst]
-        views_list = [(x.get('views') or 0) for x in lst]
-        likes_list = [(x.get('likes') or 0) for x in lst]
-        favorites_list = [(x.get('favorites') or 0) for x in lst]
-        desc_len_list = [(x.get('desc_len') or 0) for x in lst]
-
-        cmin, cmax = (min(counts_list), max(counts_list)) if counts_list else (0, 0)
-        vmin, vmax = (min(views_list), max(views_list)) if views_list else (0, 0)
-        lmin, lmax = (min(likes_list), max(likes_list)) if likes_list else (0, 0)
-        fmin, fmax = (min(favorites_list), max(favorites_list)) if favorites_list else (0, 0)
-        dmin, dmax = (min(desc_len_list), max(desc_len_list)) if desc_len_list else (0, 0)
-
-        for r in lst:
-            counts_val = (r.get('total_videos') or len(r.get('videos_list') or []))
-            views_val = r.get('views') or 0
-            likes_val = r.get('likes') or 0
-            favorites_val = r.get('favorites') or 0
-            desc_len_val = r.get('desc_len') or 0
-
-            counts_n = self._norm_value(counts_val, cmin, cmax)
-            views_n = self._norm_value(views_val, vmin, vmax)
-            likes_n = self._norm_value(likes_val, lmin, lmax)
-            favorites_n = self._norm_value(favorites_val, fmin, fmax)
-            desc_len_n = self._norm_value(desc_len_val, dmin, dmax)
-
-            has_jm = False
-            has_top1 = False
-            for vv in (r.get('videos_list') or []):
-                try:
-                    t = (vv.get('title') or '')
-                    if '寂灭' in t:
-                        has_jm = True
-                    if '榜一' in t:
-                        has_top1 = True
-                except Exception:
-                    continue
-
-            if has_top1:
-                weights = self._get_weight_preset('top1')
-                rule_label = '含榜一'
-            elif has_jm:
-                weights = self._get_weight_preset('jm')
-                rule_label = '含寂灭'
-            else:
-                weights = self._get_weight_preset('normal')
-                rule_label = '常规'
-            w_counts = weights.get('counts', 0.3)
-            w_views = weights.get('views', 0.3)
-            w_desc = weights.get('desc', 0.1)
-            w_fav = weights.get('favorites', 0.15)
-            w_likes = weights.get('likes', 0.15)
-
-            composite = (
-                counts_n * w_counts
-                + views_n * w_views
-                + desc_len_n * w_desc
-                + favorites_n * w_fav
-                + likes_n * w_likes
-            )
-
-            r['weighted_score'] = composite
-            r['_local_metrics'] = {
-                "counts_val": counts_val,
-                "views_val": views_val,
-                "likes_val": likes_val,
-                "favorites_val": favorites_val,
-                "desc_len_val": desc_len_val,
-                "counts_n": counts_n,
-                "views_n": views_n,
-                "likes_n": likes_n,
-                "favorites_n": favorites_n,
-                "desc_len_n": desc_len_n,
-                "rule_label": rule_label,
-            }
-
-    def _normalize_scores(self, lst):
-        vals = [x.get('weighted_score', x.get('score', 0)) for x in lst]
-        if not vals:
-            return {}
-        mn = min(vals)
-        mx = max(vals)
-        if mx == mn:
-            return {x['mid']: 5.0 for x in lst}
-        out = {}
-        for x in lst:
-            base_val = x.get('weighted_score', x.get('score', 0))
-            out[x['mid']] = self._norm_value(base_val, mn, mx)
-        return out
-
-    def _apply_local_summaries(self, lst, log_output=True):
-        for r in lst:
-            composite = r.get('weighted_score', 5.0)
-            metrics = r.get('_local_metrics') or {}
-            label, val = self._map_label(composite)
-            counts_val = metrics.get('counts_val', r.get('total_videos') or 0)
-            views_val = metrics.get('views_val', r.get('views') or 0)
-            likes_val = metrics.get('likes_val', r.get('likes') or 0)
-            favorites_val = metrics.get('favorites_val', r.get('favorites') or 0)
-            desc_len_val = metrics.get('desc_len_val', r.get('desc_len') or 0)
-            counts_n = metrics.get('counts_n', 5.0)
-            views_n = metrics.get('views_n', 5.0)
-            likes_n = metrics.get('likes_n', 5.0)
-            favorites_n = metrics.get('favorites_n', 5.0)
-            desc_len_n = metrics.get('desc_len_n', 5.0)
-            rule_label = metrics.get('rule_label', '常规')
-
-            r['llm_score'] = val
-            r['llm_summary'] = (
-                f"本地评级({rule_label}): {label} (评分={composite:.2f}); "
-                f"counts={counts_val}({counts_n:.2f}), views={views_val}({views_n:.2f}), "
-                f"desc_len={desc_len_val}({desc_len_n:.2f}), favorites={favorites_val}({favorites_n:.2f}), "
-                f"likes={likes_val}({likes_n:.2f})"
-            )
-            if log_output:
-                try:
-                    self.log(
-                        f"本地加权评级 - {r.get('name')} ({r.get('mid')}): {label}, score={composite:.2f}, "
-                        f"counts={counts_val}, views={views_val}, desc_len={desc_len_val}, "
-                        f"favorites={favorites_val}, likes={likes_val}, rule={rule_label}"
-                    )
-                except Exception:
-                    pass
-            r['final_score'] = composite
-            r['score'] = round(composite, 3)
-
     def on_outlier_toggle(self):
         """Callback when user toggles the outlier exclusion option."""
-        self._rebuild_filtered_results()
-        sel = self.leaderboard_var.get()
-        fallback = self.results_by_category_raw.get(sel, [])
-        self.results = self.results_by_category.get(sel, fallback)
-        self._update_table()
-        try:
-            self.log(f"{'已启用' if self.exclude_outliers.get() else '已关闭'}异常数据排除开关")
-        except Exception:
-            pass
+        if not self.engine.results_by_category_raw:
+            self._sync_engine()
+            return
+        # 与阈值输入框一样走后台重算；取消尚未触发的阈值防抖任务
+        if self._sigma_after_id is not None:
+            try:
+                self.root.after_cancel(self._sigma_after_id)
+            except Exception:
+                pass
+        self._start_filter_recompute()
 
     def on_outlier_sigma_change(self):
         if getattr(self, "_suppress_sigma_callback", False):
@@ -741,150 +517,117 @@ class App:
             self._suppress_sigma_callback = True
             self.outlier_sigma.set(round(val, 2))
             self._suppress_sigma_callback = False
-        if not self.results_by_category_raw:
+        if not self.engine.results_by_category_raw:
             return
-        self._rebuild_filtered_results()
-        sel = self.leaderboard_var.get()
-        fallback = self.results_by_category_raw.get(sel, [])
-        self.results = self.results_by_category.get(sel, fallback)
-        self._update_table()
-        try:
-            self.log(f"异常数据阈值系数已更新为 {val:.2f}")
-        except Exception:
-            pass
-
-    def _rebuild_filtered_results(self):
-        """Rebuild filtered results based on current outlier exclusion setting."""
-        base = getattr(self, "results_by_category_raw", {}) or {}
-        filtered = {}
-        llm_enabled = bool(getattr(self, "_llm_used_last", False))
-        llm_weight = max(0.0, min(1.0, float(self.llm_weight.get())))
-        for name, lst in base.items():
-            if not lst:
-                filtered[name] = []
-                continue
-            working_src = self._filter_outliers(lst) if self.exclude_outliers.get() else lst
-            working = copy.deepcopy(working_src)
-            self._prepare_weighted_metrics(working)
-            if not llm_enabled:
-                self._apply_local_summaries(working, log_output=False)
-                filtered[name] = working
-                continue
-
-            lst_norm = self._normalize_scores(working)
-            for r in working:
-                mid = r.get('mid')
-                base_norm = lst_norm.get(mid, r.get('weighted_score', 5.0))
-                llm_score = r.get('llm_score')
-                if llm_score is None:
-                    final = base_norm
-                else:
-                    final = (1.0 - llm_weight) * base_norm + llm_weight * llm_score
-                r['final_score'] = final
-                r['score'] = round(final, 3)
-            filtered[name] = working
-        self.results_by_category = filtered
-
-    def _filter_outliers(self, records):
-        """Remove records whose metrics deviate abnormally from the group."""
-        if not records or len(records) < 3:
-            return records
-        metrics = ["total_videos", "views", "favorites", "likes", "desc_len"]
-        thresholds = {}
-        try:
-            sigma = float(self.outlier_sigma.get())
-        except Exception:
-            sigma = 2.5
-        sigma = max(0.5, min(10.0, sigma))
-        for metric in metrics:
-            vals = []
-            for r in records:
-                try:
-                    val = float(r.get(metric) or 0)
-                except Exception:
-                    val = 0.0
-                vals.append(val)
-            if len(vals) < 5:
-                continue
-            mean_val = sum(vals) / len(vals)
-            std_val = statistics.pstdev(vals)
-            if std_val == 0:
-                continue
-            thresholds[metric] = mean_val + std_val * sigma
-        if not thresholds:
-            return records
-        filtered = []
-        removed = []
-        for r in records:
-            flagged = False
-            for metric, limit in thresholds.items():
-                try:
-                    value = float(r.get(metric) or 0)
-                except Exception:
-                    value = 0.0
-                if value > limit:
-                    flagged = True
-                    break
-            if flagged:
-                removed.append(r)
-            else:
-                filtered.append(r)
-        if removed:
+        # 输入框每敲一个字符都会触发；合并成停顿后的一次后台重算
+        if self._sigma_after_id is not None:
             try:
-                sample_names = ", ".join((x.get("name") or "未知") for x in removed[:3])
-                extra = "" if len(removed) <= 3 else f"...(+{len(removed)-3})"
-                self.log(f"排除 {len(removed)} 个疑似异常UP: {sample_names}{extra}")
+                self.root.after_cancel(self._sigma_after_id)
             except Exception:
                 pass
-        return filtered or records
+        self._sigma_after_id = self.root.after(SIGMA_DEBOUNCE_MS, self._start_filter_recompute)
+
+    def _start_filter_recompute(self):
+        """Recompute the filtered leaderboards on a worker thread (Tk thread only).
+
+        Only one worker runs at a time; a change arriving mid-run marks a follow-up,
+        and results from a superseded generation are dropped instead of shown.
+        """
+        self._sigma_after_id = None
+        self._filter_gen += 1
+        if self._filter_busy:
+            self._filter_pending = True
+            return
+        self._sync_engine()
+        gen = self._filter_gen
+        raw = self.engine.results_by_category_raw
+        exclude = self.engine.exclude_outliers
+        sigma = self.engine.outlier_sigma
+        self._filter_busy = True
+        self._filter_pending = False
+
+        def worker():
+            try:
+                filtered = self.engine.compute_filtered_results(exclude, sigma)
+                error = None
+            except Exception as e:
+                filtered, error = None, e
+            self.root.after(0, lambda: self._finish_filter_recompute(gen, raw, exclude, sigma, filtered, error))
 
-    def _refresh_results_with_new_weights(self, silent=False, update_ui=True):
-        if not self.results_by_category_raw:
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _finish_filter_recompute(self, gen, raw, exclude, sigma, filtered, error):
+        self._filter_busy = False
+        if self._filter_pending:
+            self._start_filter_recompute()
+            return
+        # 期间重新采集、改了权重/黑名单或同步重算过，结果已过时
+        if gen != self._filter_gen:
+            return
+        if error is not None:
+            self.log(f"重算异常数据过滤失败: {error}")
             return
+        current = self.engine.results_by_category_raw
+        if raw is not current:
+            # 期间有 LLM 评价到达：apply_llm_updates 已按同一阈值重建了那几个榜单，
+            # 其余榜单的原始行没变，沿用后台结果
+            merged = dict(self.engine.results_by_category)
+            merged.update((name, rows) for name, rows in filtered.items() if raw.get(name) is current.get(name))
+            filtered = merged
+        self.engine.results_by_category = filtered
+        self._apply_results_to_ui()
         try:
-            for lst in self.results_by_category_raw.values():
-                self._prepare_weighted_metrics(lst)
-            if not self._llm_used_last:
-                for lst in self.results_by_category_raw.values():
-                    self._apply_local_summaries(lst, log_output=not silent)
+            if exclude:
+                self.log(f"已启用异常数据排除，阈值系数 {float(sigma):.2f}")
             else:
-                llm_weight = max(0.0, min(1.0, float(self.llm_weight.get())))
-                for lst in self.results_by_category_raw.values():
-                    norms = self._normalize_scores(lst)
-                    for r in lst:
-                        base_norm = norms.get(r.get('mid'), r.get('weighted_score', 5.0))
-                        llm_score = r.get('llm_score')
-                        if llm_score is None:
-                            final = base_norm
-                        else:
-                            final = (1.0 - llm_weight) * base_norm + llm_weight * llm_score
-                        r['final_score'] = final
-                        r['score'] = round(final, 3)
-            self._rebuild_filtered_results()
-            if update_ui:
-                try:
-                    current_category = self.leaderboard_var.get()
-                except Exception:
-                    current_category = "总榜"
-                fallback = self.results_by_category_raw.get(current_category, [])
-                self.results = self.results_by_category.get(current_category, fallback) or fallback
-                try:
-                    self._update_table()
-                except Exception:
-                    pass
-        except Exception as e:
+                self.log("已关闭异常数据排除开关")
+        except Exception:
+            pass
+
+    def _refresh_results_with_new_weights(self, silent=False, update_ui=True):
+        if not self.engine.results_by_category_raw:
+            return
+        self._sync_engine()
+        # 权重原地改写原始榜单，仍在后台按旧权重进行的阈值重算必须作废
+        self._filter_gen += 1
+        self.engine.refresh_results_with_new_weights(silent=silent)
+        if update_ui:
             try:
-                self.log(f"重算权重时出错: {e}")
+                self._apply_results_to_ui()
             except Exception:
                 pass
 
+    def _on_partial_results(self, boards):
+        """Called from the scan thread with a provisional leaderboard while crawling."""
+        self.root.after(0, lambda: self._show_partial_results(boards))
+
+    def _on_llm_update(self):
+        """Called from LLM worker threads when new verdicts are queued; merges them on the Tk thread."""
+        if self._llm_apply_scheduled:
+            return
+        self._llm_apply_scheduled = True
+        self.root.after(LLM_APPLY_MS, self._apply_llm_updates)
+
+    def _apply_llm_updates(self):
+        self._llm_apply_scheduled = False
+        if self.engine.apply_llm_updates():
+            self._apply_results_to_ui()
+
+    def _show_partial_results(self, boards):
+        # scheduled before _scan_worker schedules the final results, so never overwrites them
+        try:
+            current_category = self.leaderboard_var.get()
+        except Exception:
+            current_category = "总榜"
+        self.results = boards.get(current_category) or []
+        self._update_table()
+
     def _apply_results_to_ui(self):
         try:
             current_category = self.leaderboard_var.get()
         except Exception:
             current_category = "总榜"
-        fallback = self.results_by_category_raw.get(current_category, [])
-        self.results = self.results_by_category.get(current_category, fallback) or fallback
+        self.results = self.engine.get_results(current_category)
         self._update_table()
 
     def _close_weight_window(self):
@@ -959,547 +702,100 @@ class App:
             pass
 
     def _refresh_results_with_blacklist(self, update_ui=True):
-        base = getattr(self, "_results_unfiltered", {})
-        if not base:
+        if not self.engine.results_unfiltered:
             return
-        ban = { (x or "").strip().lower() for x in self.banned_upnames if (x or "").strip() }
-        filtered_raw = {}
-        for name, lst in base.items():
-            source = lst or []
-            cleaned = []
-            removed = []
-            for r in source:
-                uname = (r.get('name') or '').strip()
-                if ban and uname.lower() in ban:
-                    removed.append(uname)
-                    continue
-                cleaned.append(copy.deepcopy(r))
-            filtered_raw[name] = cleaned
-            if removed:
-                try:
-                    sample = ", ".join(removed[:3])
-                    extra = "" if len(removed) <= 3 else f"...(+{len(removed)-3})"
-                    self.log(f"{name}: 黑名单排除 {len(removed)} 个UP: {sample}{extra}")
-                except Exception:
-                    pass
-        self.results_by_category_raw = filtered_raw
-        self._refresh_results_with_new_weights(silent=not update_ui, update_ui=update_ui)
+        self._sync_engine()
+        self._filter_gen += 1
+        self.engine.refresh_results_with_blacklist(silent=not update_ui)
+        if update_ui:
+            try:
+                self._apply_results_to_ui()
+            except Exception:
+                pass
 
     def _scan_worker(self):
-        search_mode = self.search_mode_var.get()
-        if search_mode == "up_first":
-            self._scan_worker_mode2()
-        else:
-            self._scan_worker_mode1()
-
-    def _scan_worker_mode1(self):
-        """模式1: 按关键词搜索"""
         keywords = [k.strip() for k in self.kv.get().split(',') if k.strip()]
-        start_ts = None
-        end_ts = None
+        start_ts, end_ts = parse_date_range(self.start.get(), self.end.get())
+        done = None
         try:
-            start_ts = int(datetime.fromisoformat(self.start.get()).timestamp())
-            end_ts = int(datetime.fromisoformat(self.end.get()).timestamp())
-        except Exception:
-            pass
-
-        pages = int(self.pages.get())
-        collected = []
-        total = max(1, len(keywords) * pages)
-        cnt = 0
-        
-        # 使用线程池并发处理关键词检索
-        crawl_workers = max(1, min(8, int(self.crawl_threads.get())))
-        
-        def fetch_keyword_page(kw, p):
-            """获取单个关键词的单个页面"""
-            if self._stop_event.is_set():
-                return []
-            try:
-                items = collect_by_keyword(kw, pages=1)
-                self.log(f"已检索关键词 '{kw}' 第 {p} 页，返回 {len(items)} 条结果")
-                if not items:
-                    try:
-                        last = get_last_response()
-                        if isinstance(last, dict) and last.get('status_code') == 412:
-                            self.log("检测到 B站 安全拦截 (412)，当前 IP/请求被封。建议：使用有效的 B站 Cookie、代理或通过浏览器登录并抓取。")
-                            self.log("已停止采集以避免进一步封禁。若要继续，请配置 Cookie 或代理后重新开始。")
-                            self._stop_event.set()
-                            return []
-                    except Exception:
-                        pass
-                return items
-            except Exception as e:
-                self.log(f"关键词 '{kw}' 第 {p} 页检索出错: {e}")
-                return []
-        
-        # 创建所有任务
-        tasks = []
-        for kw in keywords:
-            for p in range(1, pages + 1):
-                tasks.append((kw, p))
-        
-        # 使用线程池并发执行
-        collected_lock = threading.Lock()
-        with concurrent.futures.ThreadPoolExecutor(max_workers=crawl_workers) as executor:
-            future_to_task = {executor.submit(fetch_keyword_page, kw, p): (kw, p) for kw, p in tasks}
-            for future in concurrent.futures.as_completed(future_to_task):
-                if self._stop_event.is_set():
-                    break
-                kw, p = future_to_task[future]
-                try:
-                    items = future.result()
-                    with collected_lock:
-                        for it in items:
-                            pub = it.get('pubdate')
-                            if pub and start_ts and end_ts:
-                                try:
-                                    if not (start_ts <= int(pub) <= end_ts):
-                                        continue
-                                except Exception:
-                                    pass
-                            collected.append(it)
-                        cnt += 1
-                        try:
-                            self.root.after(0, lambda v=(cnt / total) * 100: self.progress.configure(value=v))
-                        except Exception:
-                            pass
-                except Exception as e:
-                    self.log(f"处理关键词 '{kw}' 第 {p} 页结果时出错: {e}")
-                    cnt += 1
-                    try:
-                        self.root.after(0, lambda v=(cnt / total) * 100: self.progress.configure(value=v))
-                    except Exception:
-                        pass
-        
-        self._process_collected_results(collected, start_ts, end_ts)
-
-    def _scan_worker_mode2(self):
-        """模式2: 先搜索崩坏3获取所有UP主，再按关键词搜索每个UP主的视频"""
-        keywords = [k.strip() for k in self.kv.get().split(',') if k.strip()]
-        start_ts = None
-        end_ts = None
-        try:
-            start_ts = int(datetime.fromisoformat(self.start.get()).timestamp())
-            end_ts = int(datetime.fromisoformat(self.end.get()).timestamp())
-        except Exception:
-            pass
-
-        pages = int(self.pages.get())
-        collected = []
-        
-        # 第一步：搜索"崩坏3"获取所有相关UP主
-        self.log("模式2: 开始搜索'崩坏3'以获取所有相关UP主...")
-        up_mids = set()
-        crawl_workers = max(1, min(8, int(self.crawl_threads.get())))
-        
-        # 搜索"崩坏3"获取UP主列表
-        def fetch_bh3_page(p):
-            """获取崩坏3搜索结果的单个页面"""
-            if self._stop_event.is_set():
-                return []
-            try:
-                items = collect_by_keyword("崩坏3", pages=1)
-                self.log(f"已检索'崩坏3' 第 {p} 页，返回 {len(items)} 条结果")
-                if not items:
-                    try:
-                        last = get_last_response()
-                        if isinstance(last, dict) and last.get('status_code') == 412:
-                            self.log("检测到 B站 安全拦截 (412)，当前 IP/请求被封。建议：使用有效的 B站 Cookie、代理或通过浏览器登录并抓取。")
-                            self.log("已停止采集以避免进一步封禁。若要继续，请配置 Cookie 或代理后重新开始。")
-                            self._stop_event.set()
-                            return []
-                    except Exception:
-                        pass
-                return items
-            except Exception as e:
-                self.log(f"'崩坏3' 第 {p} 页检索出错: {e}")
-                return []
-        
-        # 获取所有UP主
-        bh3_items = []
-        with concurrent.futures.ThreadPoolExecutor(max_workers=crawl_workers) as executor:
-            futures = [executor.submit(fetch_bh3_page, p) for p in range(1, pages + 1)]
-            for future in concurrent.futures.as_completed(futures):
-                if self._stop_event.is_set():
-                    break
-                try:
-                    items = future.result()
-                    bh3_items.extend(items)
-                except Exception as e:
-                    self.log(f"处理'崩坏3'搜索结果时出错: {e}")
-        
-        # 从搜索结果中提取所有UP主的mid
-        for it in bh3_items:
-            owner = it.get('owner') or {}
-            mid = owner.get('mid')
-            if mid:
-                up_mids.add(mid)
-        
-        self.log(f"模式2: 从'崩坏3'搜索结果中提取到 {len(up_mids)} 个UP主")
-        
-        if not up_mids:
-            self.log("模式2: 未找到任何UP主，停止采集")
-            self.root.after(0, lambda: self.start_btn.config(state=tk.NORMAL))
-            self.root.after(0, lambda: self.export_btn.config(state=tk.DISABLED))
-            self.root.after(0, lambda: self.stop_btn.config(state=tk.DISABLED))
-            return
-        
-        # 第二步：对每个UP主，获取其所有视频，然后根据关键词过滤统计
-        self.log(f"模式2: 开始获取 {len(up_mids)} 个UP主的所有视频，然后根据关键词过滤统计...")
-        total_tasks = len(up_mids)
-        cnt = 0
-        
-        def fetch_all_up_videos(up_mid):
-            """获取指定UP主的所有视频"""
-            if self._stop_event.is_set():
-                return []
-            try:
-                owner_name = "未知"
-                all_videos = collect_all_videos_by_up(up_mid)
-                if all_videos:
-                    owner = all_videos[0].get('owner') or {}
-                    owner_name = owner.get('name') or owner.get('uname') or str(up_mid)
-                self.log(f"已获取UP主 '{owner_name}' (mid:{up_mid}) 的所有视频，共 {len(all_videos)} 条")
-                if not all_videos:
-                    try:
-                        last = get_last_response()
-                        if isinstance(last, dict) and last.get('status_code') == 412:
-                            self.log("检测到 B站 安全拦截 (412)，当前 IP/请求被封。建议：使用有效的 B站 Cookie、代理或通过浏览器登录并抓取。")
-                            self.log("已停止采集以避免进一步封禁。若要继续，请配置 Cookie 或代理后重新开始。")
-                            self._stop_event.set()
-                            return []
-                    except Exception:
-                        pass
-                return all_videos
-            except Exception as e:
-                self.log(f"获取UP主 {up_mid} 的所有视频时出错: {e}")
-                return []
-        
-        # 使用线程池并发获取所有UP主的视频
-        up_videos_map = {}  # up_mid -> list of videos
-        collected_lock = threading.Lock()
-        with concurrent.futures.ThreadPoolExecutor(max_workers=crawl_workers) as executor:
-            future_to_mid = {executor.submit(fetch_all_up_videos, up_mid): up_mid for up_mid in up_mids}
-            for future in concurrent.futures.as_completed(future_to_mid):
-                if self._stop_event.is_set():
-                    break
-                up_mid = future_to_mid[future]
-                try:
-                    videos = future.result()
-                    with collected_lock:
-                        up_videos_map[up_mid] = videos
-                        cnt += 1
-                        try:
-                            self.root.after(0, lambda v=(cnt / total_tasks) * 100: self.progress.configure(value=v))
-                        except Exception:
-                            pass
-                except Exception as e:
-                    self.log(f"处理UP主 {up_mid} 的视频时出错: {e}")
-                    cnt += 1
-                    try:
-                        self.root.after(0, lambda v=(cnt / total_tasks) * 100: self.progress.configure(value=v))
-                    except Exception:
-                        pass
-        
-        # 第三步：根据关键词过滤每个UP主的视频
-        self.log(f"模式2: 开始根据关键词过滤视频...")
-        for up_mid, videos in up_videos_map.items():
-            if self._stop_event.is_set():
-                break
-            # 对每个视频，检查是否匹配任何关键词
-            for video in videos:
-                title = (video.get('title') or '').lower()
-                desc = (video.get('desc') or video.get('description') or '').lower()
-                # 检查视频标题或描述是否包含任何关键词
-                matched_keyword = None
-                for kw in keywords:
-                    kw_lower = kw.lower()
-                    if kw_lower in title or kw_lower in desc:
-                        matched_keyword = kw
-                        break
-                
-                # 如果匹配关键词，添加到收集列表
-                if matched_keyword:
-                    # 设置匹配的关键词
-                    video['keyword'] = matched_keyword
-                    # 日期过滤
-                    pub = video.get('pubdate')
-                    if pub and start_ts and end_ts:
-                        try:
-                            if not (start_ts <= int(pub) <= end_ts):
-                                continue
-                        except Exception:
-                            pass
-                    collected.append(video)
-        
-        self.log(f"模式2: 关键词过滤完成，共收集 {len(collected)} 条匹配的视频")
-        
-        self._process_collected_results(collected, start_ts, end_ts)
-
-    def _process_collected_results(self, collected, start_ts, end_ts):
-        """处理收集到的结果，进行聚合、评分和LLM分析"""
-        # aggregate by owner with per-category stats
-        by_owner = {}
-        for it in collected:
-            owner = it.get('owner') or {}
-            mid = owner.get('mid') or owner.get('mid')
-            if not mid:
-                continue
-            entry = by_owner.setdefault(
-                mid,
-                {
-                    "name": owner.get('name') or owner.get('uname') or str(mid),
-                    "mid": mid,
-                    "videos": [],
-                    "views_total": 0,
-                    "likes_total": 0,
-                    "favorites_total": 0,
-                    "desc_len_total": 0,
-                    "by": {
-                        "abyss": {"count": 0, "views": 0, "likes": 0, "favorites": 0, "desc_len": 0, "videos": []},
-                        "battle": {"count": 0, "views": 0, "likes": 0, "favorites": 0, "desc_len": 0, "videos": []},
-                        "other": {"count": 0, "views": 0, "likes": 0, "favorites": 0, "desc_len": 0, "videos": []},
-                    },
-                },
+            done = self.engine.run(
+                keywords=keywords,
+                pages=int(self.pages.get()),
+                start_ts=start_ts,
+                end_ts=end_ts,
+                search_mode=self.search_mode_var.get(),
             )
-            stat = it.get('stat') or {}
-            views = int(stat.get('view', 0) or 0)
-            likes = int(stat.get('like', 0) or stat.get('like') or 0)
-            favorites = int(stat.get('favorite') or stat.get('favorites') or stat.get('favorite_count') or stat.get('collect') or 0)
-            title = (it.get('title') or '')
-            kw = (it.get('keyword') or '')
-            desc_text = (it.get('desc') or it.get('description') or "")
-            desc_len = len(desc_text.strip())
-            cat = 'other'
-            if '深渊' in kw or '深渊' in title:
-                cat = 'abyss'
-            elif '记忆战场' in kw or '记忆战场' in title or '战场' in kw or '战场' in title:
-                cat = 'battle'
-            entry['videos'].append({
-                "bvid": it.get('bvid'),
-                'title': title,
-                'views': views,
-                'likes': likes,
-                'favorites': favorites,
-                'desc_len': desc_len,
-                'pubdate': it.get('pubdate'),
-                'cat': cat,
-            })
-            entry['views_total'] += views
-            entry['likes_total'] += likes
-            entry['favorites_total'] += favorites
-            entry['desc_len_total'] += desc_len
-            entry['by'][cat]['count'] += 1
-            entry['by'][cat]['views'] += views
-            entry['by'][cat]['likes'] += likes
-            entry['by'][cat]['favorites'] += favorites
-            entry['by'][cat]['desc_len'] += desc_len
-            entry['by'][cat]['videos'].append({"bvid": it.get('bvid'), 'title': title, 'views': views, 'likes': likes, 'favorites': favorites, 'desc_len': desc_len, 'pubdate': it.get('pubdate')})
-
-        # scoring: create three leaderboards
-        overall = []
-        abyss = []
-        battle = []
-        def build_entry(mid, name, stats, videos_subset):
-            return {
-                'mid': mid,
-                'name': name,
-                'total_videos': stats.get('count', 0),
-                'views': stats.get('views', 0),
-                'likes': stats.get('likes', 0),
-                'favorites': stats.get('favorites', 0),
-                'desc_len': stats.get('desc_len', 0),
-                'videos_list': videos_subset or [],
-                'score': 0.0,
-            }
-
-        for mid, v in by_owner.items():
-            overall_stats = {
-                'count': len(v['videos']),
-                'views': v['views_total'],
-                'likes': v['likes_total'],
-                'favorites': v.get('favorites_total', 0),
-                'desc_len': v.get('desc_len_total', 0),
-            }
-            abyss_stats = v['by']['abyss']
-            battle_stats = v['by']['battle']
-
-            overall.append(build_entry(mid, v['name'], overall_stats, v['videos']))
-            abyss.append(build_entry(mid, v['name'], abyss_stats, abyss_stats.get('videos') or []))
-            battle.append(build_entry(mid, v['name'], battle_stats, battle_stats.get('videos') or []))
-
-        overall.sort(key=lambda x: x['score'], reverse=True)
-        abyss.sort(key=lambda x: x['score'], reverse=True)
-        battle.sort(key=lambda x: x['score'], reverse=True)
-
-        self._prepare_weighted_metrics(overall)
-        self._prepare_weighted_metrics(abyss)
-        self._prepare_weighted_metrics(battle)
-
-        # optional LLM analysis for top N (use configured LLM settings)
-        provider = self.provider.get()
-        api_key = self.api_key.get().strip()
-        api_url = self.api_url.get().strip() or None
-        llm = None
-        if self.use_llm.get() and provider != 'none':
-            llm = LLMClient(provider=provider, endpoint=api_url, api_key=api_key, model=self.llm_model.get())
-
-        overall_norm = self._normalize_scores(overall)
-        abyss_norm = self._normalize_scores(abyss)
-        battle_norm = self._normalize_scores(battle)
-
-        # combine with LLM if available
-        llm_weight = max(0.0, min(1.0, float(self.llm_weight.get())))
-        def enrich_with_llm_and_combine(lst, lst_norm):
-            for r in lst[:50]:
-                r['llm_score'] = None
-                r['llm_summary'] = ''
-            if not llm:
-                self._apply_local_summaries(lst)
-                return
-
-            # perform LLM analysis in parallel for top N (configurable via self.llm_threads)
-            top_n = min(50, len(lst))
-            tops = lst[:top_n]
-
-            def _call_llm_safe(uinfo, rref):
-                try:
-                    return llm.analyze_uploader(uinfo, top_videos=rref.get('videos_list')[:3])
-                except Exception as e:
-                    try:
-                        self.log(f"LLM 分析 {rref.get('name')} 出错: {e}")
-                        self.log(traceback.format_exc())
-                    except Exception:
-                        pass
-                    return {"score": None, "summary": f"LLM error: {e}"}
-
-            max_workers = 4
-            try:
-                max_workers = max(1, min(10, int(self.llm_threads.get())))
-            except Exception:
-                max_workers = 4
-
-            future_to_mid = {}
-            results_map = {}
-            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as ex:
-                for r in tops:
-                    info = {"name": r['name'], 'mid': r['mid'], 'videos': r.get('total_videos'), 'views': r.get('views'), 'likes': r.get('likes'), 'top_videos': r.get('videos_list')[:3]}
-                    fut = ex.submit(_call_llm_safe, info, r)
-                    future_to_mid[fut] = r['mid']
-                for fut in concurrent.futures.as_completed(future_to_mid):
-                    mid = future_to_mid[fut]
-                    try:
-                        out = fut.result()
-                    except Exception as e:
-                        out = {"score": None, "summary": f"LLM error: {e}"}
-                    results_map[mid] = out
-
-            # apply results to corresponding entries
-            for r in tops:
-                out = results_map.get(r['mid']) or {"score": None, "summary": ""}
-                llm_score = out.get('score') if isinstance(out, dict) else None
-                try:
-                    llm_score = float(llm_score)
-                except Exception:
-                    llm_score = None
-                if llm_score is None:
-                    llm_score = 5.0
-                llm_score = max(1.0, min(10.0, llm_score))
-                r['llm_score'] = llm_score
-                r['llm_summary'] = out.get('summary', '') if isinstance(out, dict) else str(out)
-                # write LLM output to app log (truncate to avoid flooding)
-                try:
-                    summary_text = r['llm_summary'] or ''
-                    short = (summary_text[:400] + '...') if len(summary_text) > 400 else summary_text
-                    self.log(f"LLM 分析 - {r.get('name')} ({r.get('mid')}): score={llm_score}, summary={short}")
-                except Exception:
-                    pass
-                # also log raw model output if available (truncated)
-                try:
-                    raw_text = ''
-                    if isinstance(out, dict):
-                        raw_text = out.get('raw') or out.get('_raw') or ''
-                    else:
-                        raw_text = str(out)
-                    if raw_text:
-                        short_raw = (raw_text[:1000] + '...') if len(raw_text) > 1000 else raw_text
-                        self.log(f"LLM 原始输出 - {r.get('name')} ({r.get('mid')}): {short_raw}")
-                except Exception:
-                    pass
-
-            for r in lst:
-                base = lst_norm.get(r['mid'], 0.0)
-                llm_s = r.get('llm_score')
-                if llm_s is None:
-                    final = base
-                else:
-                    final = (1.0 - llm_weight) * base + llm_weight * (llm_s)
-                r['final_score'] = final
-
-        enrich_with_llm_and_combine(overall, overall_norm)
-        enrich_with_llm_and_combine(abyss, abyss_norm)
-        enrich_with_llm_and_combine(battle, battle_norm)
-
-        def sort_by_final(lst):
-            lst.sort(key=lambda x: x.get('final_score', x.get('score', 0)), reverse=True)
-
-        sort_by_final(overall)
-        sort_by_final(abyss)
-        sort_by_final(battle)
-
-        for lst in (overall, abyss, battle):
-            for r in lst:
-                r['score'] = round(r.get('final_score', r.get('score', 0)), 3)
-
-        self._llm_used_last = bool(llm)
-        self._results_unfiltered = {
-            "总榜": copy.deepcopy(overall),
-            "深渊榜": copy.deepcopy(abyss),
-            "战场榜": copy.deepcopy(battle),
-        }
-        self._refresh_results_with_blacklist(update_ui=False)
-        self.root.after(0, self._apply_results_to_ui)
+        except Exception as e:
+            self.log(f"采集出错: {e}")
+            self.log(traceback.format_exc())
+        if done is not None:
+            self.root.after(0, self._apply_results_to_ui)
         self.root.after(0, lambda: self.start_btn.config(state=tk.NORMAL))
-        self.root.after(0, lambda: self.export_btn.config(state=tk.NORMAL))
+        self.root.after(0, lambda: self.export_btn.config(state=tk.NORMAL if done is not None else tk.DISABLED))
         self.root.after(0, lambda: self.stop_btn.config(state=tk.DISABLED))
-        self.log(f"采集完成，共 {len(collected)} 条视频，聚合后 {len(by_owner)} 个 UP 主")
-
-    
 
-    def _update_table(self):
-        for i in self.tree.get_children():
-            self.tree.delete(i)
-        def _label_from_score(s):
-            try:
-                v = float(s)
-            except Exception:
-                return ''
-            if v >= 8.5:
-                return '夯'
-            if v >= 7.0:
-                return '顶级'
-            if v >= 5.5:
-                return '人上人'
-            if v >= 3.5:
-                return 'NPC'
-            return '拉完了'
-
-        for idx, r in enumerate(self.results, start=1):
-            # prefer explicit tag if available
+    def _row_values(self, rank, r):
+        # prefer explicit tag if available
+        label = ''
+        try:
+            label = r.get('tag') or rating_label(r.get('llm_score'))
+        except Exception:
             label = ''
-            try:
-                tag = r.get('tag') if isinstance(r, dict) else None
-                if tag:
-                    label = tag
-                else:
-                    score_val = r.get('llm_score')
-                    if score_val is not None:
-                        label = _label_from_score(score_val)
-            except Exception:
-                label = ''
+        return (rank, r.get("name"), label, r.get("total_videos") or r.get("videos") or 0, r.get("views") or 0, r.get("likes") or 0, round(r.get("score", 0), 2), r.get("llm_summary", ""))
+
+    def _change_page(self, delta):
+        self._page += delta
+        self._update_table()
 
-            self.tree.insert("", tk.END, values=(idx, r.get("name"), label, r.get("total_videos") or r.get("videos") or 0, r.get("views") or 0, r.get("likes") or 0, round(r.get("score", 0), 2), r.get("llm_summary", "")))
+    def _update_table(self, reset_page=False):
+        """Show the current page of self.results, updating the Treeview in place.
+
+        Rows are keyed by UP mid: rows that left the page are deleted, new ones inserted,
+        and existing ones only get item()/move() calls when their values or position
+        changed, so re-ranking a long board no longer rebuilds every row.
+        """
+        total = len(self.results)
+        pages = max(1, (total + TABLE_PAGE_SIZE - 1) // TABLE_PAGE_SIZE)
+        self._page = 0 if reset_page else max(0, min(self._page, pages - 1))
+        start = self._page * TABLE_PAGE_SIZE
+        rows = []
+        used = set()
+        for idx, r in enumerate(self.results[start:start + TABLE_PAGE_SIZE], start=start + 1):
+            mid = r.get("mid")
+            iid = f"up{mid}" if mid is not None else f"row{idx}"
+            if iid in used:
+                iid = f"row{idx}"
+            used.add(iid)
+            rows.append((iid, self._row_values(idx, r)))
+
+        shown = self._shown_rows
+        stale = [iid for iid in self._shown_order if iid not in used]
+        if stale:
+            self.tree.delete(*stale)
+            for iid in stale:
+                del shown[iid]
+        order = [iid for iid in self._shown_order if iid in shown]
+        for pos, (iid, values) in enumerate(rows):
+            old = shown.get(iid)
+            if old is None:
+                self.tree.insert("", pos, iid=iid, values=values)
+                order.insert(pos, iid)
+            else:
+                if old != values:
+                    self.tree.item(iid, values=values)
+                if order[pos] != iid:
+                    self.tree.move(iid, "", pos)
+                    order.remove(iid)
+                    order.insert(pos, iid)
+            shown[iid] = values
+        self._shown_order = order
+
+        self.page_prev_btn.config(state=tk.NORMAL if self._page > 0 else tk.DISABLED)
+        self.page_next_btn.config(state=tk.NORMAL if self._page < pages - 1 else tk.DISABLED)
+        if total > TABLE_PAGE_SIZE:
+            self.page_label.config(text=f"第 {self._page + 1}/{pages} 页，共 {total} 位UP主")
+        else:
+            self.page_label.config(text=f"共 {total} 位UP主" if total else "")
 
     def export_csv(self):
         if not self.results:
@@ -1508,50 +804,16 @@ class App:
         path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV", "*.csv")])
         if not path:
             return
-        with open(path, "w", encoding="utf-8-sig", newline="") as f:
-            w = csv.writer(f)
-            w.writerow(["rank", "up_name", "rating", "videos", "views", "likes", "score", "llm_summary"])
-            for idx, r in enumerate(self.results, start=1):
-                videos = r.get("total_videos") or r.get("videos") or (len(r.get("videos_list") or []))
-                # export textual label rating instead of mid
-                try:
-                    tag = r.get('tag') if r.get('tag') else None
-                    if not tag:
-                        sv = r.get('llm_score')
-                        if sv is None:
-                            rating = ''
-                        else:
-                            # same mapping as display
-                            try:
-                                svf = float(sv)
-                            except Exception:
-                                svf = None
-                            if svf is None:
-                                rating = ''
-                            elif svf >= 8.5:
-                                rating = '夯'
-                            elif svf >= 7.0:
-                                rating = '顶级'
-                            elif svf >= 5.5:
-                                rating = '人上人'
-                            elif svf >= 3.5:
-                                rating = 'NPC'
-                            else:
-                                rating = '拉完了'
-                    else:
-                        rating = tag
-                except Exception:
-                    rating = ''
-                w.writerow([idx, r.get("name"), rating, videos, r.get("views") or 0, r.get("likes") or 0, r.get("score"), r.get("llm_summary")])
+        write_leaderboard_csv(path, self.results)
         messagebox.showinfo("完成", f"已导出 {path}")
 
     def on_leaderboard_change(self):
         sel = self.leaderboard_var.get()
-        base = self.results_by_category.get(sel)
+        base = self.engine.results_by_category.get(sel)
         if base is None:
-            base = self.results_by_category_raw.get(sel, self.results)
+            base = self.engine.results_by_category_raw.get(sel, self.results)
         self.results = base or []
-        self._update_table()
+        self._update_table(reset_page=True)
 
 
 if __name__ == "__main__":
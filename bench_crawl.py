@@ -0,0 +1,125 @@
+"""
+Offline crawl benchmark: run bilibili.collect_by_keyword / collect_all_videos_by_up against
+a local mock_bili server at several worker counts.
+
+每一轮都会重新指向模拟服务器（清空搜索形态记忆与 WBI 密钥）并重置限速器，详情缓存关闭，
+报告墙钟时间、服务器实际收到的请求数、req/s、成功数、412/429/5xx 以及重试次数
+（= 非 200 响应数，每个都会被 urllib3 或 _safe_get 重试）。
+
+示例：
+    python bench_crawl.py --workers 1,2,4,8 --latency 0.08
+    python bench_crawl.py --workers 4 --rate-412 0.03 --max-rps 20 --json bench.json
+    python bench_crawl.py --fixtures fixtures.json -k "崩坏3 深渊" --backend async
+"""
+import argparse
+import json
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+import bilibili
+from mock_bili import SYNTH_TOPICS, MockBiliServer, load_fixtures, synthetic_fixtures
+
+
+def _run_case(server: MockBiliServer, workers: int, rps: float, fn: Callable[[], List[Dict[str, Any]]]) -> Dict[str, Any]:
+    bilibili.set_api_base(server.base_url)
+    bilibili.set_crawl_workers(workers)
+    if bilibili.CRAWL_BACKEND == "async":
+        import bilibili_async
+        bilibili_async.set_max_inflight(workers)
+    # start every case from the same governor state (set_rate_limits starts at half and ramps up)
+    bilibili.set_rate_limits(search_rps=rps, view_rps=rps)
+    throttled_before = {name: lim.throttled for name, lim in bilibili.RATE_LIMITERS.items()}
+    server.reset_stats()
+    t0 = time.perf_counter()
+    entries = fn()
+    wall = time.perf_counter() - t0
+    s = server.stats()
+    return {
+        "workers": bilibili.CRAWL_WORKERS,
+        "wall_s": round(wall, 3),
+        "requests": s["requests"],
+        "req_per_s": round(s["requests"] / wall, 1) if wall > 0 else 0.0,
+        "ok": s["ok"],
+        "412": s["412"],
+        "429": s["429"],
+        "5xx": s["5xx"],
+        "retries": s["requests"] - s["ok"],
+        "throttle_cuts": sum(lim.throttled - throttled_before[name] for name, lim in bilibili.RATE_LIMITERS.items()),
+        "videos": len(entries),
+        "complete": sum(1 for e in entries if bilibili._stat_complete(e.get("stat"))),
+        "by_endpoint": s["by_endpoint"],
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="离线检索压测（本地模拟 B站 API）")
+    p.add_argument("--workers", default="1,2,4,8", help="要测试的并发数，逗号分隔（bilibili 上限 10）")
+    p.add_argument("-k", "--keywords", default=",".join(SYNTH_TOPICS[:2]), help="collect_by_keyword 的关键词，逗号分隔")
+    p.add_argument("--pages", type=int, default=3, help="每个关键词检索的页数")
+    p.add_argument("--ups", type=int, default=3, help="collect_all_videos_by_up 测试的 UP 主数（取视频最多的几位）")
+    p.add_argument("--up-pages", type=int, default=10, help="每个 UP 主的最大投稿列表页数")
+    p.add_argument("--only", choices=["keyword", "up"], default=None, help="只测其中一个入口")
+    p.add_argument("--backend", choices=["thread", "async"], default="thread", help="检索引擎")
+    p.add_argument("--rps", type=float, default=200.0, help="客户端限速上限（req/s，搜索与详情相同）")
+    p.add_argument("--fixtures", default=None, help="fixture JSON 文件（默认使用合成数据）")
+    p.add_argument("--uploaders", type=int, default=40, help="合成数据的 UP 主数量")
+    p.add_argument("--videos-per-up", type=int, default=25, help="合成数据中每个 UP 主的视频数")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--latency", type=float, default=0.05, help="模拟服务器的基础延迟（秒）")
+    p.add_argument("--jitter", type=float, default=0.02, help="额外随机延迟上限（秒）")
+    p.add_argument("--error-rate", type=float, default=0.0, help="返回 500 的概率")
+    p.add_argument("--rate-412", type=float, default=0.0, help="返回 412 的概率")
+    p.add_argument("--rate-429", type=float, default=0.0, help="返回 429 的概率")
+    p.add_argument("--max-rps", type=float, default=0.0, help="服务器端风控：每类接口超过该速率返回 412")
+    p.add_argument("--json", default=None, help="把完整结果写入该 JSON 文件")
+    return p
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    workers = [int(w) for w in args.workers.split(",") if w.strip()]
+    keywords = [k.strip() for k in args.keywords.split(",") if k.strip()]
+    fixtures = load_fixtures(args.fixtures) if args.fixtures else synthetic_fixtures(args.uploaders, args.videos_per_up, args.seed)
+
+    if bilibili.set_crawl_backend(args.backend) != args.backend:
+        print("async backend unavailable (aiohttp missing), using threads", file=sys.stderr)
+    # every run must hit the network, and stay out of the user's real cache
+    bilibili.set_detail_cache(None)
+
+    server = MockBiliServer(
+        fixtures, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        rate_412=args.rate_412, rate_429=args.rate_429, max_rps=args.max_rps, seed=args.seed,
+    ).start()
+    mids = server.uploader_mids()[:max(0, args.ups)]
+    cases = {
+        "keyword": lambda: [e for kw in keywords for e in bilibili.collect_by_keyword(kw, pages=args.pages)],
+        "up": lambda: [e for mid in mids for e in bilibili.collect_all_videos_by_up(mid, max_pages=args.up_pages)],
+    }
+    results = []
+    print(f"{'case':<8}{'workers':>8}{'wall s':>9}{'reqs':>7}{'req/s':>8}{'ok':>6}{'412':>5}{'429':>5}{'5xx':>5}{'retries':>8}{'videos':>8}")
+    try:
+        for case, fn in cases.items():
+            if args.only and case != args.only:
+                continue
+            for n in workers:
+                r = dict(_run_case(server, n, args.rps, fn), case=case)
+                results.append(r)
+                print(f"{case:<8}{r['workers']:>8}{r['wall_s']:>9.2f}{r['requests']:>7}{r['req_per_s']:>8.1f}{r['ok']:>6}"
+                      f"{r['412']:>5}{r['429']:>5}{r['5xx']:>5}{r['retries']:>8}{r['videos']:>8}", flush=True)
+    finally:
+        if bilibili.CRAWL_BACKEND == "async":
+            import bilibili_async
+            bilibili_async.shutdown()
+        server.stop()
+        bilibili.set_api_base(None)
+
+    if args.json:
+        summary = {"args": vars(args), "results": results}
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,16 +2,32 @@
 Minimal B站 data fetch helpers using公开接口。
 注意：为简化实现，只做轻量请求；在高并发或生产场景请加入重试、限速、错误处理、user-agent 伪装等。
 """
+import os
 import requests
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Optional, Tuple
+import hashlib
 import time
+import urllib.parse
 import random
+import threading
 import concurrent.futures
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
-SEARCH_URL = "https://api.bilibili.com/x/web-interface/search/type"
-VIEW_URL = "https://api.bilibili.com/x/web-interface/view"
+from rate_limiter import AdaptiveRateLimiter
+
+DEFAULT_API_BASE = "https://api.bilibili.com"
+# every endpoint below hangs off API_BASE; BILI_API_BASE / set_api_base() point them at e.g. mock_bili.py
+API_BASE = (os.environ.get("BILI_API_BASE") or DEFAULT_API_BASE).rstrip("/")
+SEARCH_URL = API_BASE + "/x/web-interface/search/type"
+VIEW_URL = API_BASE + "/x/web-interface/view"
+# lightweight counters-only endpoint, used to refresh cached details
+STAT_URL = API_BASE + "/x/web-interface/archive/stat"
+# an uploader's own submission list (WBI-signed), with play/comment counts per video
+SPACE_ARC_URL = API_BASE + "/x/space/wbi/arc/search"
+# login-state endpoint; its wbi_img urls carry the WBI signing keys
+NAV_URL = API_BASE + "/x/web-interface/nav"
+SPACE_PAGE_SIZE = 30
 
 SEARCH_ORDER_MODE = "pubdate"
 
@@ -34,7 +50,8 @@ def _install_retry(session: requests.Session, total: int = 5, backoff_factor: fl
         read=total,
         connect=total,
         backoff_factor=backoff_factor,
-        status_forcelist=(429, 500, 502, 503, 504),
+        # 429 is left to _safe_get so the rate governor sees it
+        status_forcelist=(500, 502, 503, 504),
         allowed_methods=["GET", "POST"],
         raise_on_status=False,
     )
@@ -64,6 +81,22 @@ PROXY_STATS: Dict[str, Dict[str, int]] = {}
 # Crawl workers configuration
 CRAWL_WORKERS: int = 5  # default concurrent workers for video detail fetching
 
+# Optional on-disk video detail cache (detail_cache.VideoDetailCache), see set_detail_cache
+DETAIL_CACHE = None
+
+# Process-wide request budgets (requests/second), shared by every worker and both backends.
+# Rates halve on 412/429 and creep back up while responses stay healthy (AIMD).
+RATE_LIMITERS: Dict[str, AdaptiveRateLimiter] = {
+    "search": AdaptiveRateLimiter("search", rate=1.5, max_rate=3.0),
+    "view": AdaptiveRateLimiter("view", rate=4.0, max_rate=12.0),
+}
+
+# Debug only: keep the full VIEW_URL payload under "arc" in collected entries (see set_keep_raw)
+KEEP_RAW_DETAIL: bool = False
+
+# Crawl backend: "thread" (ThreadPoolExecutor + requests) or "async" (bilibili_async, needs aiohttp)
+CRAWL_BACKEND: str = "thread"
+
 
 def set_proxy_pool(proxies: List[str]):
     """Set a list of proxy URLs for rotation (e.g. ['http://ip:port', ...])."""
@@ -81,6 +114,25 @@ def set_search_order(mode: str):
         SEARCH_ORDER_MODE = "default"
 
 
+def set_api_base(base: str = None) -> str:
+    """Serve every endpoint from another host, e.g. a local mock_bili server; None restores the real API.
+
+    Both backends read the URL globals at call time, so this takes effect for the next request.
+    The memoized search shape and WBI key belong to the old host and are dropped.
+    """
+    global API_BASE, SEARCH_URL, VIEW_URL, STAT_URL, SPACE_ARC_URL, NAV_URL
+    base = (base or DEFAULT_API_BASE).rstrip("/")
+    old = len(API_BASE)
+    SEARCH_URL, VIEW_URL, STAT_URL, SPACE_ARC_URL, NAV_URL = (
+        base + url[old:] for url in (SEARCH_URL, VIEW_URL, STAT_URL, SPACE_ARC_URL, NAV_URL)
+    )
+    API_BASE = base
+    _SEARCH_MEMO.clear()
+    with _WBI_LOCK:
+        _WBI_KEY["key"], _WBI_KEY["ts"] = None, 0.0
+    return API_BASE
+
+
 def get_proxy_pool():
     return list(PROXY_POOL)
 
@@ -91,6 +143,72 @@ def set_crawl_workers(workers: int):
     CRAWL_WORKERS = max(1, min(10, workers))
 
 
+def set_crawl_backend(backend: str) -> str:
+    """Select the crawl backend used by collect_by_keyword / collect_all_videos_by_up.
+
+    Falls back to "thread" when the async backend is requested but aiohttp is missing.
+    Returns the backend actually in effect.
+    """
+    global CRAWL_BACKEND
+    if isinstance(backend, str) and backend.lower() == "async":
+        import bilibili_async
+        CRAWL_BACKEND = "async" if bilibili_async.is_available() else "thread"
+    else:
+        CRAWL_BACKEND = "thread"
+    return CRAWL_BACKEND
+
+
+def set_keep_raw(keep: bool):
+    """Keep the raw detail payload on every collected entry (memory-hungry, for debugging)."""
+    global KEEP_RAW_DETAIL
+    KEEP_RAW_DETAIL = bool(keep)
+
+
+def set_detail_cache(path: str = None, stat_ttl: int = 12 * 3600):
+    """Enable the SQLite detail cache at `path` (None disables it).
+
+    Static fields never expire; `stat` counters are refreshed once older than stat_ttl seconds.
+    """
+    global DETAIL_CACHE
+    if DETAIL_CACHE is not None and (not path or DETAIL_CACHE.path != path):
+        DETAIL_CACHE.close()
+        DETAIL_CACHE = None
+    if not path:
+        return None
+    if DETAIL_CACHE is None:
+        from detail_cache import VideoDetailCache
+        DETAIL_CACHE = VideoDetailCache(path, stat_ttl=stat_ttl)
+    else:
+        DETAIL_CACHE.stat_ttl = max(0, int(stat_ttl))
+    return DETAIL_CACHE
+
+
+def set_rate_limits(search_rps: float = None, view_rps: float = None):
+    """Set the maximum request rates; the governor starts at half of it and ramps up."""
+    if search_rps:
+        RATE_LIMITERS["search"].set_rate(rate=float(search_rps) / 2, max_rate=float(search_rps))
+    if view_rps:
+        RATE_LIMITERS["view"].set_rate(rate=float(view_rps) / 2, max_rate=float(view_rps))
+
+
+def set_rate_listener(callback):
+    """Register callback(name, rate, reason) invoked when a governor changes its rate noticeably."""
+    for limiter in RATE_LIMITERS.values():
+        limiter.listener = callback
+
+
+def get_rate_status() -> Dict[str, float]:
+    return {name: limiter.rate for name, limiter in RATE_LIMITERS.items()}
+
+
+def _limiter_for(url: str):
+    if url.startswith(SEARCH_URL) or url.startswith(SPACE_ARC_URL):
+        return RATE_LIMITERS["search"]
+    if url.startswith(VIEW_URL) or url.startswith(STAT_URL):
+        return RATE_LIMITERS["view"]
+    return None
+
+
 def _choose_proxy() -> Dict[str, str]:
     """Choose a proxy from pool (random) and return proxies dict for requests, or {} if no proxy."""
     if not PROXY_POOL:
@@ -136,23 +254,30 @@ def test_proxy(proxy_url: str, timeout: int = 8) -> bool:
 LAST_RESP = None
 
 
+def _build_headers() -> Dict[str, str]:
+    """Rotate user-agent and slightly randomize headers for one request."""
+    headers = DEFAULT_HEADERS.copy()
+    headers["User-Agent"] = random.choice(USER_AGENTS)
+    # small chance to change Accept header
+    if random.random() < 0.2:
+        headers["Accept"] = "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8"
+    return headers
+
+
 def _safe_get(url: str, params: dict = None, timeout: int = 10, attempts: int = 3) -> Dict[str, Any]:
     """Perform GET with retries and anti-scraping mitigations.
     - rotate user-agent and slightly randomize headers
-    - add jitter between retries
-    - on 412 (banned) try header rotation and longer backoff before failing
+    - pace requests through the process-wide rate governor of the endpoint
+    - on 412/429 (banned/throttled) cut the governor's rate, rotate headers and back off before failing
     """
     global LAST_RESP
     last_exc = None
+    limiter = _limiter_for(url)
     for i in range(attempts):
-        # rotate UA and build headers
-        headers = DEFAULT_HEADERS.copy()
-        ua = random.choice(USER_AGENTS)
-        headers["User-Agent"] = ua
-        # small chance to change Accept header
-        if random.random() < 0.2:
-            headers["Accept"] = "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8"
+        headers = _build_headers()
         try:
+            if limiter is not None:
+                limiter.acquire()
             # choose proxy for this request if pool configured
             proxies = _choose_proxy()
             # record which proxy used
@@ -160,14 +285,16 @@ def _safe_get(url: str, params: dict = None, timeout: int = 10, attempts: int =
             if proxies:
                 used_proxy = proxies.get('http')
             r = SESSION.get(url, params=params, timeout=timeout, headers=headers, proxies=proxies or None)
-            # optimized random delay: reduced from 0.2-0.8s to 0.1-0.4s for better speed
-            # while still maintaining anti-scraping protection
-            time.sleep(0.1 + random.random() * 0.3)
+            if limiter is None:
+                # ungoverned endpoints keep the plain random delay
+                time.sleep(0.1 + random.random() * 0.3)
             if r.status_code != 200:
                 LAST_RESP = {"status_code": r.status_code, "text": r.text}
-                # if banned (412) try a few more times with longer backoff and UA rotation
-                if r.status_code == 412:
-                    last_exc = Exception(f"HTTP 412 banned for {r.url}")
+                # if banned (412) / throttled (429) slow everyone down, then retry with longer backoff and UA rotation
+                if r.status_code in (412, 429):
+                    if limiter is not None:
+                        limiter.on_throttle(str(r.status_code))
+                    last_exc = Exception(f"HTTP {r.status_code} banned for {r.url}")
                     # additional attempts with exponential backoff and jitter
                     extra_sleep = (2 ** i) + random.random() * 2
                     time.sleep(extra_sleep)
@@ -183,6 +310,8 @@ def _safe_get(url: str, params: dict = None, timeout: int = 10, attempts: int =
             try:
                 j = r.json()
                 LAST_RESP = j
+                if limiter is not None:
+                    limiter.on_success()
                 # success
                 if used_proxy:
                     report_proxy_result(used_proxy, True)
@@ -201,14 +330,14 @@ def _safe_get(url: str, params: dict = None, timeout: int = 10, attempts: int =
     raise last_exc
 
 
-def search_videos(keyword: str, page: int = 1, order: str = None, up_mid: int = None) -> List[Dict[str, Any]]:
-    # Try a few common parameter variants as B 站 search endpoints differ
+def _search_param_variants(keyword: str, page: int = 1, order: str = None, up_mid: int = None) -> List[Dict[str, Any]]:
+    """Build the parameter shapes tried against SEARCH_URL (shared by the sync and async backends)."""
     # If up_mid is provided, combine keyword with up主 filter
     search_keyword = keyword
     if up_mid:
         # B站搜索支持 "关键词 up主:mid" 格式
         search_keyword = f"{keyword} up主:{up_mid}"
-    
+
     param_variants = [
         {"search_type": "video", "keyword": search_keyword, "page": page},
         {"search_type": "video", "keyword": search_keyword, "pn": page, "ps": 20},
@@ -220,38 +349,175 @@ def search_videos(keyword: str, page: int = 1, order: str = None, up_mid: int =
             {"search_type": "video", "keyword": keyword, "mid": up_mid, "page": page},
             {"search_type": "video", "keyword": keyword, "mid": up_mid, "pn": page, "ps": 20},
         ])
-    
+
     if order and order != "default":
         for params in param_variants:
             params["order"] = order
-    for params in param_variants:
+    return param_variants
+
+
+# Winning (variant index, data key) per search shape ("kw" plain / "up" with up_mid),
+# learnt from the first non-empty response so later calls go straight to it.
+_SEARCH_MEMO: Dict[str, Tuple[int, str]] = {}
+_SEARCH_RESULT_KEYS = ("result", "items", "list")
+
+
+def _search_shape(up_mid: int = None) -> str:
+    return "up" if up_mid else "kw"
+
+
+def _ordered_search_variants(keyword: str, page: int = 1, order: str = None, up_mid: int = None) -> List[Tuple[int, Dict[str, Any]]]:
+    """(index, params) pairs with the memoized winner first and the rest in their usual order."""
+    variants = list(enumerate(_search_param_variants(keyword, page=page, order=order, up_mid=up_mid)))
+    memo = _SEARCH_MEMO.get(_search_shape(up_mid))
+    if memo and memo[0] < len(variants):
+        variants.insert(0, variants.pop(memo[0]))
+    return variants
+
+
+def _parse_search(j: Any, prefer_key: str = None) -> Tuple[Optional[List[Dict[str, Any]]], Optional[str]]:
+    """(items, data key) of a search response; items is None if the response is unusable
+    and [] if it is a valid but empty page."""
+    if not isinstance(j, dict) or j.get("code") != 0:
+        return None, None
+    data = j.get("data") or {}
+    if not isinstance(data, dict):
+        return [], None
+    keys = _SEARCH_RESULT_KEYS if not prefer_key else (prefer_key,) + tuple(k for k in _SEARCH_RESULT_KEYS if k != prefer_key)
+    for k in keys:
+        if isinstance(data.get(k), list) and data.get(k):
+            return data.get(k), k
+    return [], None
+
+
+def _extract_search_items(j: Any) -> List[Dict[str, Any]]:
+    """Return the result list of a search response, or [] if the response is unusable."""
+    return _parse_search(j)[0] or []
+
+
+def _search_outcome(up_mid: int, idx: int, j: Any) -> Optional[List[Dict[str, Any]]]:
+    """Items to return for variant idx's response, or None to try the next variant."""
+    shape = _search_shape(up_mid)
+    memo = _SEARCH_MEMO.get(shape)
+    items, key = _parse_search(j, memo[1] if memo else None)
+    if items:
+        if memo != (idx, key):
+            _SEARCH_MEMO[shape] = (idx, key)
+        return items
+    if items is not None and memo and memo[0] == idx:
+        # the proven shape answered with an empty page: there really are no more results
+        return []
+    return None
+
+
+def _search_page(keyword: str, page: int = 1, order: str = None, up_mid: int = None) -> Optional[List[Dict[str, Any]]]:
+    """Like search_videos, but None when no variant gave a usable answer (failed request,
+    risk control, or nothing found under any shape) and [] only for a proven-empty page."""
+    # Try a few common parameter variants as B 站 search endpoints differ;
+    # the one that worked last time is tried first and the rest only if it fails
+    for idx, params in _ordered_search_variants(keyword, page=page, order=order, up_mid=up_mid):
         try:
             j = _safe_get(SEARCH_URL, params=params, timeout=8, attempts=3)
         except Exception:
             j = None
-        if not isinstance(j, dict):
-            continue
-        # prefer successful code and non-empty results
-        if j.get("code") == 0:
-            data = j.get("data", {}) or {}
-            res = data.get("result") or data.get("result", [])
-            if isinstance(res, list) and len(res) > 0:
-                return res
-            # sometimes result is nested under 'items' or similar
-            if isinstance(data, dict):
-                for k in ("result", "items", "list"):
-                    if isinstance(data.get(k), list) and data.get(k):
-                        return data.get(k)
+        items = _search_outcome(up_mid, idx, j)
+        if items is not None:
+            return items
         # otherwise try next variant
-    return []
+    return None
 
 
-def get_video_detail(bvid: str) -> Dict[str, Any]:
-    params = {"bvid": bvid}
+def search_videos(keyword: str, page: int = 1, order: str = None, up_mid: int = None) -> List[Dict[str, Any]]:
+    return _search_page(keyword, page=page, order=order, up_mid=up_mid) or []
+
+
+# permutation used by the web player to derive the WBI mixin key from img_key + sub_key
+_WBI_MIXIN_TAB = [
+    46, 47, 18, 2, 53, 8, 23, 32, 15, 50, 10, 31, 58, 3, 45, 35, 27, 43, 5, 49,
+    33, 9, 42, 19, 29, 28, 14, 39, 12, 38, 41, 13, 37, 48, 7, 16, 24, 55, 40,
+    61, 26, 17, 0, 1, 60, 51, 30, 4, 22, 25, 54, 21, 56, 59, 6, 63, 57, 62, 11,
+    36, 20, 34, 44, 52,
+]
+_WBI_KEY = {"key": None, "ts": 0.0}
+_WBI_LOCK = threading.Lock()
+
+
+def _get_wbi_key() -> Optional[str]:
+    """Mixin key for WBI signing, fetched from NAV_URL and reused for an hour."""
+    with _WBI_LOCK:
+        if _WBI_KEY["key"] and time.time() - _WBI_KEY["ts"] < 3600:
+            return _WBI_KEY["key"]
+        try:
+            j = _safe_get(NAV_URL, timeout=8, attempts=2)
+            img = ((j.get("data") or {}).get("wbi_img") or {}) if isinstance(j, dict) else {}
+            raw = img["img_url"].rsplit("/", 1)[-1].split(".")[0] + img["sub_url"].rsplit("/", 1)[-1].split(".")[0]
+        except Exception:
+            return None
+        _WBI_KEY["key"] = "".join(raw[i] for i in _WBI_MIXIN_TAB if i < len(raw))[:32]
+        _WBI_KEY["ts"] = time.time()
+        return _WBI_KEY["key"]
+
+
+def _wbi_sign(params: Dict[str, Any], key: str) -> Dict[str, Any]:
+    signed = dict(params)
+    signed["wts"] = int(time.time())
+    # the signer drops these characters from values before hashing
+    signed = {k: "".join(c for c in str(v) if c not in "!'()*") for k, v in sorted(signed.items())}
+    query = urllib.parse.urlencode(signed)
+    signed["w_rid"] = hashlib.md5((query + key).encode("utf-8")).hexdigest()
+    return signed
+
+
+def _space_params(up_mid: int, page: int, page_size: int) -> Dict[str, Any]:
+    return {"mid": up_mid, "pn": page, "ps": page_size, "order": "pubdate", "platform": "web", "web_location": 1550101}
+
+
+def _extract_space_items(j: Any) -> Optional[Tuple[List[Dict[str, Any]], int]]:
+    """Normalize a SPACE_ARC_URL payload to search-item shape; None if the call was refused."""
+    if not isinstance(j, dict) or j.get("code") != 0:
+        return None
+    data = j.get("data") or {}
+    vlist = ((data.get("list") or {}).get("vlist")) or []
+    total = int((data.get("page") or {}).get("count") or 0)
+    items = []
+    for v in vlist:
+        if not v.get("bvid"):
+            continue
+        items.append({
+            "bvid": v.get("bvid"),
+            "aid": v.get("aid"),
+            "title": v.get("title"),
+            "description": v.get("description"),
+            "pubdate": v.get("created"),
+            "owner": {"mid": v.get("mid"), "name": v.get("author")},
+            # the listing has plays/comments/danmaku but no likes or favorites
+            "stat": {"view": v.get("play") or 0, "reply": v.get("comment") or 0, "danmaku": v.get("video_review") or 0},
+        })
+    return items, total
+
+
+def list_up_videos(up_mid: int, page: int = 1, page_size: int = SPACE_PAGE_SIZE) -> Optional[Tuple[List[Dict[str, Any]], int]]:
+    """One page of an uploader's submissions, newest first: (items, total count).
+
+    Returns None when the listing is unavailable (no WBI key, risk control), so
+    callers can fall back to search probing.
+    """
+    key = _get_wbi_key()
+    if not key:
+        return None
     try:
-        j = _safe_get(VIEW_URL, params=params, timeout=8, attempts=3)
+        j = _safe_get(SPACE_ARC_URL, params=_wbi_sign(_space_params(up_mid, page, page_size), key), timeout=8, attempts=3)
     except Exception:
-        return {}
+        return None
+    return _extract_space_items(j)
+
+
+def _stat_complete(stat: Dict[str, Any]) -> bool:
+    """Whether stat already has every counter the leaderboard scores on."""
+    return isinstance(stat, dict) and all(k in stat for k in ("view", "like", "favorite"))
+
+
+def _extract_video_detail(j: Any) -> Dict[str, Any]:
     if not isinstance(j, dict):
         return {}
     if j.get("code") != 0:
@@ -259,18 +525,170 @@ def get_video_detail(bvid: str) -> Dict[str, Any]:
     return j.get("data", {})
 
 
-def collect_all_videos_by_up(up_mid: int, max_pages: int = 100) -> List[Dict[str, Any]]:
+def _extract_stat(j: Any) -> Dict[str, Any]:
+    if not isinstance(j, dict) or j.get("code") != 0:
+        return {}
+    data = j.get("data")
+    return data if isinstance(data, dict) else {}
+
+
+def _fetch_video_detail(bvid: str) -> Dict[str, Any]:
+    try:
+        j = _safe_get(VIEW_URL, params={"bvid": bvid}, timeout=8, attempts=3)
+    except Exception:
+        return {}
+    return _extract_video_detail(j)
+
+
+def get_video_detail(bvid: str) -> Dict[str, Any]:
+    """Return the VIEW_URL payload for bvid, served from DETAIL_CACHE when possible.
+
+    A cached video with stale counters only costs a STAT_URL call; the full detail
+    is fetched (and cached) for unseen videos or when the stat refresh fails.
+    """
+    cache = DETAIL_CACHE
+    if cache is None:
+        return _fetch_video_detail(bvid)
+    cached, fresh = cache.get(bvid)
+    if cached is not None:
+        if fresh:
+            return cached
+        try:
+            stat = _extract_stat(_safe_get(STAT_URL, params={"bvid": bvid}, timeout=8, attempts=2))
+        except Exception:
+            stat = {}
+        if stat:
+            cache.put_stat(bvid, stat)
+            cached["stat"] = stat
+            return cached
+    detail = _fetch_video_detail(bvid)
+    if detail:
+        cache.put(bvid, detail)
+        return detail
+    # network failed: stale counters are better than nothing
+    return cached or {}
+
+
+def _build_entry(keyword: str, bvid: str, it: Dict[str, Any], detail: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge a search item and its detail response into the collected-entry shape.
+
+    The detail payload itself is only kept (under "arc") when KEEP_RAW_DETAIL is set.
+    """
+    entry = {
+        "keyword": keyword,
+        "bvid": bvid,
+        "title": it.get("title") or detail.get("title"),
+        "desc": it.get("description") or detail.get("desc"),
+        "pubdate": detail.get("pubdate") or it.get("pubdate"),
+        "owner": detail.get("owner") or it.get("owner"),
+        "stat": detail.get("stat") or it.get("stat"),
+    }
+    if KEEP_RAW_DETAIL:
+        entry["arc"] = detail
+    return entry
+
+
+_SEEN_LOCK = threading.Lock()
+
+
+def _claim_bvids(items: List[Dict[str, Any]], seen: Dict[str, List[str]] = None, keyword: str = "") -> List[Dict[str, Any]]:
+    """Drop items without bvid, duplicates within items, and bvids already in seen.
+
+    seen (bvid -> keywords that returned it) may be shared by every page task of a
+    scan, across keywords; claiming is atomic so each bvid's detail is fetched by
+    exactly one task, while every matching keyword is still recorded.
+    """
+    out = []
+    local = set()
+    with _SEEN_LOCK:
+        for it in items:
+            bvid = it.get("bvid")
+            if not bvid or bvid in local:
+                continue
+            local.add(bvid)
+            if seen is None:
+                out.append(it)
+                continue
+            kws = seen.get(bvid)
+            if kws is None:
+                seen[bvid] = [keyword]
+                out.append(it)
+            elif keyword not in kws:
+                kws.append(keyword)
+    return out
+
+
+def _page_range(pages: int, page: int = None) -> range:
+    """Pages to request: just `page` when given, otherwise 1..pages."""
+    if page is not None:
+        return range(max(1, int(page)), max(1, int(page)) + 1)
+    return range(1, pages + 1)
+
+
+def _fetch_details(bvids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Fetch details for bvids with at most CRAWL_WORKERS threads."""
+    details_map: Dict[str, Dict[str, Any]] = {}
+    if not bvids:
+        return details_map
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(CRAWL_WORKERS, len(bvids))) as ex:
+        future_to_bvid = {ex.submit(get_video_detail, b): b for b in bvids}
+        for fut in concurrent.futures.as_completed(future_to_bvid):
+            b = future_to_bvid[fut]
+            try:
+                details_map[b] = fut.result()
+            except Exception:
+                details_map[b] = {}
+    return details_map
+
+
+def collect_all_videos_by_up(
+    up_mid: int, max_pages: int = 100, keep: Callable[[Dict[str, Any]], bool] = None
+) -> List[Dict[str, Any]]:
     """获取指定UP主的所有视频（不限制关键词，遍历所有页面直到没有结果）
+
+    优先走投稿列表接口（SPACE_ARC_URL，每页 SPACE_PAGE_SIZE 条，自带标题/简介/播放数），
+    不可用时退回搜索探测。
     
     Args:
         up_mid: UP主的mid
         max_pages: 最大页数限制，防止无限循环
+        keep: 可选过滤函数，参数为列表条目（title/description/pubdate 已就绪）；
+            返回 False 的视频直接丢弃，不再请求详情
     
     Returns:
         该UP主的所有视频列表
     """
+    if CRAWL_BACKEND == "async":
+        import bilibili_async
+        return bilibili_async.collect_all_videos_by_up(up_mid, max_pages=max_pages, keep=keep)
+
+    out = _collect_up_by_listing(up_mid, max_pages, keep)
+    if out is not None:
+        return out
+    return _collect_up_by_search(up_mid, max_pages, keep)
+
+
+def _collect_up_by_listing(up_mid: int, max_pages: int, keep=None) -> Optional[List[Dict[str, Any]]]:
+    """Page through the uploader's submission list; None if the listing is refused on page 1."""
+    out = []
+    for page in range(1, max_pages + 1):
+        res = list_up_videos(up_mid, page=page)
+        if res is None:
+            return None if page == 1 else out
+        items, total = res
+        wanted = [it for it in items if keep is None or keep(it)]
+        # details only where the listing lacks likes/favorites, and only for videos that will be kept
+        details_map = _fetch_details([it["bvid"] for it in wanted if not _stat_complete(it.get("stat"))])
+        for it in wanted:
+            out.append(_build_entry("", it["bvid"], it, details_map.get(it["bvid"]) or {}))
+        if not items or page * SPACE_PAGE_SIZE >= total:
+            break
+    return out
+
+
+def _collect_up_by_search(up_mid: int, max_pages: int, keep=None) -> List[Dict[str, Any]]:
+    """Fallback: probe the search endpoint with up_mid filters and verify ownership via details."""
     out = []
-    max_workers = CRAWL_WORKERS
     seen_bvids = set()  # 用于去重
     
     # 通过搜索"up主:mid"格式来获取该UP主的视频
@@ -299,29 +717,24 @@ def collect_all_videos_by_up(up_mid: int, max_pages: int = 100) -> List[Dict[str
         # map bvid -> original item so we can merge detail responses
         bvid_map = {}
         bvids = []
+        new_on_page = 0
         for it in items:
             bvid = it.get("bvid") or it.get("bvid")
             if not bvid or bvid in seen_bvids:
                 continue
+            seen_bvids.add(bvid)
+            new_on_page += 1
+            if keep is not None and not keep(it):
+                continue
             bvids.append(bvid)
             bvid_map[bvid] = it
-            seen_bvids.add(bvid)
         
-        if not bvids:
+        if not new_on_page:
             # 这一页都是重复的，可能已经获取完所有视频
             break
         
         # fetch details concurrently but limit parallelism
-        details_map: Dict[str, Dict[str, Any]] = {}
-        if bvids:
-            with concurrent.futures.ThreadPoolExecutor(max_workers=min(max_workers, len(bvids))) as ex:
-                future_to_bvid = {ex.submit(get_video_detail, b): b for b in bvids}
-                for fut in concurrent.futures.as_completed(future_to_bvid):
-                    b = future_to_bvid[fut]
-                    try:
-                        details_map[b] = fut.result()
-                    except Exception:
-                        details_map[b] = {}
+        details_map = _fetch_details(bvids)
         
         for bvid in bvids:
             it = bvid_map.get(bvid, {})
@@ -333,24 +746,142 @@ def collect_all_videos_by_up(up_mid: int, max_pages: int = 100) -> List[Dict[str
                 # 视频不属于该UP主，跳过
                 continue
             
-            entry = {
-                "keyword": "",  # 空关键词，表示获取所有视频
-                "bvid": bvid,
-                "title": it.get("title"),
-                "desc": it.get("description") or detail.get("desc"),
-                "pubdate": detail.get("pubdate") or it.get("pubdate"),
-                "owner": detail.get("owner") or it.get("owner"),
-                "stat": detail.get("stat") or it.get("stat"),
-                "arc": detail,
-            }
-            out.append(entry)
+            # 空关键词，表示获取所有视频
+            out.append(_build_entry("", bvid, it, detail))
         
         page += 1
     
     return out
 
 
-def collect_by_keyword(keyword: str, pages: int = 2, up_mid: int = None) -> List[Dict[str, Any]]:
+def _watermark_key(keyword: str, up_mid: int = None) -> str:
+    return f"{keyword}|up:{up_mid}" if up_mid else keyword
+
+
+def _item_pubdate(it: Dict[str, Any]) -> int:
+    try:
+        return int(it.get("pubdate") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _split_new_items(items: List[Dict[str, Any]], mark: int, known: set) -> List[Dict[str, Any]]:
+    """Search items newer than the keyword watermark (same-second items count if not yet ingested)."""
+    new = []
+    for it in items:
+        bvid = it.get("bvid")
+        if not bvid or bvid in known:
+            continue
+        pub = _item_pubdate(it)
+        if pub == 0 or pub >= mark:
+            new.append(it)
+    return new
+
+
+def _incremental_ready() -> bool:
+    """Incremental scans need newest-first ordering and the on-disk store."""
+    return SEARCH_ORDER_MODE == "pubdate" and DETAIL_CACHE is not None
+
+
+class _IncrementalScan:
+    """Bookkeeping of one incremental keyword scan, shared by the sync and async backends.
+
+    The watermark only moves when paging actually reached it (or on the very first
+    scan), and never past a video whose detail could not be fetched: such videos
+    stay unrecorded so the next run finds them again.
+    """
+
+    def __init__(self, keyword: str, up_mid: int = None, seen: Dict[str, List[str]] = None):
+        self.keyword = keyword
+        self.key = _watermark_key(keyword, up_mid)
+        self.seen = seen
+        self.mark, _ = DETAIL_CACHE.get_watermark(self.key)
+        self.known = set(DETAIL_CACHE.keyword_bvids(self.key))
+        self.reached = False
+        self.entries: List[Dict[str, Any]] = []
+        self.done: List[Tuple[str, int]] = []  # (bvid, pubdate) ingested with a detail
+        self.held: List[Tuple[str, int]] = []  # (bvid, pubdate) to be searched again next run
+        self.borrowed: List[Dict[str, Any]] = []  # new items claimed by another keyword via seen
+        self.listed: List[Tuple[str, int]] = []  # (bvid, pubdate) of every search item paged through
+
+    def take_page(self, items: Optional[List[Dict[str, Any]]]) -> Optional[List[Dict[str, Any]]]:
+        """Items of a newest-first search page whose details this scan has to fetch;
+        None when paging should stop here (failed search or end of results)."""
+        if items is None:
+            # failed search: stop, but the gap below this page is still unknown
+            return None
+        if not items:
+            self.reached = True
+            return None
+        self.listed.extend((it["bvid"], _item_pubdate(it)) for it in items if it.get("bvid"))
+        if any(0 < _item_pubdate(it) <= self.mark for it in items):
+            self.reached = True
+        # a page of known videos above the mark (ingested before a failed or capped run) keeps paging
+        new_items = _split_new_items(items, self.mark, self.known)
+        self.known.update(it["bvid"] for it in new_items)
+        claimed = _claim_bvids(new_items, self.seen, self.keyword)
+        ids = {it["bvid"] for it in claimed}
+        self.borrowed.extend(it for it in new_items if it["bvid"] not in ids)
+        return claimed
+
+    def add_details(self, claimed: List[Dict[str, Any]], details_map: Dict[str, Dict[str, Any]]):
+        for it in claimed:
+            detail = details_map.get(it["bvid"]) or {}
+            entry = _build_entry(self.keyword, it["bvid"], it, detail)
+            self.entries.append(entry)
+            (self.done if detail else self.held).append((it["bvid"], int(entry.get("pubdate") or 0)))
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """Record ingested videos, move the watermark and append stored entries from earlier runs (no network)."""
+        cache = DETAIL_CACHE
+        for it in self.borrowed:
+            # fetched by the keyword that claimed it; if that failed (or is still running) retry next time
+            row = (it["bvid"], _item_pubdate(it))
+            (self.done if cache.peek(it["bvid"]) else self.held).append(row)
+        cache.add_keyword_videos(self.key, self.done)
+        if self.reached or self.mark == 0:
+            # paging covered everything from the top down to the mark: everything listed
+            # is ingested now, except held videos, which the mark must stay at or below
+            held_ids = {b for b, _ in self.held}
+            newest = max((r for r in self.listed if r[0] not in held_ids), key=lambda r: r[1], default=None)
+            held = [r for r in self.held if r[1] > 0]
+            if newest and held:
+                newest = min([newest] + held, key=lambda r: r[1])
+            if newest and newest[1] > self.mark:
+                cache.set_watermark(self.key, newest[1], newest[0])
+        touched = {b for b, _ in self.done + self.held}
+        stored = [{"bvid": b} for b in cache.keyword_bvids(self.key) if b not in touched]
+        out = list(self.entries)
+        for it in _claim_bvids(stored, self.seen, self.keyword):
+            detail = cache.peek(it["bvid"])
+            if detail:
+                out.append(_build_entry(self.keyword, it["bvid"], {}, detail))
+        return out
+
+
+def _collect_incremental(keyword: str, pages: int, up_mid: int = None, seen: Dict[str, List[str]] = None) -> List[Dict[str, Any]]:
+    scan = _IncrementalScan(keyword, up_mid, seen)
+    mode = SEARCH_ORDER_MODE if SEARCH_ORDER_MODE != "default" else None
+    for p in range(1, pages + 1):
+        claimed = scan.take_page(_search_page(keyword, page=p, order=mode, up_mid=up_mid))
+        if claimed is None:
+            break
+        if claimed:
+            scan.add_details(claimed, _fetch_details([it["bvid"] for it in claimed]))
+        if scan.reached:
+            # newest-first: everything further down is already below the watermark
+            break
+    return scan.finish()
+
+
+def collect_by_keyword(
+    keyword: str,
+    pages: int = 2,
+    up_mid: int = None,
+    incremental: bool = False,
+    page: int = None,
+    seen: Dict[str, List[str]] = None,
+) -> List[Dict[str, Any]]:
     """Collect search results for a keyword and fetch video details in parallel.
 
     To avoid creating too many concurrent requests (which may trigger anti-scraping),
@@ -361,13 +892,36 @@ def collect_by_keyword(keyword: str, pages: int = 2, up_mid: int = None) -> List
         keyword: Search keyword
         pages: Number of pages to fetch
         up_mid: Optional UP主 mid to filter results by specific UP主
+        incremental: Stop paging once a page is entirely older than the keyword's
+            stored high-water mark and only fetch details for newer videos; videos
+            ingested by earlier runs are returned from the local store. Requires
+            pubdate ordering and the detail cache, otherwise a full scan is done.
+            Videos whose detail fetch fails are not recorded and are searched
+            again on the next run.
+        page: Fetch only this page (1-based) instead of 1..pages, so callers can
+            fan pages out over their own pool. Not supported together with
+            incremental (the scan has to walk pages in order to find the mark).
+        seen: Optional dict bvid -> matched keywords shared between calls (also
+            across keywords); videos already in it are skipped before the detail
+            stage and only get this keyword appended, new ones are added to it.
 
     max_workers: cap concurrent detail fetches (configurable via set_crawl_workers).
+    When the async backend is selected (set_crawl_backend("async")) the call is
+    delegated to bilibili_async with the same arguments and return shape.
     """
+    if incremental and page is not None:
+        raise ValueError("incremental scans page through results themselves; page= cannot be combined with them")
+    if CRAWL_BACKEND == "async":
+        import bilibili_async
+        return bilibili_async.collect_by_keyword(keyword, pages=pages, up_mid=up_mid, incremental=incremental, page=page, seen=seen)
+    if incremental and _incremental_ready():
+        return _collect_incremental(keyword, pages, up_mid=up_mid, seen=seen)
+
     out = []
-    # use configurable worker cap
-    max_workers = CRAWL_WORKERS
-    for p in range(1, pages + 1):
+    if seen is None:
+        # dedupe across the pages of this call (search pages shift while paging)
+        seen = {}
+    for p in _page_range(pages, page):
         items = []
         try:
             mode = SEARCH_ORDER_MODE if SEARCH_ORDER_MODE != "default" else None
@@ -381,39 +935,18 @@ def collect_by_keyword(keyword: str, pages: int = 2, up_mid: int = None) -> List
         # map bvid -> original item so we can merge detail responses
         bvid_map = {}
         bvids = []
-        for it in items:
-            bvid = it.get("bvid") or it.get("bvid")
-            if not bvid:
-                continue
+        for it in _claim_bvids(items, seen, keyword):
+            bvid = it["bvid"]
             bvids.append(bvid)
             bvid_map[bvid] = it
 
         # fetch details concurrently but limit parallelism
-        details_map: Dict[str, Dict[str, Any]] = {}
-        if bvids:
-            with concurrent.futures.ThreadPoolExecutor(max_workers=min(max_workers, len(bvids))) as ex:
-                future_to_bvid = {ex.submit(get_video_detail, b): b for b in bvids}
-                for fut in concurrent.futures.as_completed(future_to_bvid):
-                    b = future_to_bvid[fut]
-                    try:
-                        details_map[b] = fut.result()
-                    except Exception:
-                        details_map[b] = {}
+        details_map = _fetch_details(bvids)
 
         for bvid in bvids:
             it = bvid_map.get(bvid, {})
             detail = details_map.get(bvid, {}) or {}
-            entry = {
-                "keyword": keyword,
-                "bvid": bvid,
-                "title": it.get("title"),
-                "desc": it.get("description") or detail.get("desc"),
-                "pubdate": detail.get("pubdate") or it.get("pubdate"),
-                "owner": detail.get("owner") or it.get("owner"),
-                "stat": detail.get("stat") or it.get("stat"),
-                "arc": detail,
-            }
-            out.append(entry)
+            out.append(_build_entry(keyword, bvid, it, detail))
     return out
 
 
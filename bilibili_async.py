@@ -0,0 +1,391 @@
+"""
+Asyncio crawl backend for bilibili.py.
+
+所有请求跑在同一个后台事件循环里，共享一个 aiohttp 连接池；抖动和退避都是 await，
+不占用线程。对外暴露与 bilibili.py 相同的 collect_by_keyword / collect_all_videos_by_up，
+调用方（包括其他线程）会阻塞等待结果，因此可以直接替换同步实现。
+aiohttp 为可选依赖，未安装时 is_available() 返回 False。
+"""
+import asyncio
+import json
+import random
+import threading
+from typing import List, Dict, Any, Optional
+
+try:
+    import aiohttp
+except ImportError:  # optional dependency
+    aiohttp = None
+
+import bilibili
+
+# global cap on in-flight HTTP requests across every caller of this backend
+ASYNC_MAX_INFLIGHT: int = 64
+
+_LOOP = None
+_LOOP_THREAD = None
+_LOOP_LOCK = threading.Lock()
+_SESSION = None
+_INFLIGHT = None
+_INFLIGHT_SIZE = 0
+_ACTIVE = 0  # run() calls in progress; the semaphore is only swapped while this is 0
+
+
+def is_available() -> bool:
+    return aiohttp is not None
+
+
+def set_max_inflight(n: int):
+    """Set the global in-flight request limit.
+
+    Coroutines of a running crawl may hold the current semaphore, so it is only
+    replaced once no crawl is in progress (right away if idle).
+    """
+    global ASYNC_MAX_INFLIGHT, _INFLIGHT
+    with _LOOP_LOCK:
+        ASYNC_MAX_INFLIGHT = max(1, min(1000, int(n)))
+        if _ACTIVE == 0:
+            _INFLIGHT = None
+
+
+def _ensure_loop() -> asyncio.AbstractEventLoop:
+    global _LOOP, _LOOP_THREAD
+    with _LOOP_LOCK:
+        if _LOOP is None or _LOOP.is_closed():
+            _LOOP = asyncio.new_event_loop()
+            _LOOP_THREAD = threading.Thread(target=_LOOP.run_forever, name="bilibili-async", daemon=True)
+            _LOOP_THREAD.start()
+        return _LOOP
+
+
+def run(coro):
+    """Run a coroutine on the shared loop and block the calling thread until it finishes."""
+    if aiohttp is None:
+        raise RuntimeError("aiohttp 未安装，无法使用 async 检索引擎")
+    global _ACTIVE, _INFLIGHT
+    loop = _ensure_loop()
+    with _LOOP_LOCK:
+        _ACTIVE += 1
+    try:
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+    finally:
+        with _LOOP_LOCK:
+            _ACTIVE -= 1
+            if _ACTIVE == 0 and _INFLIGHT is not None and _INFLIGHT_SIZE != ASYNC_MAX_INFLIGHT:
+                # a limit change arrived mid-crawl: apply it now that nothing holds the old one
+                _INFLIGHT = None
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _INFLIGHT, _INFLIGHT_SIZE
+    if _INFLIGHT is None:
+        _INFLIGHT_SIZE = ASYNC_MAX_INFLIGHT
+        _INFLIGHT = asyncio.Semaphore(_INFLIGHT_SIZE)
+    return _INFLIGHT
+
+
+async def _get_session():
+    global _SESSION
+    if _SESSION is None or _SESSION.closed:
+        # the semaphore is the real bound; the connector only pools keep-alive sockets
+        connector = aiohttp.TCPConnector(limit=0, ttl_dns_cache=300)
+        _SESSION = aiohttp.ClientSession(connector=connector)
+    return _SESSION
+
+
+async def _close_session():
+    global _SESSION
+    if _SESSION is not None and not _SESSION.closed:
+        await _SESSION.close()
+    _SESSION = None
+
+
+def shutdown():
+    """Close the shared session and stop the background loop (call when a crawl ends).
+
+    The next crawl starts a fresh loop, session and semaphore.
+    """
+    global _LOOP, _LOOP_THREAD, _INFLIGHT
+    with _LOOP_LOCK:
+        loop, _LOOP = _LOOP, None
+        thread, _LOOP_THREAD = _LOOP_THREAD, None
+        # bound to the loop being stopped
+        _INFLIGHT = None
+    if loop is None or loop.is_closed():
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(_close_session(), loop).result(timeout=5)
+        # worker threads of the detail-cache run_in_executor calls
+        asyncio.run_coroutine_threadsafe(loop.shutdown_default_executor(), loop).result(timeout=5)
+    except Exception:
+        pass
+    loop.call_soon_threadsafe(loop.stop)
+    if thread is not None:
+        thread.join(timeout=5)
+    if not loop.is_running():
+        loop.close()
+
+
+async def _safe_get(url: str, params: dict = None, timeout: int = 10, attempts: int = 3) -> Dict[str, Any]:
+    """Async twin of bilibili._safe_get: same retry/412 policy and rate governor, non-blocking sleeps."""
+    last_exc = None
+    session = await _get_session()
+    sem = _get_semaphore()
+    limiter = bilibili._limiter_for(url)
+    for i in range(attempts):
+        headers = bilibili._build_headers()
+        # cookie is configured on the sync session by the GUI; reuse it here
+        cookie = bilibili.SESSION.headers.get("Cookie")
+        if cookie:
+            headers["Cookie"] = cookie
+        proxies = bilibili._choose_proxy()
+        used_proxy = proxies.get('http') if proxies else None
+        try:
+            if limiter is not None:
+                await asyncio.sleep(limiter.reserve())
+            async with sem:
+                async with session.get(
+                    url,
+                    params=params,
+                    headers=headers,
+                    proxy=used_proxy,
+                    timeout=aiohttp.ClientTimeout(total=timeout),
+                ) as r:
+                    status = r.status
+                    text = await r.text()
+                    resp_url = str(r.url)
+            if limiter is None:
+                await asyncio.sleep(0.1 + random.random() * 0.3)
+            if status != 200:
+                bilibili.LAST_RESP = {"status_code": status, "text": text}
+                if used_proxy:
+                    bilibili.report_proxy_result(used_proxy, False)
+                if status in (412, 429):
+                    if limiter is not None:
+                        limiter.on_throttle(str(status))
+                    last_exc = Exception(f"HTTP {status} banned for {resp_url}")
+                    await asyncio.sleep((2 ** i) + random.random() * 2)
+                    continue
+                last_exc = Exception(f"HTTP {status} for {resp_url}")
+                await asyncio.sleep(0.5 * (i + 1))
+                continue
+            try:
+                j = json.loads(text)
+            except ValueError:
+                bilibili.LAST_RESP = {"status_code": status, "text": text}
+                last_exc = Exception("Invalid JSON response")
+                await asyncio.sleep(0.5 * (i + 1))
+                continue
+            bilibili.LAST_RESP = j
+            if limiter is not None:
+                limiter.on_success()
+            if used_proxy:
+                bilibili.report_proxy_result(used_proxy, True)
+            return j
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            last_exc = e
+            bilibili.LAST_RESP = {"error": str(e)}
+            await asyncio.sleep(0.5 * (i + 1) + random.random())
+            continue
+    raise last_exc
+
+
+async def _search_page(keyword: str, page: int = 1, order: str = None, up_mid: int = None) -> Optional[List[Dict[str, Any]]]:
+    """Async twin of bilibili._search_page (None when no variant gave a usable answer)."""
+    for idx, params in bilibili._ordered_search_variants(keyword, page=page, order=order, up_mid=up_mid):
+        try:
+            j = await _safe_get(bilibili.SEARCH_URL, params=params, timeout=8, attempts=3)
+        except Exception:
+            j = None
+        items = bilibili._search_outcome(up_mid, idx, j)
+        if items is not None:
+            return items
+    return None
+
+
+async def search_videos(keyword: str, page: int = 1, order: str = None, up_mid: int = None) -> List[Dict[str, Any]]:
+    return await _search_page(keyword, page=page, order=order, up_mid=up_mid) or []
+
+
+async def _fetch_video_detail(bvid: str) -> Dict[str, Any]:
+    try:
+        j = await _safe_get(bilibili.VIEW_URL, params={"bvid": bvid}, timeout=8, attempts=3)
+    except Exception:
+        return {}
+    return bilibili._extract_video_detail(j)
+
+
+async def get_video_detail(bvid: str) -> Dict[str, Any]:
+    """Same cache policy as bilibili.get_video_detail."""
+    cache = bilibili.DETAIL_CACHE
+    if cache is None:
+        return await _fetch_video_detail(bvid)
+    # SQLite calls take the cache lock and may hit the disk: keep them off the loop
+    loop = asyncio.get_running_loop()
+    cached, fresh = await loop.run_in_executor(None, cache.get, bvid)
+    if cached is not None:
+        if fresh:
+            return cached
+        try:
+            stat = bilibili._extract_stat(await _safe_get(bilibili.STAT_URL, params={"bvid": bvid}, timeout=8, attempts=2))
+        except Exception:
+            stat = {}
+        if stat:
+            await loop.run_in_executor(None, cache.put_stat, bvid, stat)
+            cached["stat"] = stat
+            return cached
+    detail = await _fetch_video_detail(bvid)
+    if detail:
+        await loop.run_in_executor(None, cache.put, bvid, detail)
+        return detail
+    return cached or {}
+
+
+async def _fetch_details(bvids: List[str]) -> Dict[str, Dict[str, Any]]:
+    results = await asyncio.gather(*(get_video_detail(b) for b in bvids), return_exceptions=True)
+    return {b: (res if isinstance(res, dict) else {}) for b, res in zip(bvids, results)}
+
+
+def _search_order():
+    return bilibili.SEARCH_ORDER_MODE if bilibili.SEARCH_ORDER_MODE != "default" else None
+
+
+async def collect_by_keyword_async(
+    keyword: str, pages: int = 2, up_mid: int = None, page: int = None, seen: Dict[str, List[str]] = None
+) -> List[Dict[str, Any]]:
+    """All search pages are requested at once, then every detail at once; the
+    shared semaphore (ASYNC_MAX_INFLIGHT) is the only concurrency bound."""
+    mode = _search_order()
+    page_results = await asyncio.gather(
+        *(search_videos(keyword, page=p, order=mode, up_mid=up_mid) for p in bilibili._page_range(pages, page)),
+        return_exceptions=True,
+    )
+    if seen is None:
+        seen = {}
+    bvid_map = {}
+    bvids = []
+    for items in page_results:
+        if not isinstance(items, list):
+            continue
+        for it in bilibili._claim_bvids(items, seen, keyword):
+            bvids.append(it["bvid"])
+            bvid_map[it["bvid"]] = it
+
+    details_map = await _fetch_details(bvids)
+    return [bilibili._build_entry(keyword, b, bvid_map.get(b, {}), details_map.get(b) or {}) for b in bvids]
+
+
+async def collect_incremental_async(
+    keyword: str, pages: int, up_mid: int = None, seen: Dict[str, List[str]] = None
+) -> List[Dict[str, Any]]:
+    """Async twin of bilibili._collect_incremental (pages are walked in order so paging can stop early)."""
+    loop = asyncio.get_running_loop()
+    # the watermark bookkeeping talks to SQLite: keep it off the loop
+    scan = await loop.run_in_executor(None, bilibili._IncrementalScan, keyword, up_mid, seen)
+    mode = _search_order()
+    for p in range(1, pages + 1):
+        claimed = scan.take_page(await _search_page(keyword, page=p, order=mode, up_mid=up_mid))
+        if claimed is None:
+            break
+        if claimed:
+            scan.add_details(claimed, await _fetch_details([it["bvid"] for it in claimed]))
+        if scan.reached:
+            break
+    return await loop.run_in_executor(None, scan.finish)
+
+
+async def list_up_videos(up_mid: int, page: int = 1, page_size: int = bilibili.SPACE_PAGE_SIZE):
+    """Async twin of bilibili.list_up_videos."""
+    # the WBI key is cached for an hour; the rare refresh runs off-loop
+    key = await asyncio.get_running_loop().run_in_executor(None, bilibili._get_wbi_key)
+    if not key:
+        return None
+    params = bilibili._wbi_sign(bilibili._space_params(up_mid, page, page_size), key)
+    try:
+        j = await _safe_get(bilibili.SPACE_ARC_URL, params=params, timeout=8, attempts=3)
+    except Exception:
+        return None
+    return bilibili._extract_space_items(j)
+
+
+async def _collect_up_by_listing(up_mid: int, max_pages: int, keep=None):
+    """Page 1 gives the total, then the remaining listing pages are requested at once."""
+    first = await list_up_videos(up_mid, page=1)
+    if first is None:
+        return None
+    items, total = first
+    n_pages = min(max_pages, max(1, -(-total // bilibili.SPACE_PAGE_SIZE)))
+    rest = await asyncio.gather(*(list_up_videos(up_mid, page=p) for p in range(2, n_pages + 1)), return_exceptions=True)
+    for res in rest:
+        if isinstance(res, tuple):
+            items.extend(res[0])
+    wanted = list({it["bvid"]: it for it in items if keep is None or keep(it)}.values())
+    details_map = await _fetch_details([it["bvid"] for it in wanted if not bilibili._stat_complete(it.get("stat"))])
+    return [bilibili._build_entry("", it["bvid"], it, details_map.get(it["bvid"]) or {}) for it in wanted]
+
+
+async def collect_all_videos_by_up_async(up_mid: int, max_pages: int = 100, keep=None) -> List[Dict[str, Any]]:
+    out = await _collect_up_by_listing(up_mid, max_pages, keep)
+    if out is not None:
+        return out
+    out = []
+    seen_bvids = set()
+    mode = _search_order()
+    page = 1
+    while page <= max_pages:
+        items = await search_videos("", page=page, order=mode, up_mid=up_mid)
+        if not items:
+            items = await search_videos("视频", page=page, order=mode, up_mid=up_mid)
+        if not items:
+            items = await search_videos(f"up主:{up_mid}", page=page, order=mode)
+        if not items:
+            break
+
+        bvid_map = {}
+        bvids = []
+        new_on_page = 0
+        for it in items:
+            bvid = it.get("bvid")
+            if not bvid or bvid in seen_bvids:
+                continue
+            seen_bvids.add(bvid)
+            new_on_page += 1
+            if keep is not None and not keep(it):
+                continue
+            bvids.append(bvid)
+            bvid_map[bvid] = it
+        if not new_on_page:
+            break
+
+        details_map = await _fetch_details(bvids)
+        for bvid in bvids:
+            it = bvid_map.get(bvid, {})
+            detail = details_map.get(bvid) or {}
+            owner = detail.get("owner") or it.get("owner") or {}
+            owner_mid = owner.get("mid")
+            if owner_mid and str(owner_mid) != str(up_mid):
+                continue
+            out.append(bilibili._build_entry("", bvid, it, detail))
+        page += 1
+    return out
+
+
+def collect_by_keyword(
+    keyword: str,
+    pages: int = 2,
+    up_mid: int = None,
+    incremental: bool = False,
+    page: int = None,
+    seen: Dict[str, List[str]] = None,
+) -> List[Dict[str, Any]]:
+    """Blocking wrapper with the same signature as bilibili.collect_by_keyword."""
+    if incremental and page is not None:
+        raise ValueError("incremental scans page through results themselves; page= cannot be combined with them")
+    if incremental and bilibili._incremental_ready():
+        return run(collect_incremental_async(keyword, pages, up_mid=up_mid, seen=seen))
+    return run(collect_by_keyword_async(keyword, pages=pages, up_mid=up_mid, page=page, seen=seen))
+
+
+def collect_all_videos_by_up(up_mid: int, max_pages: int = 100, keep=None) -> List[Dict[str, Any]]:
+    """Blocking wrapper with the same signature as bilibili.collect_all_videos_by_up."""
+    return run(collect_all_videos_by_up_async(up_mid, max_pages=max_pages, keep=keep))
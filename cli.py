@@ -0,0 +1,107 @@
+"""
+Headless batch runner: scan → aggregate → rank without the tkinter GUI.
+
+示例：
+    python cli.py --config config.json --pages 3 --start 2025-01-01 --end 2025-06-30 --out results
+    python cli.py -k "崩坏3 深渊,崩坏3 记忆战场" --mode up_first --no-llm --format json
+
+结果按榜单写入 --out 目录（overall / abyss / battle），并附带一份包含各阶段耗时的 summary.json，
+便于 cron 定时运行与重复计时。
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+from engine import DEFAULT_KEYWORDS, CATEGORIES, CATEGORY_FILES, RankEngine, parse_date_range, write_leaderboard_csv
+
+
+def _stderr_log(msg: str):
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{timestamp}] {msg}", file=sys.stderr, flush=True)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="B站崩批统计排行榜（无界面批处理）")
+    p.add_argument("--config", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json"),
+                   help="配置文件路径（与 GUI 的 config.json 同格式）")
+    p.add_argument("-k", "--keywords", default=None, help="关键词，逗号分隔（默认使用内置关键词）")
+    p.add_argument("--pages", type=int, default=2, help="每个关键词检索的页数")
+    p.add_argument("--start", default=datetime.now().strftime("%Y-01-01"), help="开始日期 YYYY-MM-DD")
+    p.add_argument("--end", default=datetime.now().strftime("%Y-%m-%d"), help="结束日期 YYYY-MM-DD")
+    p.add_argument("--mode", choices=["keyword", "up_first"], default=None, help="搜索模式（默认取配置文件）")
+    p.add_argument("--no-llm", action="store_true", help="不调用 LLM，仅使用本地加权评级")
+    p.add_argument("--incremental", action="store_true", help="增量检索：只抓取比上次更新的视频（需启用详情缓存）")
+    p.add_argument("--out", default="results", help="输出目录")
+    p.add_argument("--format", choices=["csv", "json"], default="csv", help="榜单输出格式")
+    p.add_argument("-q", "--quiet", action="store_true", help="不输出运行日志")
+    return p
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    engine = RankEngine(log=None if args.quiet else _stderr_log)
+    if os.path.exists(args.config):
+        try:
+            engine.load_config_file(args.config)
+        except Exception as e:
+            _stderr_log(f"加载配置失败: {e}")
+            return 2
+    if args.no_llm:
+        engine.use_llm = False
+    if args.incremental:
+        engine.incremental = True
+
+    keywords = [k.strip() for k in args.keywords.split(",")] if args.keywords else list(DEFAULT_KEYWORDS)
+    start_ts, end_ts = parse_date_range(args.start, args.end)
+    if start_ts is None:
+        _stderr_log("日期格式无效，将不按日期过滤")
+
+    engine.configure_crawler()
+    try:
+        results = engine.run(keywords=keywords, pages=max(1, args.pages), start_ts=start_ts, end_ts=end_ts, search_mode=args.mode)
+    except KeyboardInterrupt:
+        engine.stop_event.set()
+        _stderr_log("已中断")
+        return 130
+    finally:
+        engine.close_crawler()
+    if results is None:
+        _stderr_log("没有可输出的结果")
+        return 1
+
+    os.makedirs(args.out, exist_ok=True)
+    written = {}
+    for category in CATEGORIES:
+        rows = engine.get_results(category)
+        path = os.path.join(args.out, f"{CATEGORY_FILES[category]}.{args.format}")
+        if args.format == "csv":
+            write_leaderboard_csv(path, rows)
+        else:
+            keep = ("mid", "name", "total_videos", "views", "likes", "favorites", "desc_len", "score", "llm_score", "llm_summary", "tag")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump([{k: r.get(k) for k in keep if k in r} for r in rows], f, ensure_ascii=False, indent=2)
+        written[category] = {"path": path, "rows": len(rows)}
+
+    summary = {
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+        "keywords": keywords,
+        "pages": args.pages,
+        "start": args.start,
+        "end": args.end,
+        "mode": args.mode or engine.search_mode,
+        "incremental": engine.incremental,
+        "llm": engine.llm_used_last,
+        "timings": {k: round(v, 3) for k, v in engine.timings.items()},
+        "leaderboards": written,
+    }
+    with open(os.path.join(args.out, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    if not args.quiet:
+        _stderr_log(f"已写出 {len(written)} 个榜单到 {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""
+On-disk SQLite cache for B站 video details, keyed by bvid.
+
+静态字段（标题、简介、发布时间、UP主等）写入后永不过期；stat 计数单独存放，
+超过 stat_ttl 秒后视为过期，由调用方重新拉取。线程安全（单连接 + 锁）。
+同一个库里还保存增量检索用的每关键词高水位（最新 pubdate/bvid）及该关键词已收录的 bvid。
+"""
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Optional, Tuple, List
+
+# fields of the VIEW_URL payload that never change after publishing (plus owner, which rarely does)
+STATIC_FIELDS = ("bvid", "aid", "title", "desc", "pubdate", "ctime", "duration", "tname", "owner")
+
+
+class VideoDetailCache:
+    def __init__(self, path: str, stat_ttl: int = 12 * 3600):
+        self.path = path
+        self.stat_ttl = max(0, int(stat_ttl))
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS video_detail ("
+                " bvid TEXT PRIMARY KEY,"
+                " static_json TEXT NOT NULL,"
+                " stat_json TEXT,"
+                " stat_ts INTEGER NOT NULL DEFAULT 0)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS keyword_watermark ("
+                " keyword TEXT PRIMARY KEY,"
+                " pubdate INTEGER NOT NULL,"
+                " bvid TEXT,"
+                " updated_ts INTEGER NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS keyword_video ("
+                " keyword TEXT NOT NULL,"
+                " bvid TEXT NOT NULL,"
+                " pubdate INTEGER,"
+                " PRIMARY KEY (keyword, bvid))"
+            )
+            self._conn.commit()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.stale = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "stale": self.stale, "misses": self.misses}
+
+    def get(self, bvid: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """Return (detail, stat_fresh).
+
+        detail is None when the bvid was never cached. When stat_fresh is False the
+        returned detail carries the last known stat (or none) and should be refreshed.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT static_json, stat_json, stat_ts FROM video_detail WHERE bvid = ?", (bvid,)
+            ).fetchone()
+        if not row:
+            self.misses += 1
+            return None, False
+        static_json, stat_json, stat_ts = row
+        try:
+            detail = json.loads(static_json)
+        except ValueError:
+            self.misses += 1
+            return None, False
+        if stat_json:
+            try:
+                detail["stat"] = json.loads(stat_json)
+            except ValueError:
+                stat_ts = 0
+        fresh = bool(stat_json) and (time.time() - (stat_ts or 0)) < self.stat_ttl
+        if fresh:
+            self.hits += 1
+        else:
+            self.stale += 1
+        return detail, fresh
+
+    def peek(self, bvid: str) -> Optional[Dict[str, Any]]:
+        """Return the cached detail (with whatever stat it has) without touching hit counters."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT static_json, stat_json FROM video_detail WHERE bvid = ?", (bvid,)
+            ).fetchone()
+        if not row:
+            return None
+        try:
+            detail = json.loads(row[0])
+            if row[1]:
+                detail["stat"] = json.loads(row[1])
+        except ValueError:
+            return None
+        return detail
+
+    def put(self, bvid: str, detail: Dict[str, Any]):
+        """Store a full VIEW_URL payload (static part + stat)."""
+        if not bvid or not isinstance(detail, dict) or not detail:
+            return
+        static = {k: detail[k] for k in STATIC_FIELDS if k in detail}
+        stat = detail.get("stat")
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO video_detail (bvid, static_json, stat_json, stat_ts) VALUES (?, ?, ?, ?)",
+                (
+                    bvid,
+                    json.dumps(static, ensure_ascii=False),
+                    json.dumps(stat, ensure_ascii=False) if isinstance(stat, dict) else None,
+                    int(time.time()) if isinstance(stat, dict) else 0,
+                ),
+            )
+            self._conn.commit()
+
+    def put_stat(self, bvid: str, stat: Dict[str, Any]):
+        """Refresh only the stat counters of an already cached video."""
+        if not bvid or not isinstance(stat, dict):
+            return
+        with self._lock:
+            self._conn.execute(
+                "UPDATE video_detail SET stat_json = ?, stat_ts = ? WHERE bvid = ?",
+                (json.dumps(stat, ensure_ascii=False), int(time.time()), bvid),
+            )
+            self._conn.commit()
+
+    def get_watermark(self, keyword: str) -> Tuple[int, Optional[str]]:
+        """Newest (pubdate, bvid) ingested for keyword; (0, None) if never crawled."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT pubdate, bvid FROM keyword_watermark WHERE keyword = ?", (keyword,)
+            ).fetchone()
+        return (int(row[0]), row[1]) if row else (0, None)
+
+    def set_watermark(self, keyword: str, pubdate: int, bvid: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO keyword_watermark (keyword, pubdate, bvid, updated_ts) VALUES (?, ?, ?, ?)",
+                (keyword, int(pubdate), bvid, int(time.time())),
+            )
+            self._conn.commit()
+
+    def add_keyword_videos(self, keyword: str, rows: List[Tuple[str, int]]):
+        """Remember (bvid, pubdate) pairs already ingested for keyword."""
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO keyword_video (keyword, bvid, pubdate) VALUES (?, ?, ?)",
+                [(keyword, b, p) for b, p in rows],
+            )
+            self._conn.commit()
+
+    def keyword_bvids(self, keyword: str) -> List[str]:
+        """bvids previously ingested for keyword, newest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT bvid FROM keyword_video WHERE keyword = ? ORDER BY pubdate DESC", (keyword,)
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def close(self):
+        with self._lock:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
@@ -0,0 +1,1698 @@
+"""
+GUI-free scan → aggregate → rank pipeline.
+
+App（tkinter）和 cli.py 共用这里的 RankEngine：配置来自 config.json 同结构的 dict，
+日志与进度通过回调输出，因此可以在没有显示器的服务器上定时运行或做性能分析。
+"""
+import concurrent.futures
+import copy
+import csv
+import json
+import itertools
+import os
+import queue
+import re
+import statistics
+import threading
+import time
+import traceback
+from datetime import datetime
+from typing import Dict, Any, List
+
+import requests
+
+try:
+    import numpy as np
+except ImportError:  # optional: scoring falls back to the pure-Python loop
+    np = None
+
+import bilibili
+from bilibili import collect_by_keyword, collect_all_videos_by_up, get_last_response, set_crawl_workers, set_search_order, set_crawl_backend
+from llm_client import LLMClient
+from llm_cache import LLMVerdictCache, bucket_info, verdict_key
+from rate_limiter import AdaptiveConcurrencyLimiter
+
+
+DEFAULT_KEYWORDS = [
+    "崩坏3 深渊",
+    "崩坏3 记忆战场",
+    "崩坏3 凹分",
+    "崩坏3 榜一",
+    "崩坏3 作业",
+    "崩坏3 无限",
+    "崩坏3 寂灭",
+    "崩坏3 红莲",
+    "崩坏3 乐土",
+]
+
+WEIGHT_METRICS = [
+    ("counts", "视频数量"),
+    ("views", "播放量"),
+    ("desc", "简介字数"),
+    ("favorites", "收藏数"),
+    ("likes", "点赞数"),
+]
+
+DEFAULT_WEIGHT_PRESETS = {
+    "normal": {"counts": 0.3, "views": 0.3, "desc": 0.1, "favorites": 0.15, "likes": 0.15},
+    "jm": {"counts": 0.4, "views": 0.3, "desc": 0.1, "favorites": 0.1, "likes": 0.1},
+    "top1": {"counts": 0.5, "views": 0.2, "desc": 0.1, "favorites": 0.1, "likes": 0.1},
+}
+
+CATEGORIES = ["总榜", "深渊榜", "战场榜"]
+# ascii file stems used by the CLI when writing leaderboards to disk
+CATEGORY_FILES = {"总榜": "overall", "深渊榜": "abyss", "战场榜": "battle"}
+
+# lists at least this long are scored with numpy (identical results, see _prepare_weighted_metrics_np)
+NUMPY_MIN_ROWS = 200
+
+CSV_HEADER = ["rank", "up_name", "rating", "videos", "views", "likes", "score", "llm_summary"]
+
+
+def rating_label(score) -> str:
+    """Map a 1-10 score to the rating label shown in the table / CSV ('' when unknown)."""
+    if score is None:
+        return ''
+    try:
+        v = float(score)
+    except Exception:
+        return ''
+    if v >= 8.5:
+        return '夯'
+    if v >= 7.0:
+        return '顶级'
+    if v >= 5.5:
+        return '人上人'
+    if v >= 3.5:
+        return 'NPC'
+    return '拉完了'
+
+
+def parse_date_range(start: str, end: str):
+    """Parse ISO dates into (start_ts, end_ts); both are None if either fails to parse."""
+    try:
+        return int(datetime.fromisoformat(start).timestamp()), int(datetime.fromisoformat(end).timestamp())
+    except Exception:
+        return None, None
+
+
+def write_leaderboard_csv(path: str, rows: List[Dict[str, Any]]):
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(CSV_HEADER)
+        for idx, r in enumerate(rows, start=1):
+            videos = r.get("total_videos") or r.get("videos") or (len(r.get("videos_list") or []))
+            # export textual label rating instead of mid
+            rating = r.get('tag') or rating_label(r.get('llm_score'))
+            w.writerow([idx, r.get("name"), rating, videos, r.get("views") or 0, r.get("likes") or 0, r.get("score"), r.get("llm_summary")])
+
+
+def fetch_from_proxypool(endpoints):
+    """Try to fetch proxy strings from common proxypool endpoints.
+    endpoints: list of base URLs or full endpoints. Return list of proxy strings like 'http://ip:port'."""
+    out = []
+    tried = set()
+    common_paths = ["", "/get", "/api/get", "/proxies", "/api/proxies", "/get_proxy"]
+    headers = {"User-Agent": "proxy-fetcher/1.0"}
+    for base in endpoints:
+        if not base:
+            continue
+        for p in common_paths:
+            url = base.rstrip('/') + p
+            if url in tried:
+                continue
+            tried.add(url)
+            try:
+                r = requests.get(url, timeout=4, headers=headers)
+                if r.status_code != 200:
+                    continue
+                # try parse JSON
+                try:
+                    j = r.json()
+                    # common shapes: list of proxies, or {'proxy': 'ip:port'} or {'data': [...]}
+                    if isinstance(j, list):
+                        for it in j:
+                            if isinstance(it, str) and ':' in it:
+                                out.append(it.strip())
+                    elif isinstance(j, dict):
+                        # check common keys
+                        if 'proxy' in j and isinstance(j['proxy'], str):
+                            out.append(j['proxy'].strip())
+                        if 'data' in j and isinstance(j['data'], list):
+                            for it in j['data']:
+                                if isinstance(it, str) and ':' in it:
+                                    out.append(it.strip())
+                        # some frameworks return {'proxies': [...]}
+                        if 'proxies' in j and isinstance(j['proxies'], list):
+                            for it in j['proxies']:
+                                if isinstance(it, str) and ':' in it:
+                                    out.append(it.strip())
+                except ValueError:
+                    # plain text containing proxy or multiple lines
+                    text = r.text.strip()
+                    for line in text.splitlines():
+                        line = line.strip()
+                        if ':' in line and len(line) > 6:
+                            out.append(line)
+            except Exception:
+                continue
+    # deduplicate and prefix http if missing
+    cleaned = []
+    for p in out:
+        p = p.strip()
+        if p.startswith('http'):
+            cleaned.append(p)
+        else:
+            cleaned.append('http://' + p)
+    # unique preserve order
+    seen = set()
+    res = []
+    for p in cleaned:
+        if p not in seen:
+            seen.add(p)
+            res.append(p)
+    return res
+
+
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+def match_keywords(title, desc, keywords):
+    """Keywords (in order) contained in a video's title or description, ignoring case and search <em> markup."""
+    text_title = _TAG_RE.sub("", title or "").lower()
+    text_desc = (desc or "").lower()
+    return [kw for kw in keywords if kw.lower() in text_title or kw.lower() in text_desc]
+
+
+def in_date_range(pub, start_ts, end_ts):
+    if not (pub and start_ts and end_ts):
+        return True
+    try:
+        return start_ts <= int(pub) <= end_ts
+    except Exception:
+        return True
+
+
+class VideoRecord:
+    """Compact per-video record shared by every leaderboard a video appears on.
+
+    Supports the read-only dict idioms the scoring code uses (rec['views'],
+    rec.get('title')); raw only holds the VIEW_URL payload when the crawler runs
+    with keep_raw_detail enabled.
+    """
+    __slots__ = ("bvid", "mid", "title", "pubdate", "views", "likes", "favorites", "desc_len", "cat", "raw")
+    FIELDS = ("bvid", "title", "views", "likes", "favorites", "desc_len", "pubdate", "cat")
+
+    def __init__(self, bvid, mid, title, pubdate, views, likes, favorites, desc_len, cat, raw=None):
+        self.bvid = bvid
+        self.mid = mid
+        self.title = title
+        self.pubdate = pubdate
+        self.views = views
+        self.likes = likes
+        self.favorites = favorites
+        self.desc_len = desc_len
+        self.cat = cat
+        self.raw = raw
+
+    @classmethod
+    def from_entry(cls, it, mid, cat, keep_raw=False):
+        stat = it.get('stat') or {}
+        return cls(
+            it.get('bvid'),
+            mid,
+            it.get('title') or '',
+            it.get('pubdate'),
+            int(stat.get('view', 0) or 0),
+            int(stat.get('like', 0) or 0),
+            int(stat.get('favorite') or stat.get('favorites') or stat.get('favorite_count') or stat.get('collect') or 0),
+            len((it.get('desc') or it.get('description') or "").strip()),
+            cat,
+            it.get('arc') if keep_raw else None,
+        )
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def to_dict(self):
+        return {k: getattr(self, k) for k in self.FIELDS}
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+
+CATEGORY_KEYS = ("abyss", "battle", "other")
+
+
+def video_category(keywords, title):
+    """abyss / battle / other, judged on every matched keyword plus the title."""
+    kw = ' '.join(k for k in keywords if k)
+    title = title or ''
+    if '深渊' in kw or '深渊' in title:
+        return 'abyss'
+    if '记忆战场' in kw or '记忆战场' in title or '战场' in kw or '战场' in title:
+        return 'battle'
+    return 'other'
+
+
+def _empty_stats():
+    # jm/top1 count titles containing 寂灭/榜一, which select the weight preset
+    return {"count": 0, "views": 0, "likes": 0, "favorites": 0, "desc_len": 0, "jm": 0, "top1": 0}
+
+
+class OwnerAggregator:
+    """Per-owner running totals fed one crawled video at a time.
+
+    add() turns each crawled entry into a VideoRecord and drops the rest of the
+    payload (search item, `arc` detail blob), so memory is bounded by the number
+    of distinct videos rather than by the crawl. A bvid is counted once however
+    many keywords return it; its keyword list may be a live list that keeps
+    growing while the crawl runs (see RankEngine._scan_mode1), and categories
+    are re-checked against it before every build(). Those lists are the crawl's
+    shared `seen` table, so they are only read or extended under bilibili._SEEN_LOCK.
+    """
+
+    def __init__(self, keep_raw=False):
+        self._lock = threading.Lock()
+        self.keep_raw = keep_raw
+        self.by_owner = {}
+        self._videos = {}  # bvid -> (record, keywords list, keywords seen)
+        self.video_count = 0
+        self.duplicates = 0
+
+    def __len__(self):
+        return len(self.by_owner)
+
+    def add(self, it):
+        owner = it.get('owner') or {}
+        mid = owner.get('mid')
+        if not mid:
+            return False
+        bvid = it.get('bvid')
+        keywords = it.get('keywords')
+        if keywords is None:
+            keywords = [it['keyword']] if it.get('keyword') else []
+        with self._lock:
+            known = self._videos.get(bvid) if bvid else None
+            if known is not None:
+                self.duplicates += 1
+                kws = known[1]
+                with bilibili._SEEN_LOCK:
+                    for kw in keywords:
+                        if kw not in kws:
+                            kws.append(kw)
+                    self._recheck(bvid)
+                return False
+            entry = self.by_owner.get(mid)
+            if entry is None:
+                entry = self.by_owner[mid] = {
+                    "name": owner.get('name') or owner.get('uname') or str(mid),
+                    "mid": mid,
+                    "videos": [],
+                    "total": _empty_stats(),
+                    "by": {c: _empty_stats() for c in CATEGORY_KEYS},
+                }
+            with bilibili._SEEN_LOCK:
+                cat = video_category(keywords, it.get('title'))
+                n = len(keywords)
+            rec = VideoRecord.from_entry(it, mid, cat, self.keep_raw)
+            entry['videos'].append(rec)
+            self._bump(entry['total'], rec, 1)
+            self._bump(entry['by'][rec.cat], rec, 1)
+            if bvid:
+                self._videos[bvid] = (rec, keywords, n)
+            self.video_count += 1
+        return True
+
+    @staticmethod
+    def _bump(stats, rec, sign):
+        stats['count'] += sign
+        stats['views'] += sign * rec.views
+        stats['likes'] += sign * rec.likes
+        stats['favorites'] += sign * rec.favorites
+        stats['desc_len'] += sign * rec.desc_len
+        if '寂灭' in rec.title:
+            stats['jm'] += sign
+        if '榜一' in rec.title:
+            stats['top1'] += sign
+
+    def _recheck(self, bvid):
+        # caller holds self._lock and bilibili._SEEN_LOCK
+        rec, keywords, n = self._videos[bvid]
+        if len(keywords) == n:
+            return
+        self._videos[bvid] = (rec, keywords, len(keywords))
+        cat = video_category(keywords, rec.title)
+        if cat != rec.cat:
+            by = self.by_owner[rec.mid]['by']
+            self._bump(by[rec.cat], rec, -1)
+            rec.cat = cat
+            self._bump(by[cat], rec, 1)
+
+    def build(self):
+        """(overall, abyss, battle) leaderboard entries in the shape the scoring code expects.
+
+        videos_list holds the shared VideoRecord objects; nothing is copied per board.
+        """
+        with self._lock:
+            with bilibili._SEEN_LOCK:
+                for bvid in self._videos:
+                    self._recheck(bvid)
+            overall, abyss, battle = [], [], []
+            for mid, v in self.by_owner.items():
+                videos = v['videos']
+                overall.append(self._entry(mid, v['name'], v['total'], list(videos)))
+                abyss.append(self._entry(mid, v['name'], v['by']['abyss'], [r for r in videos if r.cat == 'abyss']))
+                battle.append(self._entry(mid, v['name'], v['by']['battle'], [r for r in videos if r.cat == 'battle']))
+        return overall, abyss, battle
+
+    @staticmethod
+    def _entry(mid, name, stats, videos_subset):
+        return {
+            'mid': mid,
+            'name': name,
+            'total_videos': stats.get('count', 0),
+            'views': stats.get('views', 0),
+            'likes': stats.get('likes', 0),
+            'favorites': stats.get('favorites', 0),
+            'desc_len': stats.get('desc_len', 0),
+            'videos_list': videos_subset or [],
+            'score': 0.0,
+            'has_jm': stats.get('jm', 0) > 0,
+            'has_top1': stats.get('top1', 0) > 0,
+        }
+
+
+class RankEngine:
+    """Holds pipeline settings and the latest leaderboards.
+
+    log(msg) and progress(percent) callbacks are optional and may be called from worker threads.
+    partial(results_by_category) receives a provisional, locally scored leaderboard
+    at most every partial_interval seconds while a crawl is running.
+    llm_update() is called from LLM worker threads whenever new verdicts are queued;
+    with it set, run() returns the locally scored leaderboards right away and the
+    caller folds verdicts in with apply_llm_updates() on its own thread. Without it,
+    run() waits for the LLM pass like before.
+    """
+
+    def __init__(self, log=None, progress=None, partial=None, llm_update=None):
+        self._log_cb = log
+        self._progress_cb = progress
+        self._partial_cb = partial
+        self._llm_update_cb = llm_update
+        self.partial_interval = 2.0
+        self.stop_event = threading.Event()
+        self.cache_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache.sqlite3")
+        self.apply_config({})
+        self.results_unfiltered = {}
+        self.results_by_category_raw = {}
+        self.results_by_category = {}
+        # per category: metric ranges of the raw rows / (raw rows, outlier key, filtered rows, ranges)
+        self._raw_ranges = {}
+        self._filtered_cache = {}
+        self._llm_cache = None
+        # progressive LLM pass: verdicts queue up as (generation, board, mid, verdict)
+        self._llm_queue = queue.Queue()
+        self._llm_gen = 0
+        self._llm_rows = {}
+        self._llm_done = threading.Event()
+        self._llm_done.set()
+        self.llm_used_last = False
+        self.timings = {}
+
+    def log(self, msg: str):
+        if self._log_cb is None:
+            return
+        try:
+            self._log_cb(msg)
+        except Exception:
+            pass
+
+    def progress(self, value: float):
+        if self._progress_cb is None:
+            return
+        try:
+            self._progress_cb(value)
+        except Exception:
+            pass
+
+    # ------------------------------------------------------------------ config
+
+    def apply_config(self, cfg: Dict[str, Any]):
+        """Load settings from a config.json-shaped dict, sanitizing every value."""
+        cfg = cfg if isinstance(cfg, dict) else {}
+        self.provider = cfg.get("provider", "openai")
+        self.api_key = cfg.get("api_key", "") or ""
+        self.api_url = cfg.get("api_url", "") or ""
+        self.llm_model = cfg.get("llm_model", "gpt-3.5-turbo") or "gpt-3.5-turbo"
+        self.use_llm = bool(cfg.get("use_llm", True))
+        self.bili_cookie = cfg.get("bili_cookie", "") or ""
+        self.proxies = cfg.get("proxies", "") or ""
+        self.use_proxy = bool(cfg.get("use_proxy", False))
+        self.use_proxypool = bool(cfg.get("use_proxypool", False))
+        try:
+            self.llm_weight = max(0.0, min(1.0, float(cfg.get("llm_weight", 0.4))))
+        except Exception:
+            self.llm_weight = 0.4
+        try:
+            self.llm_threads = int(cfg.get("llm_threads", 4))
+        except Exception:
+            self.llm_threads = 4
+        try:
+            self.crawl_threads = int(cfg.get("crawl_threads", 3))
+        except Exception:
+            self.crawl_threads = 3
+        self.crawl_backend = "async" if cfg.get("crawl_backend") == "async" else "thread"
+        try:
+            self.async_max_inflight = max(1, min(1000, int(cfg.get("async_max_inflight", 64))))
+        except Exception:
+            self.async_max_inflight = 64
+        self.detail_cache = bool(cfg.get("detail_cache", True))
+        try:
+            self.stat_ttl_hours = max(0.0, float(cfg.get("stat_ttl_hours", 12.0)))
+        except Exception:
+            self.stat_ttl_hours = 12.0
+        try:
+            self.search_rps = max(0.2, float(cfg.get("search_rps", 3.0)))
+            self.view_rps = max(0.2, float(cfg.get("view_rps", 12.0)))
+        except Exception:
+            self.search_rps, self.view_rps = 3.0, 12.0
+        try:
+            self._apply_weight_config(cfg.get("weight_configs"))
+        except Exception:
+            self.weight_configs = copy.deepcopy(DEFAULT_WEIGHT_PRESETS)
+        try:
+            self.outlier_sigma = max(0.5, min(10.0, float(cfg.get("outlier_sigma", 2.5))))
+        except Exception:
+            self.outlier_sigma = 2.5
+        self.exclude_outliers = bool(cfg.get("exclude_outliers", False))
+        bl = cfg.get("blacklist") or []
+        self.banned_upnames = {str(x).strip() for x in bl if str(x).strip()} if isinstance(bl, list) else set()
+        self.search_order = "default" if cfg.get("search_order") == "default" else "time"
+        self.search_mode = "up_first" if cfg.get("search_mode") == "up_first" else "keyword"
+        self.incremental = bool(cfg.get("incremental", False))
+        self.keep_raw_detail = bool(cfg.get("keep_raw_detail", False))
+        self.llm_adaptive = bool(cfg.get("llm_adaptive", True))
+        try:
+            self.llm_max_threads = max(1, min(64, int(cfg.get("llm_max_threads", 16))))
+        except Exception:
+            self.llm_max_threads = 16
+        try:
+            self.llm_prompt_budget = max(0, int(cfg.get("llm_prompt_budget", 250)))
+        except Exception:
+            self.llm_prompt_budget = 250
+        self.llm_stream = bool(cfg.get("llm_stream", True))
+        try:
+            self.llm_deadline = max(0.0, float(cfg.get("llm_deadline", 45.0)))
+        except Exception:
+            self.llm_deadline = 45.0
+        try:
+            self.llm_batch_size = max(1, min(20, int(cfg.get("llm_batch_size", 5))))
+        except Exception:
+            self.llm_batch_size = 5
+        self.llm_cache = bool(cfg.get("llm_cache", True))
+        try:
+            self.llm_cache_hours = max(0.0, float(cfg.get("llm_cache_hours", 72.0)))
+        except Exception:
+            self.llm_cache_hours = 72.0
+        try:
+            self.llm_cache_tolerance = max(0.0, min(1.0, float(cfg.get("llm_cache_tolerance", 0.0))))
+        except Exception:
+            self.llm_cache_tolerance = 0.0
+        self.log_file = str(cfg.get("log_file") or "").strip()
+        try:
+            self.log_max_lines = max(100, int(cfg.get("log_max_lines", 2000)))
+        except Exception:
+            self.log_max_lines = 2000
+
+    def to_config(self) -> Dict[str, Any]:
+        return {
+            "provider": self.provider,
+            "api_key": self.api_key,
+            "api_url": self.api_url,
+            "llm_model": self.llm_model,
+            "use_llm": self.use_llm,
+            "bili_cookie": self.bili_cookie,
+            "proxies": self.proxies,
+            "use_proxy": self.use_proxy,
+            "use_proxypool": self.use_proxypool,
+            "llm_weight": self.llm_weight,
+            "llm_threads": self.llm_threads,
+            "crawl_threads": self.crawl_threads,
+            "crawl_backend": self.crawl_backend,
+            "async_max_inflight": self.async_max_inflight,
+            "detail_cache": self.detail_cache,
+            "stat_ttl_hours": self.stat_ttl_hours,
+            "search_rps": self.search_rps,
+            "view_rps": self.view_rps,
+            "weight_configs": self.weight_configs,
+            "outlier_sigma": self.outlier_sigma,
+            "blacklist": sorted(self.banned_upnames),
+            "search_order": self.search_order,
+            "search_mode": self.search_mode,
+            "incremental": self.incremental,
+            "keep_raw_detail": self.keep_raw_detail,
+            "llm_adaptive": self.llm_adaptive,
+            "llm_max_threads": self.llm_max_threads,
+            "llm_prompt_budget": self.llm_prompt_budget,
+            "llm_stream": self.llm_stream,
+            "llm_deadline": self.llm_deadline,
+            "llm_batch_size": self.llm_batch_size,
+            "llm_cache": self.llm_cache,
+            "llm_cache_hours": self.llm_cache_hours,
+            "llm_cache_tolerance": self.llm_cache_tolerance,
+            "log_file": self.log_file,
+            "log_max_lines": self.log_max_lines,
+        }
+
+    def load_config_file(self, path: str):
+        with open(path, "r", encoding="utf-8") as f:
+            self.apply_config(json.load(f))
+
+    def _apply_weight_config(self, cfg):
+        sanitized = copy.deepcopy(DEFAULT_WEIGHT_PRESETS)
+        if isinstance(cfg, dict):
+            for preset, defaults in DEFAULT_WEIGHT_PRESETS.items():
+                incoming = cfg.get(preset)
+                if not isinstance(incoming, dict):
+                    continue
+                for metric, _ in WEIGHT_METRICS:
+                    try:
+                        val = float(incoming.get(metric, defaults[metric]))
+                    except Exception:
+                        val = defaults[metric]
+                    sanitized[preset][metric] = max(0.0, val)
+        # ensure normalization
+        for preset in sanitized:
+            total = sum(sanitized[preset].values()) or 1.0
+            for metric in sanitized[preset]:
+                sanitized[preset][metric] = sanitized[preset][metric] / total
+        self.weight_configs = sanitized
+
+    def configure_crawler(self):
+        """Push cookie, proxy, concurrency, backend, cache, rate and ordering settings into bilibili."""
+        cookie = self.bili_cookie.strip()
+        if cookie:
+            try:
+                bilibili.SESSION.headers.update({"Cookie": cookie})
+                self.log("已设置 B站 Cookie（仅用于当前会话）")
+            except Exception as e:
+                self.log(f"设置 Cookie 出错: {e}")
+
+        # apply proxy pool if enabled
+        try:
+            if self.use_proxy:
+                proxies = [p.strip() for p in (self.proxies or "").split(",") if p.strip()]
+                if proxies:
+                    bilibili.set_proxy_pool(proxies)
+                    self.log(f"已设置代理池，共 {len(proxies)} 个代理 (启用)")
+                else:
+                    self.log("启用代理池但未提供任何代理字符串")
+            elif self.use_proxypool:
+                # treat proxy_list entries as proxypool endpoints
+                endpoints = [p.strip() for p in (self.proxies or "").split(',') if p.strip()]
+                if endpoints:
+                    fetched = fetch_from_proxypool(endpoints)
+                    if fetched:
+                        bilibili.set_proxy_pool(fetched)
+                        self.log(f"已从 proxypool 拉取并设置代理池，共 {len(fetched)} 个代理")
+                    else:
+                        self.log("未能从 proxypool API 拉取到代理")
+        except Exception as e:
+            self.log(f"设置代理池失败: {e}")
+
+        bilibili.set_keep_raw(self.keep_raw_detail)
+
+        # apply crawl workers setting
+        try:
+            crawl_workers = max(1, min(8, int(self.crawl_threads)))
+            set_crawl_workers(crawl_workers)
+            self.log(f"已设置检索并发数为 {crawl_workers}")
+        except Exception as e:
+            self.log(f"设置检索并发数失败: {e}")
+
+        try:
+            backend = set_crawl_backend(self.crawl_backend)
+            if backend == "async":
+                import bilibili_async
+                bilibili_async.set_max_inflight(self.async_max_inflight)
+                self.log(f"检索引擎: async（全局并发上限 {bilibili_async.ASYNC_MAX_INFLIGHT}）")
+            elif self.crawl_backend == "async":
+                self.log("未安装 aiohttp，检索引擎回退为 thread")
+        except Exception as e:
+            self.log(f"设置检索引擎失败: {e}")
+
+        try:
+            bilibili.set_rate_limits(search_rps=self.search_rps, view_rps=self.view_rps)
+            bilibili.set_rate_listener(lambda name, rate, reason: self.log(f"限速器[{name}] {reason}: 当前 {rate:.2f} 次/秒"))
+            rates = bilibili.get_rate_status()
+            self.log(f"全局限速: 搜索 {rates['search']:.2f}/{self.search_rps:g} 次/秒，详情 {rates['view']:.2f}/{self.view_rps:g} 次/秒（起始/上限）")
+        except Exception as e:
+            self.log(f"设置全局限速失败: {e}")
+
+        try:
+            if self.detail_cache:
+                cache = bilibili.set_detail_cache(self.cache_path, stat_ttl=int(self.stat_ttl_hours * 3600))
+                cache.reset_stats()
+                self.log(f"已启用视频详情缓存（stat 过期时间 {self.stat_ttl_hours:g} 小时）")
+            else:
+                bilibili.set_detail_cache(None)
+        except Exception as e:
+            bilibili.set_detail_cache(None)
+            self.log(f"启用详情缓存失败: {e}")
+
+        try:
+            set_search_order("pubdate" if self.search_order == "time" else "default")
+            self.log(f"检索排序: {'按时间倒序' if self.search_order == 'time' else '默认'}")
+        except Exception as e:
+            self.log(f"设置检索排序失败: {e}")
+
+    def close_crawler(self):
+        """Release crawl resources held between requests (the async backend's session and loop)."""
+        if bilibili.CRAWL_BACKEND != "async":
+            return
+        try:
+            import bilibili_async
+            bilibili_async.shutdown()
+        except Exception as e:
+            self.log(f"关闭 async 检索引擎失败: {e}")
+
+    # ------------------------------------------------------------------ pipeline
+
+    def run(self, keywords: List[str] = None, pages: int = 2, start_ts: int = None, end_ts: int = None, search_mode: str = None):
+        """Crawl, aggregate and rank. Returns results_by_category, or None if nothing was ranked."""
+        keywords = [k.strip() for k in (keywords or DEFAULT_KEYWORDS) if k and k.strip()]
+        mode = search_mode or self.search_mode
+        self.timings = {}
+        t0 = time.perf_counter()
+        if mode == "up_first":
+            if self.incremental:
+                self.log("增量检索仅适用于模式1，模式2 将完整采集")
+            scan = self._scan_mode2(keywords, pages, start_ts, end_ts)
+        elif self.incremental:
+            scan = self._scan_incremental(keywords, pages, start_ts, end_ts)
+        else:
+            scan = self._scan_mode1(keywords, pages, start_ts, end_ts)
+        agg = OwnerAggregator(keep_raw=self.keep_raw_detail)
+        try:
+            ok = self._ingest(scan, agg)
+        finally:
+            self.close_crawler()
+        self.timings["crawl"] = time.perf_counter() - t0
+        if ok is False:
+            return None
+        self.process_aggregated(agg)
+        self.timings["total"] = time.perf_counter() - t0
+        self.log("耗时: " + ", ".join(f"{k}={v:.2f}s" for k, v in self.timings.items()))
+        return self.results_by_category
+
+    def _ingest(self, scan, agg):
+        """Feed every video the scan generator yields into agg; returns the generator's return value."""
+        next_partial = time.monotonic() + self.partial_interval
+        while True:
+            try:
+                it = next(scan)
+            except StopIteration as stop:
+                return stop.value
+            agg.add(it)
+            if self._partial_cb is not None and time.monotonic() >= next_partial:
+                self._emit_partial(agg)
+                next_partial = time.monotonic() + self.partial_interval
+
+    def _emit_partial(self, agg):
+        """Locally scored snapshot of the running aggregation (no LLM, no outlier filter)."""
+        try:
+            ban = {(x or "").strip().lower() for x in self.banned_upnames if (x or "").strip()}
+            boards = [[r for r in lst if (r.get('name') or '').strip().lower() not in ban] for lst in agg.build()]
+            for lst in boards:
+                self._prepare_weighted_metrics(lst)
+                self._apply_local_summaries(lst, log_output=False)
+                lst.sort(key=lambda x: x.get('score', 0), reverse=True)
+            self._partial_cb(dict(zip(CATEGORIES, boards)))
+        except Exception as e:
+            self.log(f"实时榜单更新出错: {e}")
+
+    def _check_banned(self) -> bool:
+        """Stop the scan if the last response was a 412 block."""
+        try:
+            last = get_last_response()
+            if isinstance(last, dict) and last.get('status_code') == 412:
+                self.log("检测到 B站 安全拦截 (412)，当前 IP/请求被封。建议：使用有效的 B站 Cookie、代理或通过浏览器登录并抓取。")
+                self.log("已停止采集以避免进一步封禁。若要继续，请配置 Cookie 或代理后重新开始。")
+                self.stop_event.set()
+                return True
+        except Exception:
+            pass
+        return False
+
+    def _scan_mode1(self, keywords, pages, start_ts, end_ts):
+        """模式1: 按关键词搜索（生成器：每页结果一到就逐条产出）"""
+        total = max(1, len(keywords) * pages)
+        cnt = 0
+
+        # 使用线程池并发处理关键词检索
+        crawl_workers = max(1, min(8, int(self.crawl_threads)))
+        # 所有关键词的所有页共享一个 bvid -> 命中关键词 的表：每个视频只拉取一次详情，
+        # 其他关键词再次命中时只记录关键词
+        seen = {}
+
+        def fetch_keyword_page(kw, p):
+            """获取单个关键词的单个页面"""
+            if self.stop_event.is_set():
+                return []
+            try:
+                items = collect_by_keyword(kw, page=p, seen=seen)
+                self.log(f"已检索关键词 '{kw}' 第 {p} 页，返回 {len(items)} 条结果")
+                if not items and self._check_banned():
+                    return []
+                return items
+            except Exception as e:
+                self.log(f"关键词 '{kw}' 第 {p} 页检索出错: {e}")
+                return []
+
+        # 创建所有任务
+        tasks = []
+        for kw in keywords:
+            for p in range(1, pages + 1):
+                tasks.append((kw, p))
+
+        # 使用线程池并发执行
+        with concurrent.futures.ThreadPoolExecutor(max_workers=crawl_workers) as executor:
+            future_to_task = {executor.submit(fetch_keyword_page, kw, p): (kw, p) for kw, p in tasks}
+            for future in concurrent.futures.as_completed(future_to_task):
+                if self.stop_event.is_set():
+                    break
+                kw, p = future_to_task[future]
+                try:
+                    items = future.result()
+                except Exception as e:
+                    self.log(f"处理关键词 '{kw}' 第 {p} 页结果时出错: {e}")
+                    items = []
+                cnt += 1
+                self.progress((cnt / total) * 100)
+                for it in items:
+                    if not in_date_range(it.get('pubdate'), start_ts, end_ts):
+                        continue
+                    # 直接引用共享表里的关键词列表：后续其他关键词命中同一视频时，聚合器能看到追加的关键词
+                    it['keywords'] = seen.get(it.get('bvid')) or [it.get('keyword') or '']
+                    yield it
+
+        if seen:
+            self.log(f"共命中 {len(seen)} 个不重复视频（已跨关键词去重）")
+
+    def _scan_incremental(self, keywords, pages, start_ts, end_ts):
+        """模式1 的增量版本：每个关键词按发布时间倒序翻页，遇到已收录的高水位即停止。"""
+        if bilibili.SEARCH_ORDER_MODE != "pubdate" or bilibili.DETAIL_CACHE is None:
+            self.log("增量检索需要“按时间倒序”排序并启用详情缓存，本次改为完整采集")
+            yield from self._scan_mode1(keywords, pages, start_ts, end_ts)
+            return
+
+        total = max(1, len(keywords))
+        cnt = 0
+        crawl_workers = max(1, min(8, int(self.crawl_threads)))
+        # 与模式1 相同：跨关键词共享 bvid -> 命中关键词，同一视频只拉取一次详情
+        seen = {}
+
+        def fetch_keyword(kw):
+            if self.stop_event.is_set():
+                return []
+            try:
+                items = collect_by_keyword(kw, pages=pages, incremental=True, seen=seen)
+                self.log(f"增量检索关键词 '{kw}'：合计 {len(items)} 条（含历史收录）")
+                if not items and self._check_banned():
+                    return []
+                return items
+            except Exception as e:
+                self.log(f"关键词 '{kw}' 增量检索出错: {e}")
+                return []
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=crawl_workers) as executor:
+            future_to_kw = {executor.submit(fetch_keyword, kw): kw for kw in keywords}
+            for future in concurrent.futures.as_completed(future_to_kw):
+                if self.stop_event.is_set():
+                    break
+                try:
+                    items = future.result()
+                except Exception as e:
+                    self.log(f"处理关键词 '{future_to_kw[future]}' 增量结果时出错: {e}")
+                    items = []
+                cnt += 1
+                self.progress((cnt / total) * 100)
+                for it in items:
+                    if in_date_range(it.get('pubdate'), start_ts, end_ts):
+                        it['keywords'] = seen.get(it.get('bvid')) or [it.get('keyword') or '']
+                        yield it
+
+    def _scan_mode2(self, keywords, pages, start_ts, end_ts):
+        """模式2: 先搜索崩坏3获取所有UP主，再按关键词搜索每个UP主的视频
+
+        生成器：逐条产出匹配的视频；找不到任何UP主时以 return False 结束。
+        """
+        matched = 0
+
+        # 第一步：搜索"崩坏3"获取所有相关UP主
+        self.log("模式2: 开始搜索'崩坏3'以获取所有相关UP主...")
+        up_mids = set()
+        crawl_workers = max(1, min(8, int(self.crawl_threads)))
+        bh3_seen = {}
+
+        # 搜索"崩坏3"获取UP主列表
+        def fetch_bh3_page(p):
+            """获取崩坏3搜索结果的单个页面"""
+            if self.stop_event.is_set():
+                return []
+            try:
+                items = collect_by_keyword("崩坏3", page=p, seen=bh3_seen)
+                self.log(f"已检索'崩坏3' 第 {p} 页，返回 {len(items)} 条结果")
+                if not items and self._check_banned():
+                    return []
+                return items
+            except Exception as e:
+                self.log(f"'崩坏3' 第 {p} 页检索出错: {e}")
+                return []
+
+        # 获取所有UP主（只保留 mid，搜索结果本身随即丢弃）
+        with concurrent.futures.ThreadPoolExecutor(max_workers=crawl_workers) as executor:
+            futures = [executor.submit(fetch_bh3_page, p) for p in range(1, pages + 1)]
+            for future in concurrent.futures.as_completed(futures):
+                if self.stop_event.is_set():
+                    break
+                try:
+                    for it in future.result():
+                        mid = (it.get('owner') or {}).get('mid')
+                        if mid:
+                            up_mids.add(mid)
+                except Exception as e:
+                    self.log(f"处理'崩坏3'搜索结果时出错: {e}")
+
+        self.log(f"模式2: 从'崩坏3'搜索结果中提取到 {len(up_mids)} 个UP主")
+
+        if not up_mids:
+            self.log("模式2: 未找到任何UP主，停止采集")
+            return False
+
+        # 第二步：对每个UP主，获取其所有视频，然后根据关键词过滤统计
+        self.log(f"模式2: 开始获取 {len(up_mids)} 个UP主的所有视频，然后根据关键词过滤统计...")
+        total_tasks = len(up_mids)
+        cnt = 0
+
+        def keep(item):
+            # 列表条目已带标题/简介/发布时间：不匹配的视频不再请求详情
+            return bool(match_keywords(item.get('title'), item.get('description') or item.get('desc'), keywords)) \
+                and in_date_range(item.get('pubdate'), start_ts, end_ts)
+
+        def fetch_all_up_videos(up_mid):
+            """获取指定UP主的所有视频"""
+            if self.stop_event.is_set():
+                return []
+            try:
+                owner_name = "未知"
+                all_videos = collect_all_videos_by_up(up_mid, keep=keep)
+                if all_videos:
+                    owner = all_videos[0].get('owner') or {}
+                    owner_name = owner.get('name') or owner.get('uname') or str(up_mid)
+                self.log(f"已获取UP主 '{owner_name}' (mid:{up_mid}) 的匹配视频，共 {len(all_videos)} 条")
+                if not all_videos and self._check_banned():
+                    return []
+                return all_videos
+            except Exception as e:
+                self.log(f"获取UP主 {up_mid} 的所有视频时出错: {e}")
+                return []
+
+        # 使用线程池并发获取所有UP主的视频；每个UP主的结果一到就按关键词过滤并产出
+        with concurrent.futures.ThreadPoolExecutor(max_workers=crawl_workers) as executor:
+            future_to_mid = {executor.submit(fetch_all_up_videos, up_mid): up_mid for up_mid in up_mids}
+            for future in concurrent.futures.as_completed(future_to_mid):
+                if self.stop_event.is_set():
+                    break
+                up_mid = future_to_mid[future]
+                try:
+                    videos = future.result()
+                except Exception as e:
+                    self.log(f"处理UP主 {up_mid} 的视频时出错: {e}")
+                    videos = []
+                cnt += 1
+                self.progress((cnt / total_tasks) * 100)
+                # 第三步：根据关键词过滤该UP主的视频
+                for video in videos:
+                    # 检查视频标题或描述包含哪些关键词（全部记录，供分类使用）
+                    matched_keywords = match_keywords(video.get('title'), video.get('desc') or video.get('description'), keywords)
+                    if not matched_keywords or not in_date_range(video.get('pubdate'), start_ts, end_ts):
+                        continue
+                    video['keyword'] = matched_keywords[0]
+                    video['keywords'] = matched_keywords
+                    matched += 1
+                    yield video
+
+        self.log(f"模式2: 关键词过滤完成，共收集 {matched} 条匹配的视频")
+
+    def process_collected_results(self, collected):
+        """处理收集到的结果，进行聚合、评分和LLM分析（一次性传入整份列表时使用）"""
+        agg = OwnerAggregator(keep_raw=self.keep_raw_detail)
+        for it in collected:
+            agg.add(it)
+        self.process_aggregated(agg)
+
+    def process_aggregated(self, agg):
+        """对已聚合的 OwnerAggregator 进行评分和LLM分析"""
+        t_agg = time.perf_counter()
+        if agg.duplicates:
+            self.log(f"合并重复视频 {agg.duplicates} 条（同一视频命中多个关键词）")
+        overall, abyss, battle = agg.build()
+
+        overall.sort(key=lambda x: x['score'], reverse=True)
+        abyss.sort(key=lambda x: x['score'], reverse=True)
+        battle.sort(key=lambda x: x['score'], reverse=True)
+
+        self._prepare_weighted_metrics(overall)
+        self._prepare_weighted_metrics(abyss)
+        self._prepare_weighted_metrics(battle)
+        self.timings["aggregate"] = time.perf_counter() - t_agg
+
+        # optional LLM analysis for top N (use configured LLM settings)
+        t_llm = time.perf_counter()
+        provider = self.provider
+        api_key = self.api_key.strip()
+        api_url = self.api_url.strip() or None
+        llm = None
+        max_workers = 4
+        try:
+            max_workers = max(1, min(10, int(self.llm_threads)))
+        except Exception:
+            max_workers = 4
+        verdicts = None
+        if self.use_llm and provider != 'none':
+            limiter = None
+            if self.llm_adaptive:
+                # llm_threads is only the starting point; the pool is sized for the ceiling
+                limiter = AdaptiveConcurrencyLimiter("llm", initial=max_workers, max_limit=max(max_workers, self.llm_max_threads))
+                limiter.listener = lambda name, limit, reason: self.log(f"LLM 并发调整为 {limit}：{reason}")
+                self.log(f"LLM 自适应并发: 起始 {max_workers}，上限 {limiter.max_limit}")
+                max_workers = limiter.max_limit
+            llm = LLMClient(provider=provider, endpoint=api_url, api_key=api_key, model=self.llm_model, pool_size=max_workers,
+                            stream=self.llm_stream, deadline=self.llm_deadline, limiter=limiter,
+                            prompt_budget=self.llm_prompt_budget)
+            verdicts = self._open_llm_cache()
+
+        # (rows, normalized local scores, top 50 by raw score that go to the LLM)
+        boards = {name: (lst, self._normalize_scores(lst), lst[:50]) for name, lst in (("总榜", overall), ("深渊榜", abyss), ("战场榜", battle))}
+
+        # publish the locally scored boards first; LLM verdicts are blended in as they arrive
+        for lst, lst_norm, tops in boards.values():
+            for r in tops:
+                r['llm_score'] = None
+                r['llm_summary'] = ''
+            if not llm:
+                self._apply_local_summaries(lst)
+                continue
+            for r in lst:
+                r['final_score'] = lst_norm.get(r['mid'], 0.0)
+        if not llm:
+            self.timings["llm"] = time.perf_counter() - t_llm
+
+        self._sort_by_final(overall)
+        self._sort_by_final(abyss)
+        self._sort_by_final(battle)
+
+        for lst in (overall, abyss, battle):
+            for r in lst:
+                r['score'] = round(r.get('final_score', r.get('score', 0)), 3)
+
+        self.llm_used_last = bool(llm)
+        # base dataset: the derived layers never write to these rows, they take
+        # shallow per-row copies (see _row_view) that share videos_list. The one
+        # writer is apply_llm_updates, which blends verdicts into these rows in place
+        # on the thread that owns the results and then rebuilds the affected layers
+        self.results_unfiltered = {
+            "总榜": overall,
+            "深渊榜": abyss,
+            "战场榜": battle,
+        }
+        self.refresh_results_with_blacklist(silent=True)
+        if llm:
+            self._start_llm_jobs(llm, verdicts, boards, max_workers, t_llm)
+            if self._llm_update_cb is None:
+                self.wait_llm()
+        self.log(f"采集完成，共 {agg.video_count} 条视频，聚合后 {len(agg)} 个 UP 主")
+        if bilibili.DETAIL_CACHE is not None:
+            st = bilibili.DETAIL_CACHE.stats()
+            self.log(f"详情缓存: 命中 {st['hits']}，仅刷新 stat {st['stale']}，未命中 {st['misses']}")
+        rates = bilibili.get_rate_status()
+        self.log(f"限速器结束速率: 搜索 {rates['search']:.2f} 次/秒，详情 {rates['view']:.2f} 次/秒")
+
+    # ------------------------------------------------------------------ progressive LLM pass
+
+    def _start_llm_jobs(self, llm, verdicts, boards, max_workers, t_llm):
+        """Queue LLM analysis of each board's top rows on one shared pool and return immediately.
+
+        Cache hits are queued at once; the misses go out in llm_batch_size batches per
+        board, interleaved across boards so no board waits for another to finish.
+        A newer run bumps _llm_gen, which makes the remaining batches of this one no-ops.
+        """
+        self._llm_gen += 1
+        gen = self._llm_gen
+        done_event = threading.Event()
+        self._llm_done = done_event
+        self._llm_rows = {name: ({r['mid']: r for r in tops}, lst_norm) for name, (_, lst_norm, tops) in boards.items()}
+        tolerance = self.llm_cache_tolerance
+        batch_size = self.llm_batch_size
+
+        # cache keys follow the prompt the verdict came from: a run with batching on looks
+        # up batch verdicts, and each verdict is stored under the kind actually sent
+        batched = batch_size > 1
+
+        def cache_key(info, from_batch):
+            return verdict_key(llm.cache_identity(), llm.cache_prompt(bucket_info(info, tolerance), from_batch))
+
+        per_board = []
+        for name, (_, _, tops) in boards.items():
+            pending = []
+            for r in tops:
+                info = {"name": r['name'], 'mid': r['mid'], 'videos': r.get('total_videos'), 'views': r.get('views'), 'likes': r.get('likes'), 'top_videos': r.get('videos_list')[:3]}
+                if verdicts is not None:
+                    cached = verdicts.get(cache_key(info, batched))
+                    if cached is not None:
+                        self._llm_queue.put((gen, name, r['mid'], cached))
+                        continue
+                pending.append((info, r))
+            # a batch never mixes boards: the same mid carries different numbers on each board
+            per_board.append([(name, pending[i:i + batch_size]) for i in range(0, len(pending), batch_size)])
+        batches = [b for group in itertools.zip_longest(*per_board) for b in group if b is not None]
+
+        def run_batch(name, batch):
+            if gen != self._llm_gen:
+                return
+            try:
+                outs = llm.analyze_uploaders([info for info, _ in batch])
+            except Exception as e:
+                names = ", ".join(str(rref.get('name')) for _, rref in batch)
+                self.log(f"LLM 分析 {names} 出错: {e}")
+                self.log(traceback.format_exc())
+                outs = {str(rref['mid']): {"score": None, "summary": f"LLM error: {e}"} for _, rref in batch}
+            for info, rref in batch:
+                out = outs.get(str(rref['mid'])) or {"score": None, "summary": ""}
+                # failed calls and unparseable replies are shown but not cached
+                if (verdicts is not None and isinstance(out, dict) and out.get('score') is not None
+                        and out.get('parsed', True)):
+                    verdicts.put(cache_key(info, bool(out.get('batched'))), out)
+                self._llm_queue.put((gen, name, rref['mid'], out))
+            self._notify_llm()
+
+        def coordinate():
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as ex:
+                futures = [ex.submit(run_batch, name, batch) for name, batch in batches]
+                concurrent.futures.wait(futures)
+            llm.close()
+            if gen == self._llm_gen:
+                self.timings["llm"] = time.perf_counter() - t_llm
+                if verdicts is not None:
+                    st = verdicts.stats()
+                    self.log(f"LLM 结果缓存: 命中 {st['hits']}，调用模型 {st['misses']}")
+                self.log(f"LLM 评价完成，用时 {self.timings['llm']:.1f}s")
+                if llm.limiter is not None:
+                    st = llm.limiter.status()
+                    self.log(
+                        f"LLM 并发: 最终 {st['limit']}，峰值 {st['peak']}，吞吐 {st['per_minute']:.1f} 位UP主/分钟，"
+                        f"429/超时 {st['throttled']} 次"
+                    )
+            done_event.set()
+            self._notify_llm()
+
+        if batches:
+            self.log(f"LLM 评价在后台进行：{sum(len(b) for _, b in batches)} 位UP主，{len(batches)} 个请求")
+        threading.Thread(target=coordinate, daemon=True).start()
+        if not self._llm_queue.empty():
+            self._notify_llm()
+
+    def _notify_llm(self):
+        if self._llm_update_cb is None:
+            return
+        try:
+            self._llm_update_cb()
+        except Exception:
+            pass
+
+    def llm_pending(self) -> bool:
+        return not self._llm_done.is_set()
+
+    def wait_llm(self, timeout=None) -> bool:
+        """Block until the current LLM pass finishes, then fold its verdicts in."""
+        finished = self._llm_done.wait(timeout)
+        self.apply_llm_updates()
+        return finished
+
+    def apply_llm_updates(self) -> bool:
+        """Blend queued LLM verdicts into the leaderboards; returns True if anything changed.
+
+        Call from the thread that owns the results (the Tk thread in the GUI): it
+        writes the verdicts into the results_unfiltered rows, re-sorts the touched
+        boards and rebuilds only their blacklist/outlier layers (re-sorted by the
+        re-blended final_score as well); the other boards keep their rows and cached
+        filter results.
+        """
+        llm_weight = max(0.0, min(1.0, float(self.llm_weight)))
+        changed = set()
+        while True:
+            try:
+                gen, name, mid, out = self._llm_queue.get_nowait()
+            except queue.Empty:
+                break
+            if gen != self._llm_gen:
+                continue
+            rows, lst_norm = self._llm_rows.get(name, ({}, {}))
+            r = rows.get(mid)
+            if r is None:
+                continue
+            self._apply_llm_verdict(r, out, lst_norm.get(mid, 0.0), llm_weight)
+            changed.add(name)
+        if not changed:
+            return False
+        for name in changed:
+            lst = self.results_unfiltered.get(name) or []
+            self._sort_by_final(lst)
+            for r in lst:
+                r['score'] = round(r.get('final_score', r.get('score', 0)), 3)
+        self.refresh_results_with_blacklist(silent=True, log_removed=False, names=changed)
+        return True
+
+    @staticmethod
+    def _sort_by_final(lst):
+        # slice assignment instead of list.sort(): a sort in progress shows other threads
+        # an empty list, and the GUI's filter worker may be reading this board
+        lst[:] = sorted(lst, key=lambda x: x.get('final_score', x.get('score', 0)), reverse=True)
+
+    def _apply_llm_verdict(self, r, out, base_norm, llm_weight):
+        if not isinstance(out, dict):
+            out = {"score": None, "summary": str(out)}
+        llm_score = out.get('score')
+        try:
+            llm_score = float(llm_score)
+        except Exception:
+            llm_score = None
+        if llm_score is None:
+            llm_score = 5.0
+        llm_score = max(1.0, min(10.0, llm_score))
+        r['llm_score'] = llm_score
+        r['llm_summary'] = out.get('summary', '')
+        r['final_score'] = (1.0 - llm_weight) * base_norm + llm_weight * llm_score
+        # write LLM output to app log (truncate to avoid flooding)
+        summary_text = r['llm_summary'] or ''
+        short = (summary_text[:400] + '...') if len(summary_text) > 400 else summary_text
+        self.log(f"LLM 分析 - {r.get('name')} ({r.get('mid')}): score={llm_score}, summary={short}")
+        # also log raw model output if available (truncated)
+        raw_text = out.get('raw') or out.get('_raw') or ''
+        if raw_text:
+            short_raw = (raw_text[:1000] + '...') if len(raw_text) > 1000 else raw_text
+            self.log(f"LLM 原始输出 - {r.get('name')} ({r.get('mid')}): {short_raw}")
+
+    # ------------------------------------------------------------------ scoring
+
+    def _map_label(self, score):
+        try:
+            v = float(score)
+        except Exception:
+            v = 0.0
+        if v >= 8.5:
+            return '夯', 10.0
+        if v >= 7.0:
+            return '顶级', 8.0
+        if v >= 5.5:
+            return '人上人', 6.0
+        if v >= 3.5:
+            return 'NPC', 4.0
+        return '拉完了', 2.0
+
+    def _get_weight_preset(self, preset_key: str):
+        base = DEFAULT_WEIGHT_PRESETS.get(preset_key, DEFAULT_WEIGHT_PRESETS['normal'])
+        custom = self.weight_configs.get(preset_key) if isinstance(self.weight_configs, dict) else None
+        out = base.copy()
+        if isinstance(custom, dict):
+            for metric, _ in WEIGHT_METRICS:
+                try:
+                    val = float(custom.get(metric, out.get(metric, 0.0)))
+                except Exception:
+                    val = out.get(metric, 0.0)
+                out[metric] = max(0.0, val)
+        total = sum(out.values()) or 1.0
+        for k in out:
+            out[k] = out[k] / total
+        return out
+
+    def _norm_value(self, val, mn, mx):
+        try:
+            v = float(val)
+        except Exception:
+            v = 0.0
+        if mx == mn:
+            return 5.0
+        return ((v - mn) / (mx - mn)) * 10.0
+
+    @staticmethod
+    def _metric_ranges(lst):
+        """(min, max) of every raw scoring metric over lst; these only change when the set of rows does."""
+        cols = {
+            "counts": [(x.get('total_videos') or len(x.get('videos_list') or [])) for x in lst],
+            "views": [(x.get('views') or 0) for x in lst],
+            "likes": [(x.get('likes') or 0) for x in lst],
+            "favorites": [(x.get('favorites') or 0) for x in lst],
+            "desc_len": [(x.get('desc_len') or 0) for x in lst],
+        }
+        return {k: ((min(v), max(v)) if v else (0, 0)) for k, v in cols.items()}
+
+    def _prepare_weighted_metrics(self, lst, ranges=None):
+        """Compute weighted_score/_local_metrics for every row.
+
+        ranges: optional _metric_ranges(lst) computed earlier for the same rows, so a
+        weight-only change is a pure arithmetic pass.
+        """
+        if not lst:
+            return
+        if ranges is None:
+            ranges = self._metric_ranges(lst)
+        if np is not None and len(lst) >= NUMPY_MIN_ROWS:
+            self._prepare_weighted_metrics_np(lst, ranges)
+            return
+        cmin, cmax = ranges["counts"]
+        vmin, vmax = ranges["views"]
+        lmin, lmax = ranges["likes"]
+        fmin, fmax = ranges["favorites"]
+        dmin, dmax = ranges["desc_len"]
+
+        for r in lst:
+            counts_val = (r.get('total_videos') or len(r.get('videos_list') or []))
+            views_val = r.get('views') or 0
+            likes_val = r.get('likes') or 0
+            favorites_val = r.get('favorites') or 0
+            desc_len_val = r.get('desc_len') or 0
+
+            counts_n = self._norm_value(counts_val, cmin, cmax)
+            views_n = self._norm_value(views_val, vmin, vmax)
+            likes_n = self._norm_value(likes_val, lmin, lmax)
+            favorites_n = self._norm_value(favorites_val, fmin, fmax)
+            desc_len_n = self._norm_value(desc_len_val, dmin, dmax)
+
+            has_jm, has_top1 = self._rule_flags(r)
+
+            if has_top1:
+                weights = self._get_weight_preset('top1')
+                rule_label = '含榜一'
+            elif has_jm:
+                weights = self._get_weight_preset('jm')
+                rule_label = '含寂灭'
+            else:
+                weights = self._get_weight_preset('normal')
+                rule_label = '常规'
+            w_counts = weights.get('counts', 0.3)
+            w_views = weights.get('views', 0.3)
+            w_desc = weights.get('desc', 0.1)
+            w_fav = weights.get('favorites', 0.15)
+            w_likes = weights.get('likes', 0.15)
+
+            composite = (
+                counts_n * w_counts
+                + views_n * w_views
+                + desc_len_n * w_desc
+                + favorites_n * w_fav
+                + likes_n * w_likes
+            )
+
+            r['weighted_score'] = composite
+            r['_local_metrics'] = {
+                "counts_val": counts_val,
+                "views_val": views_val,
+                "likes_val": likes_val,
+                "favorites_val": favorites_val,
+                "desc_len_val": desc_len_val,
+                "counts_n": counts_n,
+                "views_n": views_n,
+                "likes_n": likes_n,
+                "favorites_n": favorites_n,
+                "desc_len_n": desc_len_n,
+                "rule_label": rule_label,
+            }
+
+    @staticmethod
+    def _rule_flags(r):
+        """(has_jm, has_top1) from the titles in r['videos_list'].
+
+        OwnerAggregator fills both flags in when it builds the leaderboards; rows
+        from elsewhere are scanned once and the result is cached on the row.
+        """
+        if 'has_jm' in r and 'has_top1' in r:
+            return r['has_jm'], r['has_top1']
+        has_jm = False
+        has_top1 = False
+        for vv in (r.get('videos_list') or []):
+            try:
+                t = (vv.get('title') or '')
+                if '寂灭' in t:
+                    has_jm = True
+                if '榜一' in t:
+                    has_top1 = True
+            except Exception:
+                continue
+        r['has_jm'] = has_jm
+        r['has_top1'] = has_top1
+        return has_jm, has_top1
+
+    def _prepare_weighted_metrics_np(self, lst, ranges):
+        """Column-wise twin of _prepare_weighted_metrics.
+
+        Each metric is min-max normalized once over the whole column and the weight
+        preset is picked per row with masks. The composite is summed term by term in
+        the same order as the scalar code (not via a BLAS dot product), so every
+        score is bit-for-bit the same as the loop's.
+        """
+        cols = {
+            "counts": [(x.get('total_videos') or len(x.get('videos_list') or [])) for x in lst],
+            "views": [(x.get('views') or 0) for x in lst],
+            "likes": [(x.get('likes') or 0) for x in lst],
+            "favorites": [(x.get('favorites') or 0) for x in lst],
+            "desc_len": [(x.get('desc_len') or 0) for x in lst],
+        }
+        norm = {}
+        for key, vals in cols.items():
+            arr = np.asarray(vals, dtype=np.float64)
+            mn, mx = ranges[key]
+            norm[key] = np.full(len(arr), 5.0) if mx == mn else ((arr - mn) / (mx - mn)) * 10.0
+
+        flags = [self._rule_flags(r) for r in lst]
+        top1 = np.fromiter((t for _, t in flags), dtype=bool, count=len(lst))
+        jm = np.fromiter((j for j, _ in flags), dtype=bool, count=len(lst)) & ~top1
+        presets = {k: self._get_weight_preset(k) for k in ('top1', 'jm', 'normal')}
+        defaults = {'counts': 0.3, 'views': 0.3, 'desc': 0.1, 'favorites': 0.15, 'likes': 0.15}
+
+        def weight(metric):
+            w = np.full(len(lst), presets['normal'].get(metric, defaults[metric]))
+            w[jm] = presets['jm'].get(metric, defaults[metric])
+            w[top1] = presets['top1'].get(metric, defaults[metric])
+            return w
+
+        composite = (
+            norm["counts"] * weight('counts')
+            + norm["views"] * weight('views')
+            + norm["desc_len"] * weight('desc')
+            + norm["favorites"] * weight('favorites')
+            + norm["likes"] * weight('likes')
+        )
+
+        composite_l = composite.tolist()
+        norm_l = {k: v.tolist() for k, v in norm.items()}
+        for i, r in enumerate(lst):
+            r['weighted_score'] = composite_l[i]
+            r['_local_metrics'] = {
+                "counts_val": cols["counts"][i],
+                "views_val": cols["views"][i],
+                "likes_val": cols["likes"][i],
+                "favorites_val": cols["favorites"][i],
+                "desc_len_val": cols["desc_len"][i],
+                "counts_n": norm_l["counts"][i],
+                "views_n": norm_l["views"][i],
+                "likes_n": norm_l["likes"][i],
+                "favorites_n": norm_l["favorites"][i],
+                "desc_len_n": norm_l["desc_len"][i],
+                "rule_label": '含榜一' if flags[i][1] else ('含寂灭' if flags[i][0] else '常规'),
+            }
+
+    def _normalize_scores(self, lst):
+        vals = [x.get('weighted_score', x.get('score', 0)) for x in lst]
+        if not vals:
+            return {}
+        if np is not None and len(vals) >= NUMPY_MIN_ROWS:
+            arr = np.asarray(vals, dtype=np.float64)
+            mn, mx = arr.min(), arr.max()
+            if mx == mn:
+                return {x['mid']: 5.0 for x in lst}
+            return dict(zip((x['mid'] for x in lst), (((arr - mn) / (mx - mn)) * 10.0).tolist()))
+        mn = min(vals)
+        mx = max(vals)
+        if mx == mn:
+            return {x['mid']: 5.0 for x in lst}
+        out = {}
+        for x in lst:
+            base_val = x.get('weighted_score', x.get('score', 0))
+            out[x['mid']] = self._norm_value(base_val, mn, mx)
+        return out
+
+    def _apply_local_summaries(self, lst, log_output=True):
+        for r in lst:
+            composite = r.get('weighted_score', 5.0)
+            metrics = r.get('_local_metrics') or {}
+            label, val = self._map_label(composite)
+            counts_val = metrics.get('counts_val', r.get('total_videos') or 0)
+            views_val = metrics.get('views_val', r.get('views') or 0)
+            likes_val = metrics.get('likes_val', r.get('likes') or 0)
+            favorites_val = metrics.get('favorites_val', r.get('favorites') or 0)
+            desc_len_val = metrics.get('desc_len_val', r.get('desc_len') or 0)
+            counts_n = metrics.get('counts_n', 5.0)
+            views_n = metrics.get('views_n', 5.0)
+            likes_n = metrics.get('likes_n', 5.0)
+            favorites_n = metrics.get('favorites_n', 5.0)
+            desc_len_n = metrics.get('desc_len_n', 5.0)
+            rule_label = metrics.get('rule_label', '常规')
+
+            r['llm_score'] = val
+            r['llm_summary'] = (
+                f"本地评级({rule_label}): {label} (评分={composite:.2f}); "
+                f"counts={counts_val}({counts_n:.2f}), views={views_val}({views_n:.2f}), "
+                f"desc_len={desc_len_val}({desc_len_n:.2f}), favorites={favorites_val}({favorites_n:.2f}), "
+                f"likes={likes_val}({likes_n:.2f})"
+            )
+            if log_output:
+                self.log(
+                    f"本地加权评级 - {r.get('name')} ({r.get('mid')}): {label}, score={composite:.2f}, "
+                    f"counts={counts_val}, views={views_val}, desc_len={desc_len_val}, "
+                    f"favorites={favorites_val}, likes={likes_val}, rule={rule_label}"
+                )
+            r['final_score'] = composite
+            r['score'] = round(composite, 3)
+
+    def _open_llm_cache(self):
+        """The LLM verdict cache (shares cache.sqlite3 with the detail cache), or None when disabled."""
+        if not self.llm_cache:
+            return None
+        try:
+            if self._llm_cache is None or self._llm_cache.path != self.cache_path:
+                if self._llm_cache is not None:
+                    self._llm_cache.close()
+                self._llm_cache = LLMVerdictCache(self.cache_path, max_age_hours=self.llm_cache_hours)
+            self._llm_cache.max_age_hours = self.llm_cache_hours
+            self._llm_cache.reset_stats()
+            return self._llm_cache
+        except Exception as e:
+            self.log(f"打开 LLM 结果缓存失败: {e}")
+            self._llm_cache = None
+            return None
+
+    # ------------------------------------------------------------------ filters / re-ranking
+
+    def rebuild_filtered_results(self, names=None):
+        """Rebuild filtered results based on current outlier exclusion setting (only `names` if given)."""
+        if names is None:
+            self.results_by_category = self.compute_filtered_results()
+            return
+        results = dict(self.results_by_category)
+        results.update(self.compute_filtered_results(names=names))
+        self.results_by_category = results
+
+    def compute_filtered_results(self, exclude_outliers=None, outlier_sigma=None, names=None):
+        """Build the filtered leaderboards (all, or just `names`) without publishing them.
+
+        Only reads the raw rows and writes fresh row views, so the GUI can run it on a
+        worker thread with a snapshot of the outlier settings and assign the result later.
+        """
+        if exclude_outliers is None:
+            exclude_outliers = self.exclude_outliers
+        if outlier_sigma is None:
+            outlier_sigma = self.outlier_sigma
+        base = self.results_by_category_raw or {}
+        if names is not None:
+            base = {name: base[name] for name in names if name in base}
+        filtered = {}
+        llm_enabled = bool(self.llm_used_last)
+        llm_weight = max(0.0, min(1.0, float(self.llm_weight)))
+        for name, lst in base.items():
+            if not lst:
+                filtered[name] = []
+                continue
+            working_src, ranges = self._filtered_rows(name, lst, exclude_outliers, outlier_sigma)
+            working = [self._row_view(r) for r in working_src]
+            self._prepare_weighted_metrics(working, ranges)
+            if not llm_enabled:
+                self._apply_local_summaries(working, log_output=False)
+                self._sort_by_final(working)
+                filtered[name] = working
+                continue
+
+            lst_norm = self._normalize_scores(working)
+            for r in working:
+                mid = r.get('mid')
+                base_norm = lst_norm.get(mid, r.get('weighted_score', 5.0))
+                llm_score = r.get('llm_score')
+                if llm_score is None:
+                    final = base_norm
+                else:
+                    final = (1.0 - llm_weight) * base_norm + llm_weight * llm_score
+                r['final_score'] = final
+                r['score'] = round(final, 3)
+            self._sort_by_final(working)
+            filtered[name] = working
+        return filtered
+
+    @staticmethod
+    def _row_view(r):
+        """Writable copy of a leaderboard row for a derived layer.
+
+        Scoring only ever reassigns top-level keys (weighted_score, _local_metrics,
+        llm_score, score, ...), so a shallow copy is enough; videos_list and the
+        VideoRecords in it stay shared with the base dataset.
+        """
+        return dict(r)
+
+    def _filtered_rows(self, name, lst, exclude, sigma):
+        """Outlier-filtered rows of a raw leaderboard plus their metric ranges.
+
+        Both depend only on the raw rows and the outlier settings, so they are cached
+        until one of those changes; weight edits reuse them.
+        """
+        key = (bool(exclude), sigma if exclude else None)
+        cached = self._filtered_cache.get(name)
+        if cached is not None and cached[0] is lst and cached[1] == key:
+            return cached[2], cached[3]
+        rows = self._filter_outliers(lst, sigma) if exclude else lst
+        ranges = self._metric_ranges(rows) if rows else None
+        self._filtered_cache[name] = (lst, key, rows, ranges)
+        return rows, ranges
+
+    def _filter_outliers(self, records, sigma=None):
+        """Remove records whose metrics deviate abnormally from the group."""
+        if not records or len(records) < 3:
+            return records
+        metrics = ["total_videos", "views", "favorites", "likes", "desc_len"]
+        thresholds = {}
+        try:
+            sigma = float(self.outlier_sigma if sigma is None else sigma)
+        except Exception:
+            sigma = 2.5
+        sigma = max(0.5, min(10.0, sigma))
+        for metric in metrics:
+            vals = []
+            for r in records:
+                try:
+                    val = float(r.get(metric) or 0)
+                except Exception:
+                    val = 0.0
+                vals.append(val)
+            if len(vals) < 5:
+                continue
+            mean_val = sum(vals) / len(vals)
+            std_val = statistics.pstdev(vals)
+            if std_val == 0:
+                continue
+            thresholds[metric] = mean_val + std_val * sigma
+        if not thresholds:
+            return records
+        filtered = []
+        removed = []
+        for r in records:
+            flagged = False
+            for metric, limit in thresholds.items():
+                try:
+                    value = float(r.get(metric) or 0)
+                except Exception:
+                    value = 0.0
+                if value > limit:
+                    flagged = True
+                    break
+            if flagged:
+                removed.append(r)
+            else:
+                filtered.append(r)
+        if removed:
+            sample_names = ", ".join((x.get("name") or "未知") for x in removed[:3])
+            extra = "" if len(removed) <= 3 else f"...(+{len(removed)-3})"
+            self.log(f"排除 {len(removed)} 个疑似异常UP: {sample_names}{extra}")
+        return filtered or records
+
+    def refresh_results_with_new_weights(self, silent=False, names=None):
+        if not self.results_by_category_raw:
+            return
+        boards = self.results_by_category_raw
+        if names is not None:
+            boards = {name: boards[name] for name in names if name in boards}
+        try:
+            for name, lst in boards.items():
+                self._prepare_weighted_metrics(lst, self._raw_ranges.get(name))
+            if not self.llm_used_last:
+                for lst in boards.values():
+                    self._apply_local_summaries(lst, log_output=not silent)
+            else:
+                llm_weight = max(0.0, min(1.0, float(self.llm_weight)))
+                for lst in boards.values():
+                    norms = self._normalize_scores(lst)
+                    for r in lst:
+                        base_norm = norms.get(r.get('mid'), r.get('weighted_score', 5.0))
+                        llm_score = r.get('llm_score')
+                        if llm_score is None:
+                            final = base_norm
+                        else:
+                            final = (1.0 - llm_weight) * base_norm + llm_weight * llm_score
+                        r['final_score'] = final
+                        r['score'] = round(final, 3)
+            # the re-blend uses post-blacklist normalisation, so the order can change
+            for lst in boards.values():
+                self._sort_by_final(lst)
+            self.rebuild_filtered_results(names)
+        except Exception as e:
+            self.log(f"重算权重时出错: {e}")
+
+    def refresh_results_with_blacklist(self, silent=False, log_removed=True, names=None):
+        """Re-derive the raw/filtered layers from results_unfiltered.
+
+        names limits the work to those boards; the others keep their rows, metric
+        ranges and cached outlier filtering.
+        """
+        base = self.results_unfiltered
+        if not base:
+            return
+        ban = { (x or "").strip().lower() for x in self.banned_upnames if (x or "").strip() }
+        if names is None:
+            filtered_raw = {}
+            targets = list(base)
+        else:
+            filtered_raw = dict(self.results_by_category_raw)
+            targets = [name for name in names if name in base]
+        for name in targets:
+            lst = base[name]
+            source = lst or []
+            cleaned = []
+            removed = []
+            for r in source:
+                uname = (r.get('name') or '').strip()
+                if ban and uname.lower() in ban:
+                    removed.append(uname)
+                    continue
+                cleaned.append(self._row_view(r))
+            filtered_raw[name] = cleaned
+            if removed and log_removed:
+                sample = ", ".join(removed[:3])
+                extra = "" if len(removed) <= 3 else f"...(+{len(removed)-3})"
+                self.log(f"{name}: 黑名单排除 {len(removed)} 个UP: {sample}{extra}")
+        self.results_by_category_raw = filtered_raw
+        ranges = {} if names is None else dict(self._raw_ranges)
+        for name in targets:
+            ranges.pop(name, None)
+            if filtered_raw[name]:
+                ranges[name] = self._metric_ranges(filtered_raw[name])
+        self._raw_ranges = ranges
+        self.refresh_results_with_new_weights(silent=silent, names=None if names is None else targets)
+
+    def get_results(self, category: str) -> List[Dict[str, Any]]:
+        """Current (filtered) leaderboard for a category, falling back to the unfiltered one."""
+        fallback = self.results_by_category_raw.get(category, [])
+        return self.results_by_category.get(category, fallback) or fallback
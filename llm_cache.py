@@ -0,0 +1,115 @@
+"""
+On-disk cache of LLM verdicts (score / summary / tag), keyed by a fingerprint of the prompt.
+
+键 = sha256(provider, model, endpoint, 完整 prompt；批量评价时为只含该 UP 主的批量 prompt，见 LLMClient.cache_prompt)，所以 UP 主的输入数据没变时重复扫描不再调用模型；
+tolerance > 0 时先把播放/点赞/收藏按对数分桶（相对误差约 tolerance）再生成 prompt 计算指纹，
+数字小幅变动仍可命中。超过 max_age_hours 的记录视为过期（<=0 表示永不过期）。线程安全（单连接 + 锁）。
+"""
+import hashlib
+import json
+import math
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Sequence
+
+COUNT_FIELDS = ("views", "likes", "favorites")
+
+
+def bucket_value(value, tolerance: float):
+    """Snap a non-negative count onto a geometric grid with ratio (1 + tolerance)."""
+    try:
+        v = float(value)
+    except Exception:
+        return value
+    if v <= 0:
+        return 0
+    step = math.log1p(tolerance)
+    return int(round(math.exp(round(math.log(v) / step) * step)))
+
+
+def bucket_info(info: Dict[str, Any], tolerance: float) -> Dict[str, Any]:
+    """Copy of an analyze_uploader() input with its counts bucketed; the input itself when tolerance <= 0."""
+    if not tolerance or tolerance <= 0:
+        return info
+    out = dict(info)
+    for k in COUNT_FIELDS:
+        if k in out:
+            out[k] = bucket_value(out[k], tolerance)
+    videos = out.get("top_videos")
+    if isinstance(videos, (list, tuple)):
+        bucketed = []
+        for v in videos:
+            d = v.to_dict() if hasattr(v, "to_dict") else dict(v) if isinstance(v, dict) else v
+            if isinstance(d, dict):
+                for k in COUNT_FIELDS:
+                    if k in d:
+                        d[k] = bucket_value(d[k], tolerance)
+            bucketed.append(d)
+        out["top_videos"] = bucketed
+    return out
+
+
+def verdict_key(identity: Sequence[Any], prompt: str) -> str:
+    payload = json.dumps([list(identity), prompt], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMVerdictCache:
+    def __init__(self, path: str, max_age_hours: float = 72.0):
+        self.path = path
+        self.max_age_hours = float(max_age_hours)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_verdict ("
+                " key TEXT PRIMARY KEY,"
+                " verdict_json TEXT NOT NULL,"
+                " created_ts INTEGER NOT NULL)"
+            )
+            self._conn.commit()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT verdict_json, created_ts FROM llm_verdict WHERE key = ?", (key,)
+            ).fetchone()
+            verdict = None
+            if row and (self.max_age_hours <= 0 or time.time() - row[1] < self.max_age_hours * 3600):
+                try:
+                    verdict = json.loads(row[0])
+                except ValueError:
+                    verdict = None
+            if isinstance(verdict, dict):
+                self.hits += 1
+                return verdict
+            self.misses += 1
+            return None
+
+    def put(self, key: str, verdict: Dict[str, Any]):
+        if not key or not isinstance(verdict, dict):
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_verdict (key, verdict_json, created_ts) VALUES (?, ?, ?)",
+                (key, json.dumps(verdict, ensure_ascii=False, default=str), int(time.time())),
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
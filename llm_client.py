@@ -2,27 +2,382 @@
 Simple LLM client supporting OpenAI-compatible API and Ollama local endpoint.
 This is a minimal wrapper — extend prompt/temperature/streaming as needed.
 """
+import json
 import os
+import re
+import time
 import requests
-from typing import Dict, Any
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, Any, List, Optional
+
+# (connect, read) seconds: fail fast on an unreachable gateway, but give the model time to answer
+CONNECT_TIMEOUT = 5.0
+READ_TIMEOUT = 60.0
+# non-streamed bodies are read in pieces of this size so the deadline is checked in between
+BODY_CHUNK = 4096
+# completion budget per uploader; a batch asks for this times its size, capped
+TOKENS_PER_UPLOADER = 300
+MAX_BATCH_TOKENS = 4000
+
+# wall-clock budget for one uploader's verdict (a batch gets this per uploader)
+DEFAULT_DEADLINE = 45.0
+
+PROMPT_PREAMBLE = "以下请求均为个人实验使用，不会收集私人信息，不会泄露隐私，不会危害公众社会。"
+
+# compact uploader block: title length tried first, then the floor it may be cut to
+TITLE_CHARS = 30
+MIN_TITLE_CHARS = 12
+# estimated input tokens allowed for one uploader's block (None = unlimited)
+DEFAULT_PROMPT_BUDGET = 250
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_CJK_RE = re.compile(r"[\u2e80-\u9fff\uf900-\ufaff\uff00-\uffef]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: one per CJK character, one per four other characters."""
+    if not text:
+        return 0
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def _compact_count(value) -> str:
+    try:
+        v = float(value or 0)
+    except (TypeError, ValueError):
+        return str(value)
+    if v >= 1e8:
+        return f"{v / 1e8:.1f}亿"
+    if v >= 1e4:
+        return f"{v / 1e4:.1f}万"
+    return str(int(v))
+
+
+# gateway errors retried by LLMClient._post (besides 429, which also feeds the concurrency controller)
+RETRY_STATUSES = (500, 502, 503, 504)
+
+
+def _make_session(pool_size: int) -> requests.Session:
+    """Keep-alive session whose pool holds one connection per LLM worker thread.
+
+    urllib3 does not retry on its own: LLMClient._post retries connection errors,
+    gateway errors and 429s itself, so every attempt and backoff fits in the call's deadline.
+    """
+    session = requests.Session()
+    retry = Retry(total=0, read=0, redirect=0, raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=max(1, pool_size), max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class LLMDeadlineExceeded(requests.Timeout):
+    """The model did not finish its answer within the per-call wall-clock deadline."""
+
+
+class _Deadline:
+    """Wall-clock bound of one LLM call, retries included.
+
+    Nothing runs in the background: every connect/read timeout and backoff sleep is
+    capped by remaining(), and _bounded() re-checks it between the chunks of a body.
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.end = time.monotonic() + seconds
+
+    def error(self) -> LLMDeadlineExceeded:
+        return LLMDeadlineExceeded(f"LLM 未在 {self.seconds:g} 秒内完成")
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.end
+
+    def remaining(self) -> float:
+        left = self.end - time.monotonic()
+        if left <= 0:
+            raise self.error()
+        return left
+
+
+def _limit_read(r, seconds: float):
+    """Let the next socket read of r wait at most `seconds`.
+
+    Best effort through urllib3's public HTTPResponse.connection; when that is not
+    available, reads keep the timeout the request was sent with (itself capped by the
+    deadline), so the bound only gets coarser.
+    """
+    sock = getattr(getattr(r.raw, "connection", None), "sock", None)
+    if sock is None:
+        return
+    try:
+        sock.settimeout(seconds)
+    except OSError:
+        pass
+
+
+def _bounded(chunks, r, deadline: "_Deadline" = None):
+    """Yield from a response body iterator, giving up once the deadline has passed."""
+    if deadline is None:
+        yield from chunks
+        return
+    it = iter(chunks)
+    while True:
+        _limit_read(r, deadline.remaining())
+        try:
+            chunk = next(it)
+        except StopIteration:
+            return
+        except requests.RequestException as e:
+            # the shortened read timeout ran out: that is the deadline, not a network fault
+            if deadline.expired():
+                raise deadline.error() from e
+            raise
+        yield chunk
+
+
+def _wanted(value, opener: str) -> bool:
+    """A non-empty object, or an array holding one (not e.g. "{}" or a "[1]" citation in prose)."""
+    if opener == "[":
+        return isinstance(value, list) and any(isinstance(x, dict) and x for x in value)
+    return isinstance(value, dict) and bool(value)
+
+
+def _decode_first(text: str, opener: str = "{"):
+    """First JSON value starting at an `opener` in text that _wanted() accepts, or None.
+
+    Every opener position is tried in turn, so stray brackets in the surrounding prose
+    (closed or not) do not hide the verdict behind them.
+    """
+    if not text:
+        return None
+    decoder = json.JSONDecoder()
+    i = text.find(opener)
+    while i != -1:
+        try:
+            value, _ = decoder.raw_decode(text, i)
+        except ValueError:
+            value = None
+        if _wanted(value, opener):
+            return value
+        i = text.find(opener, i + 1)
+    return None
+
+
+class _JsonWatcher:
+    """Scans streamed model output for the first complete JSON value starting with `opener`.
+
+    feed() returns the text up to and including that value as soon as its closing
+    bracket arrives (and it parses), so the rest of the generation can be dropped.
+    """
+
+    def __init__(self, opener: str = "{"):
+        self.opener = opener
+        self.text = ""
+        self._pos = 0
+        self._start = None
+        self._depth = 0
+        self._in_str = False
+        self._esc = False
+
+    def feed(self, chunk: str) -> Optional[str]:
+        self.text += chunk
+        t = self.text
+        for i in range(self._pos, len(t)):
+            c = t[i]
+            if self._start is None:
+                if c == self.opener:
+                    self._start, self._depth = i, 1
+                continue
+            if self._in_str:
+                if self._esc:
+                    self._esc = False
+                elif c == "\\":
+                    self._esc = True
+                elif c == '"':
+                    self._in_str = False
+                continue
+            if c == '"':
+                self._in_str = True
+            elif c in "{[":
+                self._depth += 1
+            elif c in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    start, self._start = self._start, None
+                    try:
+                        value = json.loads(t[start:i + 1])
+                    except ValueError:
+                        value = None
+                    if not _wanted(value, self.opener):
+                        # stray bracket in prose; look for the next candidate
+                        continue
+                    self._pos = i + 1
+                    return t[:i + 1]
+        self._pos = len(t)
+        return None
 
 
 class LLMClient:
-    def __init__(self, provider: str = "openai", endpoint: str = None, api_key: str = None, model: str = None):
+    def __init__(self, provider: str = "openai", endpoint: str = None, api_key: str = None, model: str = None,
+                 pool_size: int = 4, retries: int = 3, connect_timeout: float = CONNECT_TIMEOUT, read_timeout: float = READ_TIMEOUT,
+                 stream: bool = True, deadline: float = DEFAULT_DEADLINE, limiter=None,
+                 prompt_budget: int = DEFAULT_PROMPT_BUDGET):
         self.provider = provider
         self.endpoint = endpoint
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         self.model = model or "gpt-3.5-turbo"
+        self.timeout = (connect_timeout, read_timeout)
+        # stream tokens and stop reading once the verdict JSON has closed
+        self.stream = bool(stream)
+        self.deadline = float(deadline) if deadline and deadline > 0 else None
+        self.retries = max(0, int(retries))
+        self.prompt_budget = int(prompt_budget) if prompt_budget and prompt_budget > 0 else None
+        # optional rate_limiter.AdaptiveConcurrencyLimiter shared by all worker threads
+        self.limiter = limiter
+        # shared by every worker thread of one scan: TCP/TLS handshakes are paid once per pooled connection
+        self.session = _make_session(pool_size)
+
+    def close(self):
+        try:
+            self.session.close()
+        except Exception:
+            pass
+
+    def cache_identity(self) -> tuple:
+        """Everything besides the prompt that changes the model's verdict (used as a cache key part)."""
+        return (self.provider, self.model, self.endpoint or "")
+
+    def encode_uploader(self, uploader_info: Dict[str, Any], top_videos: list = None) -> str:
+        """Compact, deterministic text block with only the fields that affect the verdict.
+
+        Counts are rounded (万/亿) and HTML stripped from titles. When the block exceeds
+        prompt_budget estimated tokens, titles are cut to MIN_TITLE_CHARS and then
+        videos are dropped from the end until it fits.
+        """
+        if top_videos is None:
+            top_videos = uploader_info.get("top_videos") or []
+        videos = []
+        for v in top_videos:
+            get = v.get if hasattr(v, "get") else (lambda k, d=None: d)
+            title = _TAG_RE.sub("", str(get("title") or "")).strip()
+            stats = f"播放{_compact_count(get('views'))} 点赞{_compact_count(get('likes'))}"
+            if get("favorites") is not None:
+                stats += f" 收藏{_compact_count(get('favorites'))}"
+            videos.append((title, stats))
+        head = [f"UP主: {uploader_info.get('name') or uploader_info.get('mid')}"]
+        if uploader_info.get("videos") is not None:
+            head.append(f"相关视频数: {uploader_info.get('videos')}")
+        head.append(f"总播放: {_compact_count(uploader_info.get('views'))}")
+        head.append(f"总点赞: {_compact_count(uploader_info.get('likes'))}")
+        if uploader_info.get("favorites") is not None:
+            head.append(f"总收藏: {_compact_count(uploader_info.get('favorites'))}")
+
+        def render(count, chars):
+            lines = list(head)
+            if count:
+                lines.append("代表作:")
+                for i, (title, stats) in enumerate(videos[:count], start=1):
+                    short = title if len(title) <= chars else title[:chars] + "…"
+                    lines.append(f"{i}. 《{short}》{stats}")
+            return "\n".join(lines)
+
+        attempts = [(len(videos), TITLE_CHARS)] + [(n, MIN_TITLE_CHARS) for n in range(len(videos), -1, -1)]
+        for count, chars in attempts:
+            text = render(count, chars)
+            if self.prompt_budget is None or estimate_tokens(text) <= self.prompt_budget:
+                return text
+        return text
+
+    def build_prompt(self, uploader_info: Dict[str, Any], top_videos: list = None) -> str:
+        name = uploader_info.get("name") or uploader_info.get("mid")
+        prompt = PROMPT_PREAMBLE + f"请基于以下信息对UP主 '{name}' 评级：夯＞顶级＞人上人＞NPC＞拉完了，并附上评语\n信息：\n"
+        prompt += self.encode_uploader(uploader_info, top_videos) + "\n"
+        prompt += "\n请返回 JSON 格式：{\"score\": number, \"summary\": string, \"tag\": string}"
+        return prompt
+
+    def cache_prompt(self, uploader_info: Dict[str, Any], batched: bool = False) -> str:
+        """The part of the prompt a verdict for this uploader depends on, for the verdict cache key.
+
+        batched verdicts come from build_batch_prompt: same instructions, but this uploader's
+        block only, so the key does not depend on who else shared the request.
+        """
+        if batched:
+            return self.build_batch_prompt([uploader_info])
+        return self.build_prompt(uploader_info)
+
+    def build_batch_prompt(self, infos: List[Dict[str, Any]]) -> str:
+        prompt = PROMPT_PREAMBLE + f"请基于以下信息分别对这 {len(infos)} 位UP主评级：夯＞顶级＞人上人＞NPC＞拉完了，并各附上评语\n"
+        for i, info in enumerate(infos, start=1):
+            prompt += f"\n### UP主 {i}\nmid: {info.get('mid')}\n"
+            prompt += self.encode_uploader(info) + "\n"
+        prompt += "\n请只返回一个 JSON 数组，每位UP主一项，mid 与上面给出的一致：[{\"mid\": number, \"score\": number, \"summary\": string, \"tag\": string}]"
+        return prompt
+
+    def analyze_uploaders(self, infos: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Analyse several uploaders with one request; returns {str(mid): verdict}.
+
+        Uploaders missing from the reply (or every one, if the reply is not a JSON array)
+        are retried one by one through analyze_uploader(). A batch that times out or loses
+        its connection is split in half and each half retried, down to single uploaders,
+        whose failure becomes an "LLM error" verdict for that uploader only. Verdicts taken
+        from the batch reply carry batched=True (see cache_prompt).
+        """
+        if len(infos) <= 1 or self.provider not in ("openai", "ollama"):
+            return {str(info.get("mid")): self.analyze_uploader(info) for info in infos}
+        max_tokens = min(MAX_BATCH_TOKENS, TOKENS_PER_UPLOADER * len(infos))
+        prompt = self.build_batch_prompt(infos)
+        deadline = self.deadline * len(infos) if self.deadline else None
+        try:
+            text = self._complete(prompt, max_tokens, deadline, "[", units=len(infos))
+            items = self._parse_json_array(text)
+        except (requests.ConnectionError, requests.Timeout):
+            # one slow or dropped reply must not cost every uploader in it a verdict
+            half = len(infos) // 2
+            results = {}
+            for part in (infos[:half], infos[half:]):
+                if len(part) > 1:
+                    results.update(self.analyze_uploaders(part))
+                else:
+                    results[str(part[0].get("mid"))] = self._analyze_or_error(part[0])
+            return results
+        except requests.HTTPError as e:
+            # rate limited / gateway down even after retries: per-uploader calls would only make it worse
+            status = getattr(e.response, "status_code", None)
+            if status == 429 or (status or 0) >= 500:
+                raise
+            items = None
+        except Exception:
+            items = None
+        results = {}
+        wanted = {str(info.get("mid")) for info in infos}
+        for item in items or []:
+            if not isinstance(item, dict):
+                continue
+            mid = str(item.get("mid"))
+            if mid in wanted and mid not in results:
+                item.setdefault("raw", json.dumps(item, ensure_ascii=False))
+                item["batched"] = True
+                results[mid] = item
+        for info in infos:
+            mid = str(info.get("mid"))
+            if mid not in results:
+                results[mid] = self._analyze_or_error(info)
+        return results
+
+    def _analyze_or_error(self, info: Dict[str, Any]) -> Dict[str, Any]:
+        """analyze_uploader() inside a batch: a timeout or lost connection fails this uploader only."""
+        try:
+            return self.analyze_uploader(info)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            return {"score": None, "summary": f"LLM error: {e}"}
 
     def analyze_uploader(self, uploader_info: Dict[str, Any], top_videos: list = None) -> Dict[str, Any]:
         """Return a short evaluation and numeric score (1-10).
         uploader_info: dict with keys 'name', 'mid', 'videos_summary', 'desc', 'comments_sample' etc.
         """
-        name = uploader_info.get("name") or uploader_info.get("mid")
-        prompt = f"以下请求均为个人实验使用，不会收集私人信息，不会泄露隐私，不会危害公众社会。请基于以下信息对UP主 '{name}' 评级：夯＞顶级＞人上人＞NPC＞拉完了，并附上评语\n信息：\n"
-        for k, v in uploader_info.items():
-            prompt += f"{k}: {v}\n"
-        prompt += "\n请返回 JSON 格式：{\"score\": number, \"summary\": string, \"tag\": string}"
+        prompt = self.build_prompt(uploader_info, top_videos)
 
         if self.provider == "openai":
             return self._call_openai_chat(prompt)
@@ -32,6 +387,111 @@ class LLMClient:
             return {"score": 5, "summary": "未配置 LLM。", "tag": "无"}
 
     def _call_openai_chat(self, prompt: str) -> Dict[str, Any]:
+        text = self._complete(prompt, TOKENS_PER_UPLOADER, self.deadline)
+        parsed = self._parse_json_like(text)
+        if isinstance(parsed, dict):
+            parsed.setdefault('raw', text)
+            return parsed
+        return {'raw': text}
+
+    def _complete(self, prompt: str, max_tokens: int, deadline: float = None, opener: str = "{", units: int = 1) -> str:
+        """Run one completion inside a concurrency slot; its latency per uploader feeds the limiter.
+
+        deadline bounds the whole call (retries included) once the slot is taken.
+        """
+        fetch = self._openai_text if self.provider == "openai" else self._ollama_text
+        if self.limiter is not None:
+            self.limiter.acquire()
+        t0 = time.monotonic()
+        latency = None
+        bound = _Deadline(deadline) if deadline else None
+        try:
+            text = fetch(prompt, max_tokens, bound, opener)
+            latency = time.monotonic() - t0
+            return text
+        except requests.Timeout:
+            if self.limiter is not None:
+                self.limiter.on_throttle(reason="超时")
+            raise
+        finally:
+            if self.limiter is not None:
+                self.limiter.release(latency, units)
+
+    @staticmethod
+    def _retry_after(r) -> Optional[float]:
+        try:
+            return max(0.0, float(r.headers.get("Retry-After")))
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _backoff(seconds: float, deadline: "_Deadline" = None):
+        """Sleep before a retry, or give up right away if that would cross the deadline."""
+        if deadline is not None and seconds >= deadline.remaining():
+            raise deadline.error()
+        time.sleep(seconds)
+
+    def _post(self, url: str, data: Dict[str, Any], headers: Dict[str, str] = None, deadline: "_Deadline" = None):
+        """POST with retries on connection errors, 5xx and 429; the body is left unread for the caller.
+
+        A read timeout is not retried: the gateway may already be generating, don't pay for it twice.
+        """
+        for attempt in range(self.retries + 1):
+            connect, read = self.timeout
+            if deadline is not None:
+                # no single attempt may outlast what is left of the deadline
+                left = deadline.remaining()
+                connect, read = min(connect, left), min(read, left)
+            try:
+                r = self.session.post(url, json=data, headers=headers, timeout=(connect, read), stream=True)
+            except requests.ConnectionError as e:
+                # includes ConnectTimeout; a read timeout below is not retried
+                if deadline is not None and deadline.expired():
+                    raise deadline.error() from e
+                if attempt == self.retries:
+                    raise
+                self._backoff(min(30.0, 2.0 ** attempt), deadline)
+                continue
+            except requests.Timeout as e:
+                if deadline is not None and deadline.expired():
+                    raise deadline.error() from e
+                raise
+            if r.status_code == 429:
+                wait = self._retry_after(r)
+                if self.limiter is not None:
+                    self.limiter.on_throttle(wait)
+            elif r.status_code in RETRY_STATUSES:
+                wait = None
+            else:
+                break
+            if attempt == self.retries:
+                break
+            r.close()
+            self._backoff(wait if wait is not None else min(30.0, 2.0 ** attempt), deadline)
+        r.raise_for_status()
+        return r
+
+    def _read_stream(self, r, piece_of, deadline: "_Deadline" = None, opener: str = "{") -> str:
+        """Accumulate streamed pieces until the JSON verdict closes, the stream ends or the deadline passes."""
+        watcher = _JsonWatcher(opener)
+        try:
+            # chunk_size=None hands over each transfer chunk as soon as it arrives
+            for line in _bounded(r.iter_lines(chunk_size=None), r, deadline):
+                if not line:
+                    continue
+                piece, done = piece_of(line.decode("utf-8", errors="replace"))
+                if piece:
+                    closed = watcher.feed(piece)
+                    if closed is not None:
+                        return closed
+                if done:
+                    break
+        finally:
+            # closing mid-body drops the connection, which is what stops the generation server-side
+            r.close()
+        return watcher.text
+
+    def _openai_text(self, prompt: str, max_tokens: int, deadline: "_Deadline" = None, opener: str = "{") -> str:
         # resolve URL: allow self.endpoint to be a full path or a base URL
         if self.endpoint:
             ep = self.endpoint.rstrip('/')
@@ -53,13 +513,16 @@ class LLMClient:
         data = {
             "model": self.model,
             "messages": [{"role": "user", "content": prompt}],
-            "max_tokens": 300,
+            "max_tokens": max_tokens,
             "temperature": 0.2,
         }
-        r = requests.post(url, json=data, headers=headers, timeout=30)
-        r.raise_for_status()
+        if self.stream:
+            data["stream"] = True
+        r = self._post(url, data, headers, deadline)
+        if self.stream and "text/event-stream" in r.headers.get("Content-Type", ""):
+            return self._read_stream(r, self._openai_piece, deadline, opener)
         # extract text content in a tolerant way
-        j = r.json()
+        j = json.loads(self._read_body(r, deadline))
         # OpenAI-compatible response
         try:
             text = j["choices"][0]["message"]["content"]
@@ -68,38 +531,76 @@ class LLMClient:
             text = j.get("output", j.get("text", ""))
             if isinstance(text, list):
                 text = "\n".join([t.get("content", "") if isinstance(t, dict) else str(t) for t in text])
+        return text
+
+    def _call_ollama(self, prompt: str) -> Dict[str, Any]:
+        text = self._complete(prompt, TOKENS_PER_UPLOADER, self.deadline)
         parsed = self._parse_json_like(text)
         if isinstance(parsed, dict):
             parsed.setdefault('raw', text)
             return parsed
         return {'raw': text}
 
-    def _call_ollama(self, prompt: str) -> Dict[str, Any]:
+    @staticmethod
+    def _openai_piece(line: str):
+        # server-sent events: "data: {chunk}" ... "data: [DONE]"
+        if not line.startswith("data:"):
+            return "", False
+        payload = line[5:].strip()
+        if payload == "[DONE]":
+            return "", True
+        try:
+            j = json.loads(payload)
+            return j["choices"][0].get("delta", {}).get("content") or "", False
+        except Exception:
+            return "", False
+
+    def _ollama_text(self, prompt: str, max_tokens: int, deadline: "_Deadline" = None, opener: str = "{") -> str:
         # default ollama endpoint
         endpoint = self.endpoint or "http://127.0.0.1:11434/api/generate"
-        data = {"model": self.model or "llama2", "prompt": prompt, "max_tokens": 300}
-        r = requests.post(endpoint, json=data, timeout=30)
-        r.raise_for_status()
-        text = r.text
-        parsed = self._parse_json_like(text)
-        if isinstance(parsed, dict):
-            parsed.setdefault('raw', text)
-            return parsed
-        return {'raw': text}
+        data = {"model": self.model or "llama2", "prompt": prompt, "stream": self.stream,
+                "options": {"num_predict": max_tokens}}
+        r = self._post(endpoint, data, deadline=deadline)
+        if self.stream:
+            return self._read_stream(r, self._ollama_piece, deadline, opener)
+        body = self._read_body(r, deadline)
+        try:
+            return json.loads(body).get("response") or ""
+        except ValueError:
+            return body
+
+    @staticmethod
+    def _read_body(r, deadline: "_Deadline" = None) -> str:
+        """Whole (non-streamed) response body, read in chunks so the deadline is checked as it arrives."""
+        try:
+            body = b"".join(_bounded(r.iter_content(chunk_size=BODY_CHUNK), r, deadline))
+        finally:
+            r.close()
+        return body.decode(r.encoding or "utf-8", errors="replace")
+
+    @staticmethod
+    def _ollama_piece(line: str):
+        # NDJSON: {"response": "...", "done": false} per line
+        try:
+            j = json.loads(line)
+        except ValueError:
+            return "", False
+        return j.get("response") or "", bool(j.get("done"))
+
+    def _parse_json_array(self, text: str):
+        """First JSON array of verdict objects in model output, or None."""
+        return _decode_first(text, "[")
 
     def _parse_json_like(self, text: str) -> Dict[str, Any]:
         # try to extract a JSON object from model output heuristically
-        import re, json
+        # fallbacks carry parsed=False: shown like a verdict, but never cached as one
         if not text:
-            return {"score": 6, "summary": "", "tag": "无"}
-        m = re.search(r"\{[\s\S]*\}", text)
-        if not m:
+            return {"score": 6, "summary": "", "tag": "无", "parsed": False}
+        parsed = _decode_first(text, "{")
+        if parsed is None:
             # if not JSON, return the raw text as summary
-            return {"score": 6, "summary": text.strip(), "tag": "无"}
-        try:
-            return json.loads(m.group(0))
-        except Exception:
-            return {"score": 6, "summary": text.strip(), "tag": "无"}
+            return {"score": 6, "summary": text.strip(), "tag": "无", "parsed": False}
+        return parsed
 
     def test_connection(self) -> Dict[str, Any]:
         """Test connectivity to the configured provider. Returns dict with 'ok' and 'msg'."""
@@ -128,14 +629,14 @@ class LLMClient:
                     "messages": [{"role": "user", "content": "测试连接"}],
                     "max_tokens": 1,
                 }
-                r = requests.post(url, json=data, headers=headers, timeout=10)
+                r = self.session.post(url, json=data, headers=headers, timeout=(self.timeout[0], 10))
                 if r.status_code == 200:
                     return {"ok": True, "msg": "OpenAI-compatible 服务连接成功"}
                 return {"ok": False, "msg": f"HTTP {r.status_code}: {r.text[:200]}"}
             elif self.provider == "ollama":
                 endpoint = self.endpoint or "http://127.0.0.1:11434/api/generate"
                 data = {"model": self.model or "llama2", "prompt": "测试连接", "max_tokens": 1}
-                r = requests.post(endpoint, json=data, timeout=10)
+                r = self.session.post(endpoint, json=data, timeout=(self.timeout[0], 10))
                 if r.status_code == 200:
                     return {"ok": True, "msg": "Ollama 连接成功"}
                 return {"ok": False, "msg": f"HTTP {r.status_code}: {r.text[:200]}"}
@@ -0,0 +1,65 @@
+"""
+Thread-safe ring buffer for run logs, drained by the GUI in batches.
+
+工作线程只需 write() 一行（加锁追加到定长 deque，不碰 Tk）；界面线程定时 drain()
+一次性写入文本框。缓冲区满时丢弃最旧的行并计数。可选同时写入按大小轮转的日志文件。
+"""
+import logging
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from typing import List, Optional, Tuple
+
+
+class LogSink:
+    def __init__(self, capacity: int = 5000):
+        self._buf = deque(maxlen=max(1, int(capacity)))
+        self._lock = threading.Lock()
+        self._dropped = 0
+        self._file_path: Optional[str] = None
+        self._logger: Optional[logging.Logger] = None
+
+    def write(self, msg: str):
+        line = f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {msg}"
+        with self._lock:
+            if len(self._buf) == self._buf.maxlen:
+                self._dropped += 1
+            self._buf.append(line)
+            logger = self._logger
+        if logger is not None:
+            try:
+                logger.info(line)
+            except Exception:
+                pass
+
+    def drain(self) -> Tuple[List[str], int]:
+        """Take every buffered line; also returns how many were dropped since the last drain."""
+        with self._lock:
+            lines = list(self._buf)
+            self._buf.clear()
+            dropped, self._dropped = self._dropped, 0
+        return lines, dropped
+
+    def set_file(self, path: Optional[str], max_bytes: int = 2 * 1024 * 1024, backups: int = 3):
+        """Mirror every line to a rotating log file; a falsy path turns the mirror off."""
+        path = os.path.abspath(path) if path else None
+        if path == self._file_path:
+            return
+        logger = None
+        if path:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger = logging.Logger(f"log_sink.{id(self)}", logging.INFO)
+            logger.addHandler(handler)
+        with self._lock:
+            old, self._logger, self._file_path = self._logger, logger, path
+        if old is not None:
+            for h in list(old.handlers):
+                old.removeHandler(h)
+                h.close()
+
+    def close(self):
+        self.set_file(None)
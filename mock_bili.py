@@ -0,0 +1,419 @@
+"""
+Local stand-in for the Bilibili web API, for offline crawl testing and benchmarking.
+
+提供 bilibili.py 用到的全部接口（搜索 / 视频详情 / 计数 / 投稿列表 / nav 的 WBI 密钥），
+数据来自录制的 fixture 文件或按种子生成的合成数据；可配置延迟、抖动、5xx 错误率、
+412/429 注入，以及超过 max_rps 时返回 412 的“风控”。每个接口按状态码计数，供 bench_crawl.py 统计。
+
+示例：
+    python mock_bili.py --port 8765 --latency 0.05 --rate-412 0.02
+    BILI_API_BASE=http://127.0.0.1:8765 python cli.py --no-llm
+    python mock_bili.py --record fixtures.json -k "崩坏3 深渊" --pages 2   # 从真实接口录制（会产生真实请求）
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.parse
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+import bilibili
+
+SEARCH_PAGE_SIZE = 20
+SYNTH_TOPICS = ("崩坏3 深渊", "崩坏3 记忆战场", "崩坏3 寂灭", "崩坏3 榜一", "崩坏3 攻略")
+
+
+def _path(url: str) -> str:
+    return urllib.parse.urlsplit(url).path
+
+
+# endpoint name -> URL path, taken from bilibili.py so the two can't drift apart
+ENDPOINTS = {
+    _path(bilibili.SEARCH_URL): "search",
+    _path(bilibili.VIEW_URL): "view",
+    _path(bilibili.STAT_URL): "stat",
+    _path(bilibili.SPACE_ARC_URL): "space",
+    _path(bilibili.NAV_URL): "nav",
+}
+# which server-side rate bucket each endpoint draws from (mirrors bilibili.RATE_LIMITERS)
+RATE_FAMILY = {"search": "search", "space": "search", "view": "view", "stat": "view"}
+
+
+def synthetic_fixtures(uploaders: int = 40, videos_per_up: int = 25, seed: int = 0) -> Dict[str, Any]:
+    """A reproducible world of `uploaders` x `videos_per_up` videos in VIEW_URL payload shape."""
+    rng = random.Random(seed)
+    alphabet = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+    base_ts = 1735660800  # 2025-01-01
+    videos = {}
+    for u in range(uploaders):
+        mid = 10000 + u
+        name = f"舰长{u:03d}"
+        # a few heavy hitters, a long tail of small uploaders
+        scale = rng.lognormvariate(9, 1.2)
+        for v in range(videos_per_up):
+            bvid = "BV1" + "".join(rng.choice(alphabet) for _ in range(9))
+            views = int(scale * rng.lognormvariate(0, 0.8))
+            videos[bvid] = {
+                "bvid": bvid,
+                "aid": rng.randint(10 ** 8, 10 ** 9),
+                "title": f"{rng.choice(SYNTH_TOPICS)} 第{v + 1}期",
+                "desc": "配队与打法说明。" * rng.randint(0, 12),
+                "pubdate": base_ts + rng.randint(0, 300 * 86400),
+                "owner": {"mid": mid, "name": name},
+                "stat": {
+                    "view": views,
+                    "like": int(views * rng.uniform(0.02, 0.08)),
+                    "favorite": int(views * rng.uniform(0.005, 0.03)),
+                    "reply": int(views * rng.uniform(0.001, 0.01)),
+                    "danmaku": int(views * rng.uniform(0.001, 0.02)),
+                },
+            }
+    return {"search": {}, "videos": videos}
+
+
+def load_fixtures(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return {"search": data.get("search") or {}, "videos": data.get("videos") or {}}
+
+
+def save_fixtures(path: str, fixtures: Dict[str, Any]):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(fixtures, f, ensure_ascii=False, indent=1)
+
+
+def record_fixtures(keywords: List[str], pages: int = 2) -> Dict[str, Any]:
+    """Capture search pages and video details from whatever API bilibili.py currently points at.
+
+    Goes through bilibili._safe_get, so the usual rate governor and backoff apply.
+    """
+    search: Dict[str, List[List[Dict[str, Any]]]] = {}
+    bvids = []
+    for kw in keywords:
+        search[kw] = []
+        for page in range(1, pages + 1):
+            items = bilibili.search_videos(kw, page=page, order="pubdate")
+            if not items:
+                break
+            search[kw].append(items)
+            bvids.extend(it["bvid"] for it in items if it.get("bvid"))
+    details = bilibili._fetch_details(list(dict.fromkeys(bvids)))
+    return {"search": search, "videos": {b: d for b, d in details.items() if d}}
+
+
+def _search_item(d: Dict[str, Any]) -> Dict[str, Any]:
+    stat = d.get("stat") or {}
+    owner = d.get("owner") or {}
+    return {
+        "type": "video",
+        "bvid": d.get("bvid"),
+        "aid": d.get("aid"),
+        "title": d.get("title"),
+        "description": d.get("desc"),
+        "pubdate": d.get("pubdate"),
+        "mid": owner.get("mid"),
+        "author": owner.get("name"),
+        "play": stat.get("view", 0),
+        "like": stat.get("like", 0),
+        "favorites": stat.get("favorite", 0),
+    }
+
+
+def _space_item(d: Dict[str, Any]) -> Dict[str, Any]:
+    stat = d.get("stat") or {}
+    owner = d.get("owner") or {}
+    return {
+        "bvid": d.get("bvid"),
+        "aid": d.get("aid"),
+        "title": d.get("title"),
+        "description": d.get("desc"),
+        "created": d.get("pubdate"),
+        "mid": owner.get("mid"),
+        "author": owner.get("name"),
+        "play": stat.get("view", 0),
+        "comment": stat.get("reply", 0),
+        "video_review": stat.get("danmaku", 0),
+    }
+
+
+class MockBiliServer:
+    def __init__(
+        self,
+        fixtures: Dict[str, Any] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_412: float = 0.0,
+        rate_429: float = 0.0,
+        max_rps: float = 0.0,
+        search_pages: int = 5,
+        seed: int = 0,
+    ):
+        """
+        latency/jitter: seconds added to every response (latency + uniform(0, jitter)).
+        error_rate / rate_412 / rate_429: probability of answering 500 / 412 / 429 instead.
+        max_rps: per rate family (search+space / view+stat), requests beyond this rate get 412,
+            like the real risk control; 0 disables it.
+        search_pages: pages served for keywords that have no recorded results.
+        """
+        self.fixtures = fixtures or synthetic_fixtures(seed=seed)
+        self.videos: Dict[str, Dict[str, Any]] = self.fixtures.get("videos") or {}
+        self.recorded_search: Dict[str, List[List[Dict[str, Any]]]] = self.fixtures.get("search") or {}
+        self.latency = max(0.0, float(latency))
+        self.jitter = max(0.0, float(jitter))
+        self.error_rate = float(error_rate)
+        self.rate_412 = float(rate_412)
+        self.rate_429 = float(rate_429)
+        self.max_rps = max(0.0, float(max_rps))
+        self.search_pages = max(1, int(search_pages))
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, List[float]] = {}
+        self._by_owner: Dict[int, List[Dict[str, Any]]] = {}
+        for d in sorted(self.videos.values(), key=lambda d: -int(d.get("pubdate") or 0)):
+            mid = int((d.get("owner") or {}).get("mid") or 0)
+            self._by_owner.setdefault(mid, []).append(d)
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self.host, self.port = host, int(port)
+        self.reset_stats()
+
+    # ---- lifecycle -------------------------------------------------------------------------
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> "MockBiliServer":
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real API behind requests' pool
+
+            def do_GET(self):
+                server._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mock-bili", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ---- counters --------------------------------------------------------------------------
+
+    def reset_stats(self):
+        with self._lock:
+            self._counts: Dict[str, Dict[int, int]] = {}
+
+    def stats(self) -> Dict[str, Any]:
+        """Totals plus per-endpoint status counts, e.g. {"requests": 120, "ok": 110, "412": 6, ...}."""
+        with self._lock:
+            by_endpoint = {name: dict(c) for name, c in self._counts.items()}
+        out = {"requests": 0, "ok": 0, "412": 0, "429": 0, "5xx": 0, "by_endpoint": by_endpoint}
+        for counts in by_endpoint.values():
+            for status, n in counts.items():
+                out["requests"] += n
+                if status == 200:
+                    out["ok"] += n
+                elif status in (412, 429):
+                    out[str(status)] += n
+                elif status >= 500:
+                    out["5xx"] += n
+        return out
+
+    # ---- request handling ------------------------------------------------------------------
+
+    def _over_rate(self, family: str) -> bool:
+        """Token bucket per family (burst of one second); True when this request exceeds max_rps."""
+        if not self.max_rps:
+            return False
+        now = time.monotonic()
+        tokens, last = self._buckets.get(family, [self.max_rps, now])
+        tokens = min(self.max_rps, tokens + (now - last) * self.max_rps)
+        over = tokens < 1.0
+        self._buckets[family] = [tokens if over else tokens - 1.0, now]
+        return over
+
+    def _fault(self, name: str) -> Optional[int]:
+        with self._lock:
+            if name in RATE_FAMILY and self._over_rate(RATE_FAMILY[name]):
+                return 412
+            roll = self._rng.random()
+            delay = self.latency + self._rng.random() * self.jitter
+        if delay:
+            time.sleep(delay)
+        if roll < self.rate_412:
+            return 412
+        if roll < self.rate_412 + self.rate_429:
+            return 429
+        if roll < self.rate_412 + self.rate_429 + self.error_rate:
+            return 500
+        return None
+
+    def _handle(self, req: BaseHTTPRequestHandler):
+        parts = urllib.parse.urlsplit(req.path)
+        params = {k: v[-1] for k, v in urllib.parse.parse_qs(parts.query).items()}
+        name = ENDPOINTS.get(parts.path)
+        status = 404 if name is None else self._fault(name) or 200
+        if status == 200:
+            body = getattr(self, f"_serve_{name}")(params)
+        else:
+            body = {"code": -status, "message": "mock fault"}
+        with self._lock:
+            counts = self._counts.setdefault(name or "unknown", {})
+            counts[status] = counts.get(status, 0) + 1
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        req.send_response(status)
+        req.send_header("Content-Type", "application/json; charset=utf-8")
+        req.send_header("Content-Length", str(len(payload)))
+        if status == 429:
+            req.send_header("Retry-After", "1")
+        req.end_headers()
+        req.wfile.write(payload)
+
+    def _search_results(self, keyword: str, mid: Optional[int]) -> List[Dict[str, Any]]:
+        """Every result of a query in page order (recorded pages are served by _serve_search directly)."""
+        if "up主:" in keyword:
+            keyword, _, raw = keyword.partition("up主:")
+            keyword = keyword.strip()
+            try:
+                mid = int(raw.strip())
+            except ValueError:
+                return []
+        if mid:
+            return [_search_item(d) for d in self._by_owner.get(int(mid), [])]
+        # unrecorded keyword: a stable pseudo-random slice of the whole world, newest first
+        salt = keyword.encode("utf-8")
+        picked = sorted(self.videos, key=lambda b: zlib.crc32(salt + b.encode("ascii")))
+        picked = picked[:self.search_pages * SEARCH_PAGE_SIZE]
+        picked.sort(key=lambda b: -int(self.videos[b].get("pubdate") or 0))
+        return [_search_item(self.videos[b]) for b in picked]
+
+    def _serve_search(self, params: Dict[str, str]) -> Dict[str, Any]:
+        keyword = params.get("keyword", "")
+        page = max(1, int(params.get("page") or params.get("pn") or 1))
+        size = max(1, int(params.get("ps") or SEARCH_PAGE_SIZE))
+        recorded = self.recorded_search.get(keyword)
+        if recorded is not None and "mid" not in params:
+            items = recorded[page - 1] if page <= len(recorded) else []
+        else:
+            mid = int(params["mid"]) if params.get("mid", "").isdigit() else None
+            items = self._search_results(keyword, mid)[(page - 1) * size:page * size]
+        return {"code": 0, "message": "0", "data": {"page": page, "pagesize": size, "result": items}}
+
+    def _serve_view(self, params: Dict[str, str]) -> Dict[str, Any]:
+        d = self.videos.get(params.get("bvid", ""))
+        if d is None:
+            return {"code": -404, "message": "啥都木有"}
+        return {"code": 0, "message": "0", "data": d}
+
+    def _serve_stat(self, params: Dict[str, str]) -> Dict[str, Any]:
+        d = self.videos.get(params.get("bvid", ""))
+        if d is None:
+            return {"code": -404, "message": "啥都木有"}
+        return {"code": 0, "message": "0", "data": dict(d.get("stat") or {}, bvid=d.get("bvid"), aid=d.get("aid"))}
+
+    def _serve_space(self, params: Dict[str, str]) -> Dict[str, Any]:
+        if "w_rid" not in params or "wts" not in params:
+            return {"code": -403, "message": "访问权限不足"}
+        mid = int(params.get("mid") or 0)
+        page = max(1, int(params.get("pn") or 1))
+        size = max(1, int(params.get("ps") or bilibili.SPACE_PAGE_SIZE))
+        videos = self._by_owner.get(mid, [])
+        vlist = [_space_item(d) for d in videos[(page - 1) * size:page * size]]
+        return {"code": 0, "message": "0", "data": {
+            "list": {"vlist": vlist},
+            "page": {"pn": page, "ps": size, "count": len(videos)},
+        }}
+
+    def _serve_nav(self, params: Dict[str, str]) -> Dict[str, Any]:
+        # logged-out nav still carries the WBI keys, just like the real one
+        return {"code": -101, "message": "账号未登录", "data": {"isLogin": False, "wbi_img": {
+            "img_url": "https://i0.hdslb.com/bfs/wbi/7cd084941338484aae1ad9425b84077c.png",
+            "sub_url": "https://i0.hdslb.com/bfs/wbi/4932caff0ff746eab6f01bf08b70ac45.png",
+        }}}
+
+    def uploader_mids(self) -> List[int]:
+        """Uploader mids in the fixtures, most prolific first."""
+        return sorted(self._by_owner, key=lambda m: -len(self._by_owner[m]))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="本地模拟 B站 API（离线测试/压测用）")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--fixtures", default=None, help="fixture JSON 文件（默认使用合成数据）")
+    p.add_argument("--uploaders", type=int, default=40, help="合成数据的 UP 主数量")
+    p.add_argument("--videos-per-up", type=int, default=25, help="合成数据中每个 UP 主的视频数")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--latency", type=float, default=0.05, help="每个响应的基础延迟（秒）")
+    p.add_argument("--jitter", type=float, default=0.02, help="额外随机延迟上限（秒）")
+    p.add_argument("--error-rate", type=float, default=0.0, help="返回 500 的概率")
+    p.add_argument("--rate-412", type=float, default=0.0, help="返回 412 的概率")
+    p.add_argument("--rate-429", type=float, default=0.0, help="返回 429 的概率")
+    p.add_argument("--max-rps", type=float, default=0.0, help="每类接口超过该速率返回 412（0 不限制）")
+    p.add_argument("--search-pages", type=int, default=5, help="未录制关键词可返回的搜索页数")
+    p.add_argument("--dump", default=None, help="把当前 fixture 写到该文件后退出")
+    p.add_argument("--record", default=None, help="从真实接口录制 fixture 到该文件后退出")
+    p.add_argument("-k", "--keywords", default=",".join(SYNTH_TOPICS[:2]), help="录制用关键词，逗号分隔")
+    p.add_argument("--pages", type=int, default=2, help="录制的搜索页数")
+    return p
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.record:
+        fixtures = record_fixtures([k.strip() for k in args.keywords.split(",") if k.strip()], pages=max(1, args.pages))
+        save_fixtures(args.record, fixtures)
+        print(f"recorded {len(fixtures['videos'])} videos to {args.record}")
+        return 0
+    if args.fixtures:
+        fixtures = load_fixtures(args.fixtures)
+    else:
+        fixtures = synthetic_fixtures(args.uploaders, args.videos_per_up, args.seed)
+    if args.dump:
+        save_fixtures(args.dump, fixtures)
+        print(f"wrote {len(fixtures['videos'])} videos to {args.dump}")
+        return 0
+    server = MockBiliServer(
+        fixtures, host=args.host, port=args.port, latency=args.latency, jitter=args.jitter,
+        error_rate=args.error_rate, rate_412=args.rate_412, rate_429=args.rate_429,
+        max_rps=args.max_rps, search_pages=args.search_pages, seed=args.seed,
+    ).start()
+    print(f"mock bilibili API on {server.base_url} ({len(server.videos)} videos); "
+          f"run the crawler with BILI_API_BASE={server.base_url}")
+    try:
+        while True:
+            time.sleep(10)
+            s = server.stats()
+            print(f"requests={s['requests']} ok={s['ok']} 412={s['412']} 429={s['429']} 5xx={s['5xx']}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,235 @@
+"""
+Process-wide token-bucket rate limiter with AIMD back-pressure, plus a latency-driven
+concurrency limiter for LLM calls.
+
+每个 AdaptiveRateLimiter 维护一个令牌桶：请求前 reserve() 一个令牌并等待返回的秒数；
+成功响应缓慢加速（加性增），遇到 412/429 立即减速（乘性减）并清空令牌，
+让所有并发的 worker 一起退让，而不是各自继续请求。
+"""
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+
+class AdaptiveRateLimiter:
+    def __init__(
+        self,
+        name: str,
+        rate: float = 2.0,
+        min_rate: float = 0.2,
+        max_rate: float = 10.0,
+        burst: float = 2.0,
+        increase: float = 0.1,
+        decrease: float = 0.5,
+        cooldown: float = 3.0,
+        jitter: float = 0.1,
+    ):
+        """
+        rate/min_rate/max_rate: requests per second.
+        increase: rate gained per second of successful traffic (additive increase).
+        decrease: multiplier applied on 412/429 (multiplicative decrease).
+        cooldown: throttle signals within this window count as one event, so a
+            burst of 412s from parallel workers only halves the rate once.
+        """
+        self.name = name
+        self.min_rate = max(0.01, float(min_rate))
+        self.max_rate = max(self.min_rate, float(max_rate))
+        self.rate = max(self.min_rate, min(self.max_rate, float(rate)))
+        self.burst = max(1.0, float(burst))
+        self.increase = max(0.0, float(increase))
+        self.decrease = max(0.05, min(1.0, float(decrease)))
+        self.cooldown = max(0.0, float(cooldown))
+        self.jitter = max(0.0, float(jitter))
+        self.listener: Optional[Callable[[str, float, str], None]] = None
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._last = time.monotonic()
+        self._last_cut = 0.0
+        self._reported_rate = self.rate
+        self.throttled = 0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def reserve(self) -> float:
+        """Take one token and return how many seconds the caller must wait before sending."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1.0
+            wait = 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+        return wait + random.random() * self.jitter
+
+    def acquire(self):
+        """Blocking variant of reserve() for thread-based callers."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def on_success(self):
+        report = None
+        with self._lock:
+            if self.rate < self.max_rate:
+                # +increase per second of traffic at the current rate
+                self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+                if self.rate >= self._reported_rate * 1.25 or self.rate >= self.max_rate > self._reported_rate:
+                    self._reported_rate = self.rate
+                    report = (self.rate, "恢复")
+        if report:
+            self._notify(*report)
+
+    def on_throttle(self, reason: str = "412"):
+        report = None
+        with self._lock:
+            self.throttled += 1
+            now = time.monotonic()
+            if now - self._last_cut >= self.cooldown:
+                self._last_cut = now
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                self._reported_rate = self.rate
+                # drain the bucket so every waiting worker backs off together
+                self._refill(now)
+                self._tokens = min(self._tokens, 0.0) - 1.0
+                report = (self.rate, f"收到 {reason}，降速")
+        if report:
+            self._notify(*report)
+
+    def set_rate(self, rate: float = None, max_rate: float = None):
+        with self._lock:
+            if max_rate is not None:
+                self.max_rate = max(self.min_rate, float(max_rate))
+            if rate is not None:
+                self.rate = float(rate)
+            self.rate = max(self.min_rate, min(self.max_rate, self.rate))
+            self._reported_rate = self.rate
+
+    def _notify(self, rate: float, reason: str):
+        cb = self.listener
+        if cb is None:
+            return
+        try:
+            cb(self.name, rate, reason)
+        except Exception:
+            pass
+
+
+class AdaptiveConcurrencyLimiter:
+    """In-flight limit for slow calls (LLM requests) that tunes itself from latency.
+
+    每完成 window 次调用计算一次单位延迟的中位数：与基线持平则并发 +1，明显变慢则乘性减；
+    429/超时立即减半，并在 Retry-After 期间暂停所有新请求。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 16,
+        window: int = 8,
+        slow_ratio: float = 1.5,
+        decrease: float = 0.5,
+        cooldown: float = 3.0,
+    ):
+        self.name = name
+        self.min_limit = max(1, int(min_limit))
+        self.max_limit = max(self.min_limit, int(max_limit))
+        self.limit = float(max(self.min_limit, min(self.max_limit, int(initial))))
+        self.window = max(2, int(window))
+        self.slow_ratio = max(1.1, float(slow_ratio))
+        self.decrease = max(0.05, min(1.0, float(decrease)))
+        self.cooldown = max(0.0, float(cooldown))
+        self.listener: Optional[Callable[[str, float, str], None]] = None
+        self._cond = threading.Condition()
+        self._inflight = 0
+        self._samples = []
+        self._baseline = None
+        self._blocked_until = 0.0
+        self._last_cut = 0.0
+        self._started = time.monotonic()
+        self.completed = 0
+        self.peak = int(self.limit)
+        self.throttled = 0
+
+    def acquire(self):
+        with self._cond:
+            while True:
+                wait = self._blocked_until - time.monotonic()
+                if wait <= 0 and self._inflight < int(self.limit):
+                    self._inflight += 1
+                    return
+                self._cond.wait(wait if wait > 0 else None)
+
+    def release(self, latency: float = None, units: int = 1):
+        """Free a slot; latency (seconds) of a successful call feeds the controller."""
+        report = None
+        with self._cond:
+            self._inflight = max(0, self._inflight - 1)
+            if latency is not None:
+                self.completed += max(1, units)
+                self._samples.append(latency / max(1, units))
+                if len(self._samples) >= self.window:
+                    report = self._adjust()
+            self._cond.notify_all()
+        if report:
+            self._notify(*report)
+
+    def _adjust(self):
+        samples = sorted(self._samples)
+        self._samples = []
+        p50 = samples[len(samples) // 2]
+        base = p50 if self._baseline is None else self._baseline
+        # the baseline tracks the fastest recent latency and only creeps up slowly
+        # (model warm-up, longer prompts), so queueing delay can't drag it along
+        self._baseline = p50 if p50 < base else base + (p50 - base) * 0.005
+        old = int(self.limit)
+        if p50 > base * self.slow_ratio:
+            self.limit = max(self.min_limit, self.limit * 0.75)
+            reason = f"延迟上升（p50 {p50:.1f}s）"
+        elif self._inflight + 1 >= old and p50 <= base * 1.2:
+            # only grow when the current limit is actually being used
+            self.limit = min(self.max_limit, self.limit + 1)
+            reason = f"延迟平稳（p50 {p50:.1f}s）"
+        else:
+            return None
+        self.peak = max(self.peak, int(self.limit))
+        return (self.limit, reason) if int(self.limit) != old else None
+
+    def on_throttle(self, retry_after: float = None, reason: str = "429"):
+        """Back off on 429 / timeouts; retry_after pauses every new call for that many seconds."""
+        report = None
+        with self._cond:
+            self.throttled += 1
+            now = time.monotonic()
+            if retry_after and retry_after > 0:
+                self._blocked_until = max(self._blocked_until, now + float(retry_after))
+            if now - self._last_cut >= self.cooldown:
+                self._last_cut = now
+                self.limit = max(self.min_limit, self.limit * self.decrease)
+                self._samples = []
+                report = (self.limit, f"收到 {reason}")
+            self._cond.notify_all()
+        if report:
+            self._notify(*report)
+
+    def status(self) -> dict:
+        with self._cond:
+            elapsed = max(1e-6, time.monotonic() - self._started)
+            return {
+                "limit": int(self.limit),
+                "peak": self.peak,
+                "completed": self.completed,
+                "throttled": self.throttled,
+                "per_minute": self.completed * 60.0 / elapsed,
+            }
+
+    def _notify(self, limit: float, reason: str):
+        cb = self.listener
+        if cb is None:
+            return
+        try:
+            cb(self.name, int(limit), reason)
+        except Exception:
+            pass
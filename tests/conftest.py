@@ -0,0 +1,94 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bilibili  # noqa: E402
+import bilibili_async  # noqa: E402
+from mock_bili import MockBiliServer, synthetic_fixtures  # noqa: E402
+
+
+@pytest.fixture(params=["thread", "async"])
+def mock_api(request, tmp_path, monkeypatch):
+    """A zero-latency mock_bili server with bilibili.py pointed at it and an empty detail cache,
+    once per crawl backend."""
+    if bilibili.set_crawl_backend(request.param) != request.param:
+        pytest.skip("aiohttp is not installed")
+    server = MockBiliServer(synthetic_fixtures(uploaders=5, videos_per_up=20, seed=1)).start()
+    bilibili.set_api_base(server.base_url)
+    bilibili.set_search_order("pubdate")
+    bilibili.set_detail_cache(str(tmp_path / "cache.sqlite3"))
+    for limiter in bilibili.RATE_LIMITERS.values():
+        monkeypatch.setattr(limiter, "jitter", 0.0)
+        monkeypatch.setattr(limiter, "rate", 1000.0)
+        monkeypatch.setattr(limiter, "max_rate", 1000.0)
+    yield server
+    bilibili_async.shutdown()
+    bilibili.set_crawl_backend("thread")
+    bilibili.set_detail_cache(None)
+    bilibili.set_api_base(None)
+    server.stop()
+
+
+class FakeLLM:
+    """Stands in for LLMClient inside RankEngine: verdicts come from `verdict(info)`, no network."""
+
+    instances = []
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.limiter = None
+        self.calls = []
+        self.closed = False
+        FakeLLM.instances.append(self)
+
+    @staticmethod
+    def verdict(info):
+        return {"score": 1 + (info["mid"] * 7) % 10, "summary": f"fake {info['mid']}"}
+
+    def cache_identity(self):
+        return ("fake", "model", "")
+
+    def build_prompt(self, info):
+        return f"prompt {info['mid']} {info.get('views')}"
+
+    def cache_prompt(self, info, batched=False):
+        return ("batch " if batched else "") + self.build_prompt(info)
+
+    def analyze_uploaders(self, infos):
+        self.calls.append([info["mid"] for info in infos])
+        out = {}
+        for info in infos:
+            v = self.verdict(info)
+            if len(infos) > 1 and v.get("parsed", True):
+                v["batched"] = True
+            out[str(info["mid"])] = v
+        return out
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    import engine
+    FakeLLM.instances = []
+    monkeypatch.setattr(engine, "LLMClient", FakeLLM)
+    return FakeLLM
+
+
+def ranked_aggregator(uploaders=30, seed=0):
+    """OwnerAggregator over random abyss/battle videos, enough rows for every board."""
+    import random
+    from engine import OwnerAggregator
+    rng = random.Random(seed)
+    agg = OwnerAggregator()
+    for mid in range(1, uploaders + 1):
+        for i in range(rng.randint(1, 6)):
+            kw = rng.choice(["崩坏3 深渊", "崩坏3 记忆战场"])
+            agg.add({"bvid": f"BV{mid}x{i}", "owner": {"mid": mid, "name": f"up{mid}"}, "title": f"{kw} 第{i}期",
+                     "keywords": [kw], "desc": "x" * rng.randint(0, 200),
+                     "stat": {"view": rng.randint(0, 10 ** 6), "like": rng.randint(0, 10 ** 4), "favorite": rng.randint(0, 10 ** 3)}})
+    return agg
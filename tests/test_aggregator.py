@@ -0,0 +1,65 @@
+import engine
+from engine import OwnerAggregator
+from mock_bili import _search_item
+
+
+def _entry(bvid, mid, keywords, title="视频", views=100):
+    return {"bvid": bvid, "owner": {"mid": mid, "name": f"up{mid}"}, "title": title,
+            "keywords": keywords, "stat": {"view": views, "like": 1, "favorite": 1}}
+
+
+def _boards(agg):
+    return {name: {r["mid"]: r for r in lst} for name, lst in zip(("overall", "abyss", "battle"), agg.build())}
+
+
+def test_duplicate_bvid_counted_once_and_keywords_merged():
+    agg = OwnerAggregator()
+    assert agg.add(_entry("BV1", 7, ["崩坏3 日常"]))
+    assert not agg.add(_entry("BV1", 7, ["崩坏3 深渊"]))
+    assert agg.add(_entry("BV2", 7, ["崩坏3 记忆战场"]))
+
+    assert (agg.video_count, agg.duplicates) == (2, 1)
+    boards = _boards(agg)
+    assert boards["overall"][7]["total_videos"] == 2
+    assert boards["overall"][7]["views"] == 200
+    # the second keyword moved BV1 from "other" to abyss
+    assert [r.bvid for r in boards["abyss"][7]["videos_list"]] == ["BV1"]
+    assert [r.bvid for r in boards["battle"][7]["videos_list"]] == ["BV2"]
+
+
+def test_live_keyword_list_is_rechecked_on_build():
+    agg = OwnerAggregator()
+    kws = ["崩坏3 日常"]
+    agg.add(_entry("BV1", 7, kws))
+    assert _boards(agg)["abyss"][7]["total_videos"] == 0
+    # another keyword's scan appends to the shared list after the video was ingested
+    kws.append("崩坏3 深渊")
+    boards = _boards(agg)
+    assert boards["abyss"][7]["total_videos"] == 1
+    assert boards["abyss"][7]["views"] == 100
+    assert boards["overall"][7]["total_videos"] == 1
+
+
+def test_overlapping_keywords_fetch_and_count_each_video_once(mock_api):
+    videos = sorted(mock_api.videos.values(), key=lambda d: d["pubdate"], reverse=True)[:30]
+    # the two keywords share videos 10..19
+    mock_api.recorded_search["崩坏3 深渊"] = [[_search_item(d) for d in videos[:20]]]
+    mock_api.recorded_search["崩坏3 记忆战场"] = [[_search_item(d) for d in videos[10:30]]]
+    mock_api.reset_stats()
+
+    eng = engine.RankEngine()
+    agg = OwnerAggregator()
+    eng._ingest(eng._scan_mode1(["崩坏3 深渊", "崩坏3 记忆战场"], 1, None, None), agg)
+
+    assert mock_api.stats()["by_endpoint"]["view"][200] == 30
+    assert agg.video_count == 30
+    boards = _boards(agg)
+    assert sum(r["total_videos"] for r in boards["overall"].values()) == 30
+    expected = {}
+    for d in videos[:20]:
+        expected.setdefault(d["bvid"], []).append("崩坏3 深渊")
+    for d in videos[10:30]:
+        expected.setdefault(d["bvid"], []).append("崩坏3 记忆战场")
+    # every record was categorised on all the keywords that matched it
+    cats = {rec.bvid: rec.cat for r in boards["overall"].values() for rec in r["videos_list"]}
+    assert cats == {d["bvid"]: engine.video_category(expected[d["bvid"]], d["title"]) for d in videos}
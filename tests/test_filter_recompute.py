@@ -0,0 +1,97 @@
+"""App's background sigma recompute racing the progressive LLM pass (stubbed Tk root, no display)."""
+import threading
+
+import pytest
+
+from conftest import ranked_aggregator
+
+app = pytest.importorskip("app")
+engine = pytest.importorskip("engine")
+
+CONFIG = {"use_llm": True, "provider": "openai", "api_key": "x", "llm_cache": False, "llm_adaptive": False,
+          "exclude_outliers": False, "outlier_sigma": 2.5, "llm_batch_size": 4}
+
+
+class FakeRoot:
+    """Collects after() callbacks; the test runs them as the Tk loop would."""
+
+    def __init__(self):
+        self.callbacks = []
+        self.lock = threading.Lock()
+
+    def after(self, ms, fn):
+        with self.lock:
+            self.callbacks.append(fn)
+        return len(self.callbacks)
+
+    def after_cancel(self, after_id):
+        pass
+
+    def pump(self):
+        while True:
+            with self.lock:
+                if not self.callbacks:
+                    return
+                fn = self.callbacks.pop(0)
+            fn()
+
+
+def _app(eng, gui_config):
+    a = app.App.__new__(app.App)
+    a.root = FakeRoot()
+    a.engine = eng
+    a.logs = []
+    a.log = a.logs.append
+    a._gui_config = lambda: dict(gui_config)
+    a._apply_results_to_ui = lambda: None
+    a._sigma_after_id = None
+    a._filter_gen = 0
+    a._filter_busy = False
+    a._filter_pending = False
+    a._llm_apply_scheduled = False
+    return a
+
+
+def _mids(boards):
+    return {name: [r["mid"] for r in lst] for name, lst in boards.items()}
+
+
+def test_sigma_change_survives_llm_verdicts_arriving_mid_recompute(fake_llm, monkeypatch):
+    eng = engine.RankEngine(llm_update=lambda: None)
+    eng.apply_config(CONFIG)
+    eng.process_aggregated(ranked_aggregator(uploaders=60, seed=4))
+    eng.wait_llm(10)
+    before = _mids(eng.results_by_category)
+
+    # hold the worker thread inside compute_filtered_results until the verdict has been applied
+    release = threading.Event()
+    worker_done = threading.Event()
+    compute = eng.compute_filtered_results
+
+    def gated(*args, **kwargs):
+        if threading.current_thread() is threading.main_thread():
+            return compute(*args, **kwargs)
+        release.wait(5)
+        try:
+            return compute(*args, **kwargs)
+        finally:
+            worker_done.set()
+
+    monkeypatch.setattr(eng, "compute_filtered_results", gated)
+    a = _app(eng, dict(CONFIG, exclude_outliers=True, outlier_sigma=1.0))
+    a._start_filter_recompute()
+
+    raw = eng.results_by_category_raw
+    mid = eng.results_unfiltered["总榜"][0]["mid"]
+    eng._llm_queue.put((eng._llm_gen, "总榜", mid, {"score": 1, "summary": "late"}))
+    a._apply_llm_updates()
+    assert eng.results_by_category_raw is not raw
+    release.set()
+    assert worker_done.wait(5)
+    a.root.pump()
+
+    expected = _mids(compute(True, 1.0))
+    assert _mids(eng.results_by_category) == expected
+    # the boards without verdicts really did change with the new sigma
+    assert expected["深渊榜"] != before["深渊榜"] or expected["战场榜"] != before["战场榜"]
+    assert "已启用异常数据排除，阈值系数 1.00" in a.logs
@@ -0,0 +1,89 @@
+import bilibili
+from mock_bili import SEARCH_PAGE_SIZE, _search_item
+
+KW = "崩坏3 深渊"
+
+
+def _publish(server, count):
+    """Serve the `count` oldest videos as KW's newest-first search results."""
+    videos = sorted(server.videos.values(), key=lambda d: d["pubdate"])[:count]
+    items = [_search_item(d) for d in reversed(videos)]
+    server.recorded_search[KW] = [items[i:i + SEARCH_PAGE_SIZE] for i in range(0, len(items), SEARCH_PAGE_SIZE)]
+    return videos
+
+
+def _view_calls(server):
+    return server.stats()["by_endpoint"].get("view", {}).get(200, 0)
+
+
+def test_failed_details_are_searched_again(mock_api, monkeypatch):
+    _publish(mock_api, 60)
+    with monkeypatch.context() as m:
+        m.setattr(mock_api, "_serve_view", lambda params: {"code": -412, "message": "risk control"})
+        first = bilibili.collect_by_keyword(KW, pages=3, incremental=True)
+    assert len(first) == 60 and not any(e.get("owner") for e in first)
+    assert bilibili.DETAIL_CACHE.keyword_bvids(KW) == []
+    assert bilibili.DETAIL_CACHE.get_watermark(KW)[0] == 0
+
+    mock_api.reset_stats()
+    second = bilibili.collect_by_keyword(KW, pages=3, incremental=True)
+    assert len(second) == 60 and all(e.get("owner") for e in second)
+    assert _view_calls(mock_api) == 60
+
+
+def test_partial_failure_holds_watermark_below_failed_video(mock_api, monkeypatch):
+    videos = _publish(mock_api, 40)
+    failing = videos[25]["bvid"]
+    serve_view = mock_api._serve_view
+    with monkeypatch.context() as m:
+        m.setattr(mock_api, "_serve_view", lambda params: {"code": -404} if params.get("bvid") == failing else serve_view(params))
+        bilibili.collect_by_keyword(KW, pages=2, incremental=True)
+    assert bilibili.DETAIL_CACHE.get_watermark(KW)[0] == videos[25]["pubdate"]
+
+    mock_api.reset_stats()
+    again = bilibili.collect_by_keyword(KW, pages=2, incremental=True)
+    assert _view_calls(mock_api) == 1
+    assert {e["bvid"] for e in again if e.get("owner")} == {v["bvid"] for v in videos}
+    assert bilibili.DETAIL_CACHE.get_watermark(KW)[0] == videos[-1]["pubdate"]
+
+
+def test_capped_scan_keeps_watermark_until_gap_is_filled(mock_api):
+    _publish(mock_api, 40)
+    bilibili.collect_by_keyword(KW, pages=2, incremental=True)
+    old_mark = bilibili.DETAIL_CACHE.get_watermark(KW)[0]
+
+    videos = _publish(mock_api, 100)
+    # 60 new videos but only one page allowed: the other 40 are still unseen
+    bilibili.collect_by_keyword(KW, pages=1, incremental=True)
+    assert bilibili.DETAIL_CACHE.get_watermark(KW)[0] == old_mark
+
+    mock_api.reset_stats()
+    out = bilibili.collect_by_keyword(KW, pages=5, incremental=True)
+    assert _view_calls(mock_api) == 40
+    assert {e["bvid"] for e in out} == {v["bvid"] for v in videos}
+    assert bilibili.DETAIL_CACHE.get_watermark(KW)[0] == videos[-1]["pubdate"]
+
+    mock_api.reset_stats()
+    assert len(bilibili.collect_by_keyword(KW, pages=5, incremental=True)) == 100
+    assert _view_calls(mock_api) == 0
+
+
+def test_seen_shares_details_across_keywords(mock_api):
+    _publish(mock_api, 40)
+    mock_api.recorded_search["崩坏3 记忆战场"] = mock_api.recorded_search[KW]
+    seen = {}
+    a = bilibili.collect_by_keyword(KW, pages=2, incremental=True, seen=seen)
+    b = bilibili.collect_by_keyword("崩坏3 记忆战场", pages=2, incremental=True, seen=seen)
+    assert len(a) == 40 and b == []
+    assert _view_calls(mock_api) == 40
+    assert all(kws == [KW, "崩坏3 记忆战场"] for kws in seen.values())
+    # the second keyword recorded the borrowed videos, so its next run needs no details either
+    assert len(bilibili.DETAIL_CACHE.keyword_bvids("崩坏3 记忆战场")) == 40
+
+
+def test_incremental_rejects_single_page(mock_api):
+    try:
+        bilibili.collect_by_keyword(KW, page=2, incremental=True)
+    except ValueError:
+        return
+    raise AssertionError("page= with incremental=True should be rejected")
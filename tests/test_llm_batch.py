@@ -0,0 +1,110 @@
+import json
+import re
+
+import pytest
+import requests
+
+import llm_client
+
+
+class FakeProvider(llm_client.LLMClient):
+    """LLMClient whose completions come from reply(prompt) instead of the network."""
+
+    def __init__(self, reply):
+        super().__init__(provider="openai", api_key="x", deadline=1.0)
+        self.reply = reply
+        self.prompts = []
+
+    def _complete(self, prompt, max_tokens, deadline=None, opener="{", units=1):
+        self.prompts.append(prompt)
+        return self.reply(prompt)
+
+
+def _infos(n):
+    return [{"mid": 100 + i, "name": f"up{i}", "videos": i, "views": 1000 * i, "likes": 10 * i} for i in range(n)]
+
+
+def _mids(prompt):
+    return [int(m) for m in re.findall(r"^mid: (\d+)$", prompt, re.M)]
+
+
+def _batch_reply(prompt):
+    return json.dumps([{"mid": m, "score": 7, "summary": f"batch {m}"} for m in _mids(prompt)])
+
+
+def _single(prompt):
+    return json.dumps({"score": 4, "summary": "single"})
+
+
+@pytest.fixture
+def client_factory():
+    clients = []
+
+    def make(reply):
+        c = FakeProvider(reply)
+        clients.append(c)
+        return c
+
+    yield make
+    for c in clients:
+        c.close()
+
+
+def test_well_formed_batch_is_one_call(client_factory):
+    llm = client_factory(lambda p: _batch_reply(p) if _mids(p) else _single(p))
+    out = llm.analyze_uploaders(_infos(5))
+    assert len(llm.prompts) == 1
+    assert {k: v["summary"] for k, v in out.items()} == {str(100 + i): f"batch {100 + i}" for i in range(5)}
+    assert all(v["batched"] for v in out.values())
+
+
+def test_malformed_batch_falls_back_to_single_calls(client_factory):
+    llm = client_factory(lambda p: "抱歉，我无法给出 JSON" if _mids(p) else _single(p))
+    out = llm.analyze_uploaders(_infos(4))
+    assert len(llm.prompts) == 1 + 4
+    assert [v["summary"] for v in out.values()] == ["single"] * 4
+    assert not any(v.get("batched") for v in out.values())
+
+
+def test_partial_batch_reply_only_retries_the_missing(client_factory):
+    llm = client_factory(lambda p: json.dumps([{"mid": _mids(p)[0], "score": 9, "summary": "ok"}]) if _mids(p) else _single(p))
+    out = llm.analyze_uploaders(_infos(3))
+    assert len(llm.prompts) == 1 + 2
+    assert out["100"]["summary"] == "ok" and out["101"]["summary"] == out["102"]["summary"] == "single"
+
+
+def test_timed_out_batch_is_split_until_it_fits(client_factory):
+    def reply(prompt):
+        # the gateway cannot finish more than two uploaders within the deadline
+        if len(_mids(prompt)) > 2:
+            raise llm_client.LLMDeadlineExceeded("too slow")
+        return _batch_reply(prompt) if _mids(prompt) else _single(prompt)
+
+    llm = client_factory(reply)
+    out = llm.analyze_uploaders(_infos(5))
+    assert sorted(out) == [str(100 + i) for i in range(5)]
+    assert all(v["score"] is not None for v in out.values())
+    # 5 -> 2 + 3 -> 2 + (1 + 2)
+    assert [len(_mids(p)) or 1 for p in llm.prompts] == [5, 2, 3, 1, 2]
+
+
+def test_single_uploader_failures_stay_local(client_factory):
+    def reply(prompt):
+        if _mids(prompt) or "up1'" in prompt:
+            raise requests.ConnectionError("connection reset")
+        return _single(prompt)
+
+    llm = client_factory(reply)
+    out = llm.analyze_uploaders(_infos(3))
+    assert out["101"]["score"] is None and out["101"]["summary"].startswith("LLM error")
+    assert out["100"]["summary"] == out["102"]["summary"] == "single"
+
+
+def test_rate_limited_batch_still_raises(client_factory):
+    def reply(prompt):
+        r = requests.Response()
+        r.status_code = 429
+        raise requests.HTTPError(response=r)
+
+    with pytest.raises(requests.HTTPError):
+        client_factory(reply).analyze_uploaders(_infos(3))
@@ -0,0 +1,51 @@
+import engine
+from conftest import ranked_aggregator
+
+CONFIG = {"use_llm": True, "provider": "openai", "api_key": "x", "llm_cache": False, "llm_adaptive": False,
+          "exclude_outliers": True, "outlier_sigma": 1.0, "blacklist": ["up3"], "llm_batch_size": 4}
+
+
+def _engine(**cfg):
+    eng = engine.RankEngine(llm_update=lambda: None)
+    eng.apply_config(dict(CONFIG, **cfg))
+    return eng
+
+
+def _snapshot(boards):
+    return {name: [(r["mid"], r["score"], r.get("llm_score")) for r in lst] for name, lst in boards.items()}
+
+
+def _assert_sorted(boards):
+    for name, lst in boards.items():
+        finals = [r["final_score"] for r in lst]
+        assert finals == sorted(finals, reverse=True), name
+
+
+def test_verdicts_keep_every_layer_sorted_and_match_a_full_refresh(fake_llm):
+    eng = _engine()
+    eng.process_aggregated(ranked_aggregator())
+    assert eng._llm_done.wait(10)
+    eng.apply_llm_updates()
+
+    # a verdict that drags the last uploader of the overall board to the top
+    last = eng.results_unfiltered["总榜"][-1]["mid"]
+    abyss_board = eng.results_by_category["深渊榜"]
+    eng._llm_queue.put((eng._llm_gen, "总榜", last, {"score": 10, "summary": "top"}))
+    assert eng.apply_llm_updates()
+
+    _assert_sorted(eng.results_by_category_raw)
+    _assert_sorted(eng.results_by_category)
+    assert eng.results_by_category["深渊榜"] is abyss_board
+    progressive = _snapshot(eng.results_by_category)
+    eng.refresh_results_with_blacklist(silent=True, log_removed=False)
+    assert _snapshot(eng.results_by_category) == progressive
+
+
+def test_weight_change_resorts_filtered_layers(fake_llm):
+    eng = _engine()
+    eng.process_aggregated(ranked_aggregator(seed=2))
+    eng.wait_llm(10)
+    eng.weight_configs = {"normal": {"counts": 0, "views": 0, "desc": 1, "favorites": 0, "likes": 0}}
+    eng.refresh_results_with_new_weights(silent=True)
+    _assert_sorted(eng.results_by_category_raw)
+    _assert_sorted(eng.results_by_category)
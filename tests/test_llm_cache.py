@@ -0,0 +1,40 @@
+import engine
+import llm_client
+from conftest import ranked_aggregator
+
+CONFIG = {"use_llm": True, "provider": "openai", "api_key": "x", "llm_cache": True, "llm_adaptive": False,
+          "llm_batch_size": 4}
+
+
+def _run(tmp_path, **cfg):
+    eng = engine.RankEngine()
+    eng.cache_path = str(tmp_path / "cache.sqlite3")
+    eng.apply_config(dict(CONFIG, **cfg))
+    eng.process_aggregated(ranked_aggregator(uploaders=12, seed=5))
+    eng._llm_cache.close()
+    return sum(len(c) for c in engine.LLMClient.instances[-1].calls)
+
+
+def test_parse_fallback_is_flagged():
+    client = llm_client.LLMClient(provider="openai", api_key="x")
+    assert client._parse_json_like("模型没有按格式回答")["parsed"] is False
+    assert client._parse_json_like("")["parsed"] is False
+    assert "parsed" not in client._parse_json_like('好的：{"score": 8, "summary": "稳"}')
+    client.close()
+
+
+def test_unparseable_replies_are_not_cached(fake_llm, tmp_path, monkeypatch):
+    monkeypatch.setattr(fake_llm, "verdict", staticmethod(lambda info: {"score": 6, "summary": "乱码", "parsed": False}))
+    first = _run(tmp_path)
+    assert first > 0
+    assert _run(tmp_path) == first
+
+
+def test_verdicts_are_keyed_on_the_prompt_kind_sent(fake_llm, tmp_path):
+    first = _run(tmp_path)
+    assert first > 0
+    # same batching: every uploader is served from the cache
+    assert _run(tmp_path) == 0
+    # single-uploader prompts were never sent, so their keys are not in the cache yet
+    assert _run(tmp_path, llm_batch_size=1) == first
+    assert _run(tmp_path, llm_batch_size=1) == 0
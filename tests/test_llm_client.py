@@ -0,0 +1,128 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import llm_client
+from llm_client import LLMClient, LLMDeadlineExceeded, _JsonWatcher
+
+VERDICT = '{"score": 8, "summary": "输出稳定 {偶尔翻车}", "tag": "顶级"}'
+
+
+def _feed(watcher, text, size):
+    for i in range(0, len(text), size):
+        closed = watcher.feed(text[i:i + size])
+        if closed is not None:
+            return closed, text[i + size:]
+    return None, ""
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 1000])
+def test_watcher_closes_on_the_verdict_across_chunk_splits(size):
+    text = "好的，以下是评价：" + VERDICT + "\n以上仅供参考，{不要在意}"
+    closed, rest = _feed(_JsonWatcher("{"), text, size)
+    assert closed is not None and closed.endswith(VERDICT)
+    assert json.loads(closed[closed.index("{"):]) == json.loads(VERDICT)
+
+
+def test_watcher_skips_closed_stray_braces_in_prose():
+    text = "先说明 {这是旁白} 和 {} 再给出 " + VERDICT + " 然后是废话"
+    closed, _ = _feed(_JsonWatcher("{"), text, 5)
+    assert closed.endswith(VERDICT)
+    assert LLMClient._parse_json_like(None, closed)["score"] == 8
+
+
+def test_watcher_ignores_braces_and_brackets_inside_strings():
+    tricky = '{"score": 6, "summary": "用 } 和 ] 以及 \\" 引号 { 开头", "tag": "NPC"}'
+    closed, _ = _feed(_JsonWatcher("{"), tricky + " 尾巴", 2)
+    assert closed == tricky
+
+
+def test_unclosed_stray_brace_is_recovered_when_parsing():
+    text = "格式是 { 开头的 JSON：" + VERDICT
+    closed, _ = _feed(_JsonWatcher("{"), text, 4)
+    # the stray brace never closes, so the stream runs to its end...
+    assert closed is None
+    # ...and the parser still finds the verdict behind it
+    assert LLMClient._parse_json_like(None, text)["summary"] == "输出稳定 {偶尔翻车}"
+
+
+def test_batch_watcher_skips_citation_brackets():
+    batch = '[{"mid": 1, "score": 7}, {"mid": 2, "score": 3}]'
+    text = "参考[1]与[2]，结果如下：" + batch + " 完"
+    closed, _ = _feed(_JsonWatcher("["), text, 3)
+    assert closed.endswith(batch)
+    assert LLMClient._parse_json_array(None, text) == json.loads(batch)
+
+
+class _SlowLLM(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    mode = "stream"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.mode == "body":
+            body = json.dumps({"choices": [{"message": {"content": VERDICT}}]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self._trickle([body[:10]], 10.0)
+            return
+        if self.mode == "503":
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        # a space every 0.4s: every read returns well within the read timeout, forever
+        piece = ("data: " + json.dumps({"choices": [{"delta": {"content": " "}}]}) + "\n\n").encode()
+        self._trickle([b"%x\r\n%s\r\n" % (len(piece), piece)] * 100, 0.4)
+
+    def _trickle(self, chunks, pause):
+        for chunk in chunks:
+            try:
+                self.wfile.write(chunk)
+                self.wfile.flush()
+            except OSError:
+                return
+            time.sleep(pause)
+
+
+@pytest.fixture
+def slow_llm():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowLLM)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    clients = []
+
+    def client(mode, stream):
+        _SlowLLM.mode = mode
+        c = LLMClient(provider="openai", endpoint=f"http://127.0.0.1:{server.server_address[1]}", api_key="x",
+                      stream=stream, deadline=1.5, read_timeout=30)
+        clients.append(c)
+        return c
+
+    yield client
+    for c in clients:
+        c.close()
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("mode,stream", [("stream", True), ("body", False), ("503", False)])
+def test_deadline_bounds_the_whole_call(slow_llm, mode, stream):
+    llm = slow_llm(mode, stream)
+    t0 = time.monotonic()
+    with pytest.raises(LLMDeadlineExceeded):
+        llm._complete("评价", 10, llm.deadline)
+    assert time.monotonic() - t0 < llm.deadline + 0.5
+
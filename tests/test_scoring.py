@@ -0,0 +1,59 @@
+import copy
+import random
+
+import pytest
+
+import engine
+
+pytestmark = pytest.mark.skipif(engine.np is None, reason="numpy not installed")
+
+
+def _rows(n, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        r = {
+            "mid": i,
+            "total_videos": rng.randint(0, 300),
+            "views": rng.choice([0, None, rng.randint(0, 10 ** 8)]),
+            "likes": rng.randint(0, 10 ** 6),
+            "favorites": rng.randint(0, 10 ** 5),
+            "desc_len": rng.randint(0, 2000),
+            "has_jm": rng.random() < 0.3,
+            "has_top1": rng.random() < 0.1,
+        }
+        if rng.random() < 0.1:
+            # count taken from the video list instead
+            r["total_videos"] = 0
+            r["videos_list"] = [{}] * rng.randint(1, 20)
+        rows.append(r)
+    return rows
+
+
+def _score(eng, rows, vectorized, monkeypatch):
+    monkeypatch.setattr(engine, "NUMPY_MIN_ROWS", 1 if vectorized else len(rows) + 1)
+    eng._prepare_weighted_metrics(rows)
+    return eng._normalize_scores(rows)
+
+
+@pytest.mark.parametrize("weights", [{}, {"jm": {"counts": 2, "views": 0, "desc": 1}, "top1": {"likes": 5}}])
+def test_numpy_scoring_matches_scalar_loop(monkeypatch, weights):
+    eng = engine.RankEngine()
+    eng.weight_configs = weights
+    scalar_rows = _rows(5000)
+    numpy_rows = copy.deepcopy(scalar_rows)
+
+    scalar_norm = _score(eng, scalar_rows, False, monkeypatch)
+    numpy_norm = _score(eng, numpy_rows, True, monkeypatch)
+
+    assert [r["weighted_score"] for r in numpy_rows] == [r["weighted_score"] for r in scalar_rows]
+    assert [r["_local_metrics"] for r in numpy_rows] == [r["_local_metrics"] for r in scalar_rows]
+    assert numpy_norm == scalar_norm
+
+
+def test_numpy_scoring_matches_on_constant_column(monkeypatch):
+    eng = engine.RankEngine()
+    scalar_rows = [dict(r, views=7) for r in _rows(500, seed=3)]
+    numpy_rows = copy.deepcopy(scalar_rows)
+    assert _score(eng, numpy_rows, True, monkeypatch) == _score(eng, scalar_rows, False, monkeypatch)
+    assert [r["_local_metrics"]["views_n"] for r in numpy_rows] == [5.0] * len(numpy_rows)
@@ -0,0 +1,140 @@
+"""Paged Treeview diff of App._update_table, driven through a fake tree (no display needed)."""
+import random
+
+import pytest
+
+app = pytest.importorskip("app")
+
+PAGE = app.TABLE_PAGE_SIZE
+
+
+class FakeTree:
+    """The slice of ttk.Treeview _update_table uses, with the same ordering semantics."""
+
+    def __init__(self):
+        self.order = []
+        self.values = {}
+        self.calls = {"insert": 0, "item": 0, "move": 0, "delete": 0}
+
+    def insert(self, parent, index, iid, values):
+        assert iid not in self.values
+        self.order.insert(index, iid)
+        self.values[iid] = values
+        self.calls["insert"] += 1
+
+    def item(self, iid, values):
+        self.values[iid] = values
+        self.calls["item"] += 1
+
+    def move(self, iid, parent, index):
+        self.order.remove(iid)
+        self.order.insert(index, iid)
+        self.calls["move"] += 1
+
+    def delete(self, *iids):
+        for iid in iids:
+            self.order.remove(iid)
+            del self.values[iid]
+        self.calls["delete"] += len(iids)
+
+    def rows(self):
+        return [(iid, self.values[iid]) for iid in self.order]
+
+
+class FakeWidget:
+    def __init__(self):
+        self.options = {}
+
+    def config(self, **kw):
+        self.options.update(kw)
+
+
+def _app(results):
+    a = app.App.__new__(app.App)
+    a.tree = FakeTree()
+    a.page_prev_btn, a.page_next_btn, a.page_label = FakeWidget(), FakeWidget(), FakeWidget()
+    a._page = 0
+    a._shown_rows = {}
+    a._shown_order = []
+    a.results = results
+    return a
+
+
+def _board(n, seed=0):
+    rng = random.Random(seed)
+    rows = [{"mid": 1000 + i, "name": f"up{i}", "total_videos": rng.randint(1, 50), "views": rng.randint(0, 10 ** 6),
+             "likes": rng.randint(0, 10 ** 4), "score": rng.random() * 10} for i in range(n)]
+    rows.sort(key=lambda r: r["score"], reverse=True)
+    return rows
+
+
+def _expected(a):
+    start = a._page * PAGE
+    return [(f"up{r['mid']}", a._row_values(i, r)) for i, r in enumerate(a.results[start:start + PAGE], start=start + 1)]
+
+
+def test_paging_shows_one_page_at_a_time():
+    a = _app(_board(PAGE * 2 + 50))
+    a._update_table(reset_page=True)
+    assert a.tree.rows() == _expected(a)
+    assert a.page_prev_btn.options["state"] == app.tk.DISABLED
+    assert a.page_next_btn.options["state"] == app.tk.NORMAL
+
+    a._change_page(1)
+    a._change_page(1)
+    assert a.tree.rows() == _expected(a)
+    assert a.tree.rows()[0][1][0] == PAGE * 2 + 1 and len(a.tree.order) == 50
+    assert a.page_next_btn.options["state"] == app.tk.DISABLED
+    assert a.page_label.options["text"] == f"第 3/3 页，共 {PAGE * 2 + 50} 位UP主"
+
+    # a shorter board clamps the page instead of showing an empty table
+    a.results = a.results[:PAGE + 10]
+    a._update_table()
+    assert a._page == 1 and a.tree.rows() == _expected(a)
+
+
+def test_unchanged_board_touches_no_rows():
+    a = _app(_board(PAGE))
+    a._update_table(reset_page=True)
+    a.tree.calls = dict.fromkeys(a.tree.calls, 0)
+    a._update_table()
+    assert a.tree.calls == {"insert": 0, "item": 0, "move": 0, "delete": 0}
+
+
+def test_rerank_only_updates_changed_rows():
+    a = _app(_board(PAGE))
+    a._update_table(reset_page=True)
+    a.tree.calls = dict.fromkeys(a.tree.calls, 0)
+
+    # one row gets an LLM verdict without moving, one UP leaves, a new one enters
+    board = [dict(r) for r in a.results]
+    board[5]["llm_summary"] = "稳定输出"
+    gone = board.pop(40)
+    board.insert(10, {"mid": 1, "name": "新人", "total_videos": 1, "score": board[9]["score"]})
+    a.results = board
+    a._update_table()
+
+    assert a.tree.rows() == _expected(a)
+    assert gone["mid"] not in {int(iid[2:]) for iid in a.tree.order}
+    assert a.tree.calls["insert"] == 1 and a.tree.calls["delete"] == 1
+    # rows 11..40 shifted by one rank, so their values change; the rest stay untouched
+    assert a.tree.calls["item"] == 1 + 30
+    assert a.tree.calls["move"] == 0
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_reshuffles_match_a_fresh_render(seed):
+    rng = random.Random(seed)
+    a = _app(_board(PAGE + 30, seed))
+    a._update_table(reset_page=True)
+    for _ in range(10):
+        board = [dict(r, score=r["score"] + rng.uniform(-1, 1)) for r in a.results if rng.random() > 0.05]
+        board += [{"mid": rng.randint(10 ** 6, 10 ** 7), "name": "new", "score": rng.random() * 10} for _ in range(rng.randint(0, 10))]
+        board.sort(key=lambda r: r["score"], reverse=True)
+        a.results = board
+        if rng.random() < 0.3:
+            a._change_page(rng.choice([-1, 1]))
+        else:
+            a._update_table()
+        assert a.tree.rows() == _expected(a)
+        assert list(a._shown_rows) and set(a._shown_rows) == set(a.tree.order)